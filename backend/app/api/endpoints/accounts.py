@@ -6,6 +6,10 @@ from backend.app.models import Account, DailyAssetHistory
 from backend.app.schemas.user_account import AccountResponse, AccountUpdate, AccountWithUserResponse
 from backend.app.core.kis_client import KisClient
 from backend.app.core.security import decrypt_data, encrypt_data
+from backend.app.core.credential_cache import CredentialCache
+from backend.app.core.token_cache import TokenCache
+from backend.app.core.balance_cache import BalanceSnapshotCache
+from backend.app.core.token_refresher import TokenRefresher
 from typing import List
 
 router = APIRouter()
@@ -36,13 +40,14 @@ def get_all_accounts(db: Session = Depends(get_db)):
     return results
 
 @router.get("/{account_id}/balance")
-def get_account_balance(account_id: int, db: Session = Depends(get_db)):
+def get_account_balance(account_id: int, refresh: bool = False, db: Session = Depends(get_db)):
     account = db.query(Account).filter(Account.id == account_id).first()
     if not account:
         raise HTTPException(status_code=404, detail="Account not found")
     
     try:
-        balance_data = KisClient.get_balance(account=account, db=db)
+        # refresh=true bypasses the balance snapshot (manual refresh)
+        balance_data = KisClient.get_balance(account=account, db=db, use_cache=not refresh)
         
         # Inject Daily Metrics
         from datetime import datetime
@@ -82,6 +87,9 @@ def delete_account(account_id: int, db: Session = Depends(get_db)):
     
     db.delete(account)
     db.commit()
+    CredentialCache.invalidate(account_id)
+    TokenCache.invalidate(account_id)
+    TokenRefresher.forget(account_id)
     return {"message": "Account deleted"}
 
 @router.put("/{account_id}", response_model=AccountResponse)
@@ -106,6 +114,13 @@ def update_account(account_id: int, account_in: AccountUpdate, db: Session = Dep
     try:
         db.commit()
         db.refresh(account)
+        # Drop decrypted keys / header template / token built from the old values
+        CredentialCache.invalidate(account_id)
+        if account_in.app_key is not None or account_in.app_secret is not None:
+            TokenCache.invalidate(account_id)
+        # Snapshot was fetched for the old account number
+        if account_in.cano is not None or account_in.acnt_prdt_cd is not None:
+            BalanceSnapshotCache.invalidate(account_id, reason="account number changed")
         return account
     except Exception as e:
         db.rollback()
@@ -9,7 +9,7 @@ logger = logging.getLogger(__name__)
 BATCH_JOBS = {
     # "stock_master_sync": scheduler.sync_stock_master_job, # core/scheduler.py doesn't have this yet, keep disabled or implement?
     # tick is also missing in core/scheduler.py
-    "token_refresh": scheduler.scheduled_token_refresh,
+    "token_refresh": scheduler.force_token_refresh,
     "asset_recording": scheduler.record_daily_asset_job,
     "daily_buy": lambda: scheduler.execute_orders_by_action("BUY"),
     "daily_sell": lambda: scheduler.execute_orders_by_action("SELL"),
@@ -55,7 +55,7 @@ def delete_target(portfolio_id: int, db: Session = Depends(get_db)):
 async def analyze_rebalance(user_id: int, account_id: int, db: Session = Depends(get_db)):
     """리밸런싱 분석 실행"""
     from backend.app.models import Account
-    from backend.app.core.kis_client import KisClient
+    from backend.app.core.async_kis_client import AsyncKisClient
 
     # 1. 계좌 정보 가져오기
     account = db.query(Account).filter(Account.id == account_id).first()
@@ -69,7 +69,7 @@ async def analyze_rebalance(user_id: int, account_id: int, db: Session = Depends
 
     # 3. 현재 잔고 가져오기
     try:
-        balance_data = KisClient.get_balance(account=account, db=db)
+        balance_data = await AsyncKisClient.get_balance(account=account, db=db)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to fetch balance: {str(e)}")
 
@@ -78,6 +78,10 @@ async def analyze_rebalance(user_id: int, account_id: int, db: Session = Depends
     # Filter out 0-quantity holdings
     holdings = {item["pdno"]: item for item in balance_data["output1"] if int(item.get("hldg_qty", 0)) > 0}
 
+    # 보유 중이지 않은 목표 종목의 현재가는 한 번에 동시 조회
+    missing_codes = [t.stock_code for t in targets if t.stock_code != "CASH" and t.stock_code not in holdings]
+    missing_prices = await AsyncKisClient.get_prices(account=account, db=db, tickers=missing_codes)
+
     # 4. 분석 및 제안 생성
     suggestions = []
     total_target_pct = sum(t.target_percentage for t in targets)
@@ -116,9 +120,9 @@ async def analyze_rebalance(user_id: int, account_id: int, db: Session = Depends
             current_price = float(holding["prpr"])
             current_value = float(holding["evlu_amt"])
         else:
-            # 보유 중이지 않은 경우 현재가 따로 조회
+            # 보유 중이지 않은 경우 미리 조회한 현재가 사용
             try:
-                price_data = KisClient.get_price(account=account, db=db, ticker=t.stock_code)
+                price_data = missing_prices[t.stock_code]
                 current_price = float(price_data["output"]["stck_prpr"])
             except:
                 current_price = 0.0
@@ -3,8 +3,11 @@ from sqlalchemy.orm import Session
 from backend.app.db.session import SessionLocal
 from backend.app.models import Account
 from backend.app.core.config import settings
-from backend.app.core.security import decrypt_data
+from backend.app.core.security import blind_index
 from backend.app.core.auth_manager import AuthManager
+from backend.app.core.token_cache import TokenCache
+from backend.app.core.token_sync import TokenBroadcaster
+from backend.app.core.credential_cache import CredentialCache
 
 router = APIRouter()
 
@@ -26,19 +29,9 @@ def get_kis_token(account_number: str, db: Session = Depends(get_db), authorized
     Only allows extraction if local server has a valid one.
     Triggers refresh if local one is expired (act as Master).
     """
-    # Direct lookup is impossible due to encryption with random IV
-    # We must iterate and decrypt. Since account count is low (<10), this is acceptable.
-    accounts = db.query(Account).all()
-    account = None
-    for acc in accounts:
-        try:
-            decrypted_cano = decrypt_data(acc.cano)
-            if decrypted_cano == account_number:
-                account = acc
-                break
-        except Exception:
-            continue
-            
+    # Indexed lookup through the HMAC blind index (no decryption)
+    account = db.query(Account).filter(Account.cano_hash == blind_index(account_number)).first()
+    
     if not account:
         raise HTTPException(status_code=404, detail="Account not found")
     
@@ -47,10 +40,55 @@ def get_kis_token(account_number: str, db: Session = Depends(get_db), authorized
         # We use AuthManager.get_token which handles validation & refresh
         token = AuthManager.get_token(account, db)
         
+        # Cached expiry matches the returned token even if this ORM row is stale
+        entry = TokenCache.get_entry(account.id)
+        expired_at = entry.expires_at if entry else account.token_expired_at
+        
         # Return simplified data
         return {
             "access_token": token, # AuthManager.get_token returns decrypted token
-            "expired_at": account.token_expired_at.isoformat() if account.token_expired_at else None
+            "expired_at": expired_at.isoformat() if expired_at else None
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+def _token_snapshot() -> list:
+    """Currently valid tokens of every account (never triggers a refresh)"""
+    db = SessionLocal()
+    try:
+        tokens = []
+        for account in db.query(Account).all():
+            token = AuthManager.peek_token(account)
+            if token is None and AuthManager._is_token_valid(account):
+                token = AuthManager._cache_from_db(account)
+            if token is None:
+                continue
+            entry = TokenCache.get_entry(account.id)
+            tokens.append({
+                "account_number": CredentialCache.get(account).cano,
+                "access_token": token,
+                "expired_at": entry.expires_at.isoformat() if entry and entry.expires_at else None
+            })
+        return tokens
+    finally:
+        db.close()
+
+@router.get("/kis-tokens/subscribe")
+def subscribe_kis_tokens(since: int = -1, timeout: float = 25.0, authorized: bool = Depends(verify_sync_key)):
+    """
+    [Internal] Long-poll channel pushing newly minted tokens to slave nodes.
+    since=-1 (first call), a master restart, or falling behind the retained log
+    returns a full snapshot; otherwise the call parks until a new token is minted.
+    """
+    timeout = min(max(timeout, 0.0), settings.TOKEN_SYNC_POLL_TIMEOUT)
+    if 0 <= since <= TokenBroadcaster.version():
+        result = TokenBroadcaster.wait(since, timeout)
+        if not result["resync"]:
+            return {
+                "version": result["version"],
+                "snapshot": False,
+                "tokens": [event.to_dict() for event in result["events"]]
+            }
+
+    version = TokenBroadcaster.version()
+    return {"version": version, "snapshot": True, "tokens": _token_snapshot()}
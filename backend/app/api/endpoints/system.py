@@ -3,6 +3,17 @@ from datetime import datetime
 from pytz import timezone
 from backend.app.core.config import settings
 from backend.app.core.scheduler import scheduler, job_history
+from backend.app.core.quote_cache import QuoteCache
+from backend.app.core.balance_cache import BalanceSnapshotCache
+from backend.app.core.token_cache import TokenCache
+from backend.app.core.token_refresher import TokenRefresher
+from backend.app.core.token_sync import TokenBroadcaster, TokenSubscriber
+from backend.app.core.kis_client import KisClient
+from backend.app.core.async_kis_client import AsyncKisClient
+from backend.app.core.resilience import KisResilience
+from backend.app.core.io_executor import IoExecutor
+from backend.app.core.http_transport import HttpTransport
+from backend.app.core.websocket_manager import manager as ws_manager
 
 router = APIRouter()
 
@@ -42,5 +53,23 @@ def get_system_status():
         "app_env": settings.APP_ENV,
         "scheduler_enabled": settings.SCHEDULER_ENABLED,
         "scheduler_running": scheduler.running,
-        "active_jobs": jobs
+        "active_jobs": jobs,
+        "quote_cache": QuoteCache.stats(),
+        "balance_cache": BalanceSnapshotCache.stats(),
+        "token_cache": TokenCache.stats(),
+        "token_refresher": TokenRefresher.stats(),
+        "token_sync": {
+            "broadcaster": TokenBroadcaster.stats(),
+            "subscriber": TokenSubscriber.stats()
+        },
+        "request_coalescing": {
+            "balance": KisClient._balance_flight.stats(),
+            "price": KisClient._price_flight.stats(),
+            "async_balance": AsyncKisClient._balance_flight.stats(),
+            "async_price": AsyncKisClient._price_flight.stats()
+        },
+        "kis_resilience": KisResilience.snapshot(),
+        "io_executor": IoExecutor.stats(),
+        "http_transport": HttpTransport.stats(),
+        "websocket": ws_manager.stats()
     }
@@ -4,7 +4,7 @@ from typing import List
 from backend.app.db.session import get_db
 from backend.app.models import User, Account
 from backend.app.schemas.user_account import UserCreate, UserResponse, AccountCreate, AccountResponse, AccountResponseWithKeys
-from backend.app.core.security import encrypt_data
+from backend.app.core.security import encrypt_data, blind_index
 
 router = APIRouter()
 
@@ -42,12 +42,13 @@ def create_account(user_id: int, account: AccountCreate, db: Session = Depends(g
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
         
-    # Check for duplicate CANO (Decryption required due to randomized encryption)
-    from backend.app.core.security import decrypt_data
-    existing_accounts = db.query(Account).filter(Account.user_id == user_id).all()
-    for existing in existing_accounts:
-        if decrypt_data(existing.cano) == account.cano:
-            raise HTTPException(status_code=400, detail="Account already exists for this user")
+    # Check for duplicate CANO (blind index; ciphertexts are randomized)
+    existing = db.query(Account).filter(
+        Account.user_id == user_id,
+        Account.cano_hash == blind_index(account.cano)
+    ).first()
+    if existing:
+        raise HTTPException(status_code=400, detail="Account already exists for this user")
 
     # Encrypt Sensitive Data
     db_account = Account(
@@ -4,12 +4,34 @@ from sqlalchemy.orm import Session
 from backend.app.db.session import get_db
 from backend.app.models import Account
 from backend.app.core.websocket_manager import manager
-from backend.app.core.kis_client import KisClient
+import json
 import logging
 
 router = APIRouter()
 logger = logging.getLogger("websocket_endpoint")
 
+async def handle_client_message(websocket: WebSocket, data: str):
+    """
+    Per-client price subscriptions:
+    {"action": "subscribe" | "unsubscribe", "codes": ["005930", ...]}
+    """
+    try:
+        message = json.loads(data)
+    except ValueError:
+        manager.send(websocket, {"error": "Invalid JSON message"})
+        return
+
+    action = message.get("action")
+    codes = [str(code) for code in message.get("codes") or []]
+    if action == "subscribe":
+        current = await manager.subscribe_client(websocket, codes)
+    elif action == "unsubscribe":
+        current = manager.unsubscribe_client(websocket, codes or None)
+    else:
+        manager.send(websocket, {"error": f"Unknown action: {action}"})
+        return
+    manager.send(websocket, {"type": "SUBSCRIPTIONS", "codes": current})
+
 @router.websocket("/orders/{account_id}")
 async def websocket_orders(websocket: WebSocket, account_id: int, db: Session = Depends(get_db)):
     await manager.connect_client(websocket)
@@ -17,28 +39,24 @@ async def websocket_orders(websocket: WebSocket, account_id: int, db: Session =
         # Get Account
         account = db.query(Account).filter(Account.id == account_id).first()
         if not account:
+            manager.disconnect_client(websocket)
             await websocket.send_json({"error": "Account not found"})
-            await manager.disconnect_client(websocket)
             return
 
-        # Ensure KIS Connection
-        if not manager.is_connected:
-            try:
-                # 1. Get Approval Key
-                approval_key = KisClient.get_approval_key(account, db)
-                # 2. Connect to KIS
-                await manager.connect(approval_key)
-            except Exception as e:
-                logger.error(f"Failed to initialize KIS WS: {e}")
-                await websocket.send_json({"error": f"Failed to connect KIS: {str(e)}"})
-                # We don't disconnect client immediately, maybe retry? 
-                # But for now, allow connection but warn.
+        # Ensure this account's KIS session (own approval key)
+        try:
+            await manager.ensure_session(account, db)
+        except Exception as e:
+            logger.error(f"Failed to initialize KIS WS: {e}")
+            manager.send(websocket, {"error": f"Failed to connect KIS: {str(e)}"})
+            # We don't disconnect client immediately, maybe retry? 
+            # But for now, allow connection but warn.
         
-        # Subscribe to Executions if HTS ID exists
+        # Subscribe to Executions if HTS ID exists (released when this client leaves)
         if account.hts_id:
-            await manager.subscribe_execution(account, account.hts_id)
+            await manager.subscribe_execution(account, account.hts_id, websocket)
         else:
-            await websocket.send_json({"warning": "No HTS ID found. Real-time execution updates disabled."})
+            manager.send(websocket, {"warning": "No HTS ID found. Real-time execution updates disabled."})
             logger.warning(f"Account {account_id} has no HTS ID")
 
         # Keep connection alive
@@ -46,7 +64,10 @@ async def websocket_orders(websocket: WebSocket, account_id: int, db: Session =
             data = await websocket.receive_text()
             # Handle client messages if any (e.g. ping)
             if data == "ping":
-                await websocket.send_text("pong")
+                # Through the client's send queue (its sender task owns the socket)
+                manager.send_text(websocket, "pong")
+            elif data.startswith("{"):
+                await handle_client_message(websocket, data)
 
     except WebSocketDisconnect:
         manager.disconnect_client(websocket)
@@ -54,22 +75,10 @@ async def websocket_orders(websocket: WebSocket, account_id: int, db: Session =
         logger.error(f"WebSocket Error: {e}")
         manager.disconnect_client(websocket)
 
-from pydantic import BaseModel
-from typing import List
-
-class SubscriptionRequest(BaseModel):
-    codes: List[str]
-
-@router.post("/subscribe")
-async def subscribe_stocks(req: SubscriptionRequest):
-    """Subscribe to real-time price updates for a list of stocks."""
-    if not req.codes:
-        return {"message": "No codes provided"}
-    
-    for code in req.codes:
-        # Ignore CASH or invalid codes
-        if code == "CASH" or not code:
-            continue
-        await manager.subscribe_stock_price(code)
-    
-    return {"message": f"Subscribed to {len(req.codes)} stocks"}
+@router.post("/subscribe", status_code=410)
+async def subscribe_stocks():
+    """
+    Removed: it subscribed every connected client to the given codes.
+    Clients send {"action": "subscribe", "codes": [...]} over their own socket.
+    """
+    raise HTTPException(status_code=410, detail='Use {"action": "subscribe", "codes": [...]} on /ws/orders/{account_id}')
@@ -0,0 +1,415 @@
+import asyncio
+import weakref
+import httpx
+from datetime import datetime
+from typing import Dict, Any, List
+from sqlalchemy.orm import Session
+from backend.app.core.config import settings, get_base_url
+from backend.app.core.auth_manager import AuthManager
+from backend.app.core.kis_client import KisClient
+from backend.app.core.http_transport import HttpTransport
+from backend.app.core.rate_limiter import RateLimiter
+from backend.app.core.quote_cache import QuoteCache
+from backend.app.core.single_flight import AsyncSingleFlight
+from backend.app.core.credential_cache import CredentialCache
+from backend.app.core.resilience import KisResilience
+from backend.app.core.balance_cache import BalanceSnapshotCache
+from backend.app.core.metrics import KisCallTimer
+from backend.app.models import Account
+
+class AsyncKisClient:
+    """
+    Asyncio twin of KisClient.
+    Same methods and return shapes, built on a pooled httpx.AsyncClient,
+    so async endpoints never block the event loop on KIS I/O.
+    """
+    # httpx.AsyncClient is bound to the loop it was created on
+    # (uvicorn loop, asyncio.run() in scheduler jobs, ...), so keep one per loop.
+    _clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = weakref.WeakKeyDictionary()
+    _refresh_locks: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Lock]" = weakref.WeakKeyDictionary()
+
+    # Concurrent identical lookups share one upstream request
+    _balance_flight = AsyncSingleFlight("balance") # key: (account, TR, params)
+    _price_flight = AsyncSingleFlight("price")     # key: ticker
+
+    @classmethod
+    def get_client(cls) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        client = cls._clients.get(loop)
+        if client is None or client.is_closed:
+            client = httpx.AsyncClient(
+                limits=httpx.Limits(
+                    max_connections=settings.KIS_HTTP_POOL_MAXSIZE,
+                    max_keepalive_connections=settings.KIS_HTTP_POOL_MAXSIZE
+                ),
+                timeout=httpx.Timeout(settings.KIS_HTTP_READ_TIMEOUT, connect=settings.KIS_HTTP_CONNECT_TIMEOUT)
+            )
+            cls._clients[loop] = client
+        return client
+
+    @classmethod
+    async def aclose(cls):
+        """Close the client bound to the running loop"""
+        loop = asyncio.get_running_loop()
+        client = cls._clients.pop(loop, None)
+        if client is not None:
+            await client.aclose()
+
+    @classmethod
+    async def _send(cls, method: str, url: str, headers: Dict[str, str], bucket: str = None, endpoint: str = None, idempotent: bool = True, **kwargs) -> httpx.Response:
+        """
+        Single exit point for KIS REST calls: rate budget (bucket), retries and
+        per-endpoint circuit breaker (KisResilience). Returns the final response.
+        """
+        endpoint = endpoint or headers.get("tr_id") or url
+
+        async def attempt():
+            if bucket:
+                await RateLimiter.acquire_async(headers["appkey"], bucket)
+            # Same global in-flight budget as the sync path
+            async with HttpTransport.async_slot():
+                with KisCallTimer(endpoint) as timer:
+                    return timer.response(await cls.get_client().request(method, url, headers=headers, **kwargs))
+
+        return await KisResilience.execute_async(endpoint, attempt, idempotent=idempotent)
+
+    @classmethod
+    async def _get_headers(cls, account: Account, db: Session, tr_id: str = None) -> Dict[str, str]:
+        if AuthManager.peek_token(account):
+            return KisClient._get_headers(account, db, tr_id=tr_id)
+
+        # Token refresh is a blocking OAuth round trip + DB commit.
+        # Run it off the loop, one at a time, since callers share the same Session.
+        loop = asyncio.get_running_loop()
+        lock = cls._refresh_locks.get(loop)
+        if lock is None:
+            lock = cls._refresh_locks[loop] = asyncio.Lock()
+        async with lock:
+            return await asyncio.to_thread(KisClient._get_headers, account, db, tr_id)
+
+    @staticmethod
+    def _raise_for_kis(res: httpx.Response, context: str) -> Dict[str, Any]:
+        """Raise ValueError with KIS msg1/msg_cd on HTTP or business error, else return JSON"""
+        if res.is_error:
+            try:
+                err_data = res.json()
+                err_msg = err_data.get('msg1') or err_data.get('message') or res.text
+                err_code = err_data.get('msg_cd') or err_data.get('code')
+                detailed_msg = f"KIS Failed: {err_msg} ({err_code})"
+            except ValueError:
+                detailed_msg = f"KIS HTTP Error ({res.status_code}): {res.text or res.reason_phrase}"
+            print(f"[AsyncKisClient] Error {context}: {detailed_msg}")
+            raise ValueError(detailed_msg)
+
+        data = res.json()
+        if "rt_cd" in data and data.get("rt_cd") != "0":
+            error_msg = f"KIS Error: {data.get('msg1')} ({data.get('msg_cd')})"
+            print(f"[AsyncKisClient] Error {context}: {error_msg}")
+            raise ValueError(error_msg)
+        return data
+
+    @classmethod
+    async def get_balance(cls, account: Account, db: Session, use_cache: bool = True) -> Dict[str, Any]:
+        """
+        Get Account Balance (TTTC8434R), holdings enriched with current price concurrently.
+        Follows tr_cont continuation; pricing of each page starts as soon as it arrives.
+        Concurrent calls for the same account are coalesced into one request.
+        Served from BalanceSnapshotCache until a fill / order invalidates it (use_cache=False to bypass).
+        """
+        if use_cache:
+            cached = BalanceSnapshotCache.get(account.id)
+            if cached is not None:
+                return cached
+
+        tr_id = "TTTC8434R"
+        params = KisClient._balance_params(account)
+        flight_key = (account.id, tr_id, tuple(sorted((k, v) for k, v in params.items() if k != "CANO")))
+        return await cls._balance_flight.do(flight_key, lambda: cls._fetch_and_store_balance(account, db, tr_id, params))
+
+    @classmethod
+    async def _fetch_and_store_balance(cls, account: Account, db: Session, tr_id: str, params: Dict[str, str]) -> Dict[str, Any]:
+        generation = BalanceSnapshotCache.generation(account.id)
+        data = await cls._fetch_balance(account, db, tr_id, params)
+        BalanceSnapshotCache.put(account.id, data, generation)
+        return data
+
+    @classmethod
+    async def _fetch_balance(cls, account: Account, db: Session, tr_id: str, params: Dict[str, str]) -> Dict[str, Any]:
+        url = f"{get_base_url()}/uapi/domestic-stock/v1/trading/inquire-balance"
+        tr_cont = ""
+        data = None
+        holdings = []
+        pricing = []
+
+        for _ in range(settings.KIS_BALANCE_MAX_PAGES):
+            headers = await cls._get_headers(account, db, tr_id=tr_id)
+            headers["tr_cont"] = tr_cont
+
+            res = await cls._send("GET", url, headers, RateLimiter.INQUIRY, params=params)
+            data = cls._raise_for_kis(res, "fetching balance")
+
+            page_holdings = data.get("output1", [])
+            holdings.extend(page_holdings)
+            if page_holdings:
+                pricing.append(asyncio.create_task(cls._enrich_holdings(account, db, page_holdings)))
+
+            # tr_cont: "F"/"M" = more pages, "D"/"E" = last page
+            next_nk = (data.get("ctx_area_nk100") or "").strip()
+            if res.headers.get("tr_cont") not in ("F", "M") or not next_nk:
+                break
+            params["CTX_AREA_FK100"] = (data.get("ctx_area_fk100") or "").strip()
+            params["CTX_AREA_NK100"] = next_nk
+            tr_cont = "N"
+
+        if pricing:
+            await asyncio.gather(*pricing)
+
+        data["output1"] = holdings
+        return data
+
+    @classmethod
+    async def _enrich_holdings(cls, account: Account, db: Session, holdings: List[Dict[str, Any]]):
+        """Overlay real-time price fields on holding rows (batched quote requests)"""
+        try:
+            prices = await cls.get_prices(account, db, [h.get("pdno") for h in holdings])
+        except Exception as e:
+            print(f"[AsyncKisClient] Failed to enrich holdings: {e}")
+            return
+
+        for holding in holdings:
+            output = prices.get(holding.get("pdno"), {}).get("output", {})
+            if output:
+                holding["prdy_vrss"] = output.get("prdy_vrss")
+                holding["prdy_ctrt"] = output.get("prdy_ctrt")
+                holding["prpr"] = output.get("stck_prpr")
+
+    @classmethod
+    async def get_price(cls, account: Account, db: Session, ticker: str) -> Dict[str, Any]:
+        """
+        Get Current Price for a ticker (FHKST01010100).
+        Served from the process-wide QuoteCache when fresh.
+        """
+        cached = QuoteCache.get(ticker)
+        if cached is not None:
+            return cached
+
+        return await cls._price_flight.do(ticker, lambda: cls._fetch_price(account, db, ticker))
+
+    @classmethod
+    async def _fetch_price(cls, account: Account, db: Session, ticker: str) -> Dict[str, Any]:
+        url = f"{get_base_url()}/uapi/domestic-stock/v1/quotations/inquire-price"
+        tr_id = "FHKST01010100"
+
+        headers = await cls._get_headers(account, db, tr_id=tr_id)
+        params = {
+            "FID_COND_MRKT_DIV_CODE": "J",
+            "FID_INPUT_ISCD": ticker
+        }
+
+        res = await cls._send("GET", url, headers, RateLimiter.INQUIRY, params=params)
+        data = cls._raise_for_kis(res, f"fetching price for {ticker}")
+        if data.get("output"):
+            QuoteCache.put(ticker, data)
+        return data
+
+    @classmethod
+    async def get_prices(cls, account: Account, db: Session, tickers: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Batch quote: ticker -> price response (same shape as get_price()).
+        Cache misses are fetched with the multi-stock quotation TR (FHKST11300006),
+        KIS_MULTI_QUOTE_MAX tickers per request, chunks in flight concurrently.
+        Tickers the batch TR cannot price fall back to get_price. Failed tickers are omitted.
+        """
+        unique = list(dict.fromkeys(t for t in tickers if t and t != "CASH"))
+        prices = {}
+        misses = []
+        for ticker in unique:
+            cached = QuoteCache.get(ticker)
+            if cached is not None:
+                prices[ticker] = cached
+            else:
+                misses.append(ticker)
+
+        chunk_size = settings.KIS_MULTI_QUOTE_MAX
+        chunks = [misses[i:i + chunk_size] for i in range(0, len(misses), chunk_size)]
+
+        async def fetch_chunk(chunk):
+            try:
+                return await cls._price_flight.do(("multi",) + tuple(chunk), lambda: cls._fetch_multi_price(account, db, chunk))
+            except Exception as e:
+                print(f"[AsyncKisClient] Multi-quote failed, falling back to single quotes: {e}")
+                return {}
+
+        for result in await asyncio.gather(*(fetch_chunk(c) for c in chunks)):
+            prices.update(result)
+
+        leftovers = [t for t in misses if t not in prices]
+        results = await asyncio.gather(*(cls.get_price(account, db, t) for t in leftovers), return_exceptions=True)
+        for ticker, result in zip(leftovers, results):
+            if isinstance(result, Exception):
+                print(f"[AsyncKisClient] Error fetching price for {ticker}: {result}")
+                continue
+            prices[ticker] = result
+        return prices
+
+    @classmethod
+    async def _fetch_multi_price(cls, account: Account, db: Session, tickers: List[str]) -> Dict[str, Dict[str, Any]]:
+        url = f"{get_base_url()}/uapi/domestic-stock/v1/quotations/intstock-multprice"
+        tr_id = "FHKST11300006"
+
+        headers = await cls._get_headers(account, db, tr_id=tr_id)
+        params = KisClient._multi_price_params(tickers)
+
+        res = await cls._send("GET", url, headers, RateLimiter.INQUIRY, params=params)
+        data = cls._raise_for_kis(res, "fetching multi-quote")
+        return KisClient._parse_multi_price(data)
+
+    @classmethod
+    async def _get_hashkey(cls, account: Account, payload: Dict[str, Any]) -> str:
+        """
+        Generate Hashkey for POST requests.
+        """
+        url = f"{get_base_url()}/uapi/hashkey"
+        creds = CredentialCache.get(account)
+        headers = {
+            "content-type": "application/json",
+            "appkey": creds.app_key,
+            "appsecret": creds.app_secret
+        }
+
+        res = await cls._send("POST", url, headers, None, endpoint="hashkey", json=payload)
+        data = cls._raise_for_kis(res, "generating hashkey")
+        return data["HASH"]
+
+    @classmethod
+    async def place_order(cls, account: Account, db: Session, ticker: str, quantity: int, price: float, action: str, ord_dvsn: str = "00") -> Dict[str, Any]:
+        """
+        Place Order.
+        ord_dvsn: "00" (Limit), "01" (Market), etc.
+        """
+        url = f"{get_base_url()}/uapi/domestic-stock/v1/trading/order-cash"
+        tr_id = "TTTC0802U" if action.upper() == "BUY" else "TTTC0801U"
+
+        headers = await cls._get_headers(account, db, tr_id=tr_id)
+
+        # If Market Order, Price must be "0"
+        final_price = "0" if ord_dvsn == "01" else str(int(price))
+
+        payload = {
+            "CANO": CredentialCache.get(account).cano,
+            "ACNT_PRDT_CD": account.acnt_prdt_cd,
+            "PDNO": ticker,
+            "ORD_DVSN": ord_dvsn,
+            "ORD_QTY": str(quantity),
+            "ORD_UNPR": final_price,
+        }
+        headers["hashkey"] = await cls._get_hashkey(account, payload)
+
+        try:
+            res = await cls._send("POST", url, headers, RateLimiter.ORDER, idempotent=False, json=payload)
+            return cls._raise_for_kis(res, "placing order")
+        finally:
+            # Sent (or possibly sent): holdings / orderable cash may have changed
+            BalanceSnapshotCache.invalidate(account.id)
+
+    @classmethod
+    async def get_unfilled_orders(cls, account: Account, db: Session) -> Dict[str, Any]:
+        """
+        Get Unfilled Orders (inquire-psbl-rvsecncl).
+        """
+        url = f"{get_base_url()}/uapi/domestic-stock/v1/trading/inquire-psbl-rvsecncl"
+        tr_id = "TTTC0084R"
+
+        headers = await cls._get_headers(account, db, tr_id=tr_id)
+        params = {
+            "CANO": CredentialCache.get(account).cano,
+            "ACNT_PRDT_CD": account.acnt_prdt_cd,
+            "CTX_AREA_FK100": "",
+            "CTX_AREA_NK100": "",
+            "INQR_DVSN_1": "1", # 1:Stock Order Seq
+            "INQR_DVSN_2": "0", # 0:All, 1:Sell, 2:Buy
+        }
+
+        res = await cls._send("GET", url, headers, RateLimiter.INQUIRY, params=params)
+        return cls._raise_for_kis(res, "fetching unfilled orders")
+
+    @classmethod
+    async def get_executed_orders(cls, account: Account, db: Session) -> Dict[str, Any]:
+        """
+        Get Daily Execution History (TTTC8001R).
+        """
+        url = f"{get_base_url()}/uapi/domestic-stock/v1/trading/inquire-daily-ccld"
+        tr_id = "TTTC8001R"
+
+        headers = await cls._get_headers(account, db, tr_id=tr_id)
+        today = datetime.now().strftime("%Y%m%d")
+        params = {
+            "CANO": CredentialCache.get(account).cano,
+            "ACNT_PRDT_CD": account.acnt_prdt_cd,
+            "INQR_STRT_DT": today,
+            "INQR_END_DT": today,
+            "SLL_BUY_DVSN_CD": "00", # 00:All, 01:Sell, 02:Buy
+            "INQR_DVSN": "00",       # 00:Descending, 01:Ascending
+            "CCLD_DVSN": "01",       # 01:Executed Only
+            "ORD_GNO_BRNO": "",
+            "ODNO": "",
+            "PDNO": "",
+            "INQR_DVSN_3": "00",
+            "INQR_DVSN_1": "",
+            "CTX_AREA_FK100": "",
+            "CTX_AREA_NK100": ""
+        }
+
+        res = await cls._send("GET", url, headers, RateLimiter.INQUIRY, params=params)
+        return cls._raise_for_kis(res, "fetching executed orders")
+
+    @classmethod
+    async def revise_cancel_order(cls, account: Account, db: Session, orgn_odno: str, revision_type: str, quantity: int, price: float, ord_dvsn: str = "00", all_qty: bool = True) -> Dict[str, Any]:
+        """
+        Revise or Cancel Order (TTTC0803U).
+        revision_type: "01" (Change), "02" (Cancel)
+        """
+        url = f"{get_base_url()}/uapi/domestic-stock/v1/trading/order-rvsecncl"
+        tr_id = "TTTC0803U"
+
+        headers = await cls._get_headers(account, db, tr_id=tr_id)
+
+        final_price = "0" if ord_dvsn == "01" else str(int(price))
+        is_cancel = revision_type == "02"
+
+        payload = {
+            "CANO": CredentialCache.get(account).cano,
+            "ACNT_PRDT_CD": account.acnt_prdt_cd,
+            "KRX_FWDG_ORD_ORGNO": " ",
+            "ORGN_ODNO": orgn_odno,
+            "RVSE_CNCL_DVSN_CD": revision_type,
+            "ORD_DVSN": ord_dvsn,
+            "ORD_QTY": "0" if (is_cancel and all_qty) else str(quantity),
+            "ORD_UNPR": "0" if (is_cancel and all_qty) else final_price,
+            "QTY_ALL_ORD_YN": "Y" if all_qty else "N"
+        }
+        headers["hashkey"] = await cls._get_hashkey(account, payload)
+
+        try:
+            res = await cls._send("POST", url, headers, RateLimiter.ORDER, idempotent=False, json=payload)
+            return cls._raise_for_kis(res, "revising/cancelling order")
+        finally:
+            # Sent (or possibly sent): holdings / orderable cash may have changed
+            BalanceSnapshotCache.invalidate(account.id)
+
+    @classmethod
+    async def get_approval_key(cls, account: Account, db: Session) -> str:
+        """
+        Get WebSocket Approval Key (POST /oauth2/Approval)
+        """
+        url = f"{get_base_url()}/oauth2/Approval"
+        creds = CredentialCache.get(account)
+        body = {
+            "grant_type": "client_credentials",
+            "appkey": creds.app_key,
+            "secretkey": creds.app_secret
+        }
+
+        res = await cls._send("POST", url, {}, None, endpoint="Approval", json=body)
+        data = cls._raise_for_kis(res, "getting approval key")
+        return data.get("approval_key")
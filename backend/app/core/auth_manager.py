@@ -1,36 +1,74 @@
-import requests
 import threading
 import time
 from datetime import datetime, timedelta
+from typing import Dict
 from sqlalchemy.orm import Session
 from backend.app.core.config import settings, get_base_url
+from backend.app.core.http_transport import HttpTransport
 from backend.app.models import Account
 from backend.app.core.security import decrypt_data, encrypt_data
+from backend.app.core.credential_cache import CredentialCache
+from backend.app.core.token_cache import TokenCache
+from backend.app.core.token_refresher import TokenRefresher
+from backend.app.core.token_sync import TokenBroadcaster
+from backend.app.core.metrics import KisCallTimer
 
 class AuthManager:
+    # Lock striping: one refresh lock per account, so a slow refresh (or master sync)
+    # only blocks callers of the same account. _lock guards the lock table itself.
     _lock = threading.Lock()
+    _account_locks: Dict[int, threading.Lock] = {}
+
+    @classmethod
+    def _get_account_lock(cls, account_id: int) -> threading.Lock:
+        lock = cls._account_locks.get(account_id)
+        if lock is None:
+            with cls._lock:
+                lock = cls._account_locks.setdefault(account_id, threading.Lock())
+        return lock
 
     @classmethod
     def get_token(cls, account: Account, db: Session) -> str:
         """
         Get valid access token for the specific account.
+        Hot path is a TokenCache lookup; the DB is consulted only on a cache miss.
         If expired or missing, refresh it synchronously and update DB.
         """
-        # 1. First check (Optimistic)
+        # 1. Process-level cache (no decrypt, no DB)
+        token = TokenCache.get(account.id)
+        if token:
+            return token
+
+        # 2. Optimistic check on the loaded row (e.g. first call after startup)
         if cls._is_token_valid(account):
-            # Decrypt stored token
-            return decrypt_data(account.access_token)
+            return cls._cache_from_db(account)
         
-        # 2. Acquire Lock for Double-Checked Locking
-        with cls._lock:
-            # 3. Refresh instance state to ensure we have latest data
-            # (In case another thread updated it while we waited)
+        # 3. Acquire this account's Lock for Double-Checked Locking
+        with cls._get_account_lock(account.id):
+            # Another thread may have refreshed while we waited
+            token = TokenCache.get(account.id)
+            if token:
+                return token
+
+            # Refresh instance state (another process may have updated the DB)
             db.refresh(account)
             
             if cls._is_token_valid(account):
-                return decrypt_data(account.access_token)
+                return cls._cache_from_db(account)
 
             return cls._refresh_token(account, db)
+
+    @classmethod
+    def peek_token(cls, account: Account) -> str:
+        """Cached valid token or None. Never decrypts, refreshes or touches the DB."""
+        return TokenCache.get(account.id)
+
+    @staticmethod
+    def _cache_from_db(account: Account) -> str:
+        token = decrypt_data(account.access_token)
+        TokenCache.put(account.id, token, account.token_expired_at)
+        TokenRefresher.track(account.id, account.token_expired_at)
+        return token
     
     @classmethod
     def _is_token_valid(cls, account: Account) -> bool:
@@ -46,9 +84,9 @@ class AuthManager:
             try:
                 print(f"[Auth] Fetching token from Master: {settings.MASTER_API_URL}")
                 # Decrypt CANO for sync
-                account_number = decrypt_data(account.cano)
+                account_number = CredentialCache.get(account).cano
                 sync_url = f"{settings.MASTER_API_URL}/v1/sync/kis-token/{account_number}"
-                res = requests.get(sync_url, headers={"x-sync-key": settings.SYNC_API_KEY}, timeout=5)
+                res = HttpTransport.get(sync_url, headers={"x-sync-key": settings.SYNC_API_KEY}, timeout=5)
                 res.raise_for_status()
                 data = res.json()
                 
@@ -62,6 +100,14 @@ class AuthManager:
                 
                 db.commit()
                 db.refresh(account)
+                if expired_at_str:
+                    TokenCache.put(account.id, new_token, account.token_expired_at)
+                    TokenRefresher.track(account.id, account.token_expired_at)
+                else:
+                    # Master sent no expiry: token_expired_at still belongs to the previous
+                    # token, so don't cache / schedule the new one against it
+                    TokenCache.invalidate(account.id)
+                CredentialCache.invalidate_headers(account.id)
                 return new_token
             except Exception as e:
                 print(f"[Auth] Failed to sync token from Master: {e}")
@@ -75,8 +121,9 @@ class AuthManager:
         # Normal Direct Refresh Logic
         url = f"{get_base_url()}/oauth2/tokenP"
         
-        app_key = decrypt_data(account.app_key)
-        app_secret = decrypt_data(account.app_secret)
+        creds = CredentialCache.get(account)
+        app_key = creds.app_key
+        app_secret = creds.app_secret
         
         if not app_key or not app_secret:
              raise ValueError("Credentials missing for account")
@@ -88,7 +135,8 @@ class AuthManager:
         }
         
         try:
-            res = requests.post(url, json=payload)
+            with KisCallTimer("tokenP") as timer:
+                res = timer.response(HttpTransport.post(url, json=payload))
             res.raise_for_status()
             data = res.json()
             
@@ -101,6 +149,11 @@ class AuthManager:
             
             db.commit()
             db.refresh(account)
+            TokenCache.put(account.id, new_token, account.token_expired_at)
+            TokenRefresher.track(account.id, account.token_expired_at)
+            CredentialCache.invalidate_headers(account.id)
+            # Push to subscribed slave nodes (no-op without subscribers)
+            TokenBroadcaster.publish(creds.cano, new_token, account.token_expired_at)
             
             return new_token
             
@@ -114,10 +167,14 @@ class AuthManager:
     def check_and_refresh_all_accounts(cls, db: Session):
         """
         Check all accounts and refresh tokens if they expire within 1 hour.
+        Due accounts are refreshed concurrently, each with its own DB session.
         """
+        from backend.app.db.session import SessionLocal
+        from backend.app.core.io_executor import IoExecutor
+
         print(f"[Auth] Checking for expiring tokens at {datetime.now()}...")
         accounts = db.query(Account).all()
-        count = 0
+        due = []
         for account in accounts:
             if not account.access_token or not account.token_expired_at:
                 continue
@@ -126,12 +183,23 @@ class AuthManager:
             # Buffer: If remaining time < 3600s, refresh.
             remaining = (account.token_expired_at - datetime.now()).total_seconds()
             if remaining < 3600:
-                try:
-                    print(f"[Auth] Token for {account.alias} expires in {int(remaining)}s. Refreshing...")
-                    cls._refresh_token(account, db)
-                    count += 1
-                except Exception as e:
-                    print(f"[Auth] Failed to auto-refresh token for {account.alias}: {e}")
+                print(f"[Auth] Token for {account.alias} expires in {int(remaining)}s. Refreshing...")
+                due.append((account.id, account.alias))
+
+        def refresh(account_id: int, alias: str) -> bool:
+            session = SessionLocal()
+            try:
+                target = session.query(Account).filter(Account.id == account_id).first()
+                with cls._get_account_lock(account_id):
+                    cls._refresh_token(target, session)
+                return True
+            except Exception as e:
+                print(f"[Auth] Failed to auto-refresh token for {alias}: {e}")
+                return False
+            finally:
+                session.close()
+
+        count = sum(IoExecutor.run_all([lambda a=a: refresh(*a) for a in due]))
         
         if count > 0:
             print(f"[Auth] Refreshed {count} tokens.")
@@ -0,0 +1,140 @@
+import copy
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+from backend.app.core.config import settings
+
+def _num(value) -> int:
+    try:
+        return int(float(value or 0))
+    except (TypeError, ValueError):
+        return 0
+
+def apply_fill_to_balance(data: Dict[str, Any], ticker: str, side: str, qty: int, price: int, name: str = "") -> Optional[Dict[str, Any]]:
+    """
+    Patch the holding row (output1) of an inquire-balance result for one fill and
+    return it (hldg_qty "0" once sold out, None for a sell of an unknown ticker).
+    The output2 summary (deposit / totals) is left alone: fees, taxes and D+2
+    settlement can't be derived from the notice, so it waits for the next full fetch.
+    """
+    rows: List[Dict[str, Any]] = data.setdefault("output1", [])
+    row = next((r for r in rows if r.get("pdno") == ticker), None)
+    if row is None:
+        if side != "BUY":
+            return None
+        row = {"pdno": ticker, "prdt_name": name, "hldg_qty": "0", "pchs_amt": "0", "prpr": str(price)}
+        rows.append(row)
+
+    held = _num(row.get("hldg_qty"))
+    bought = _num(row.get("pchs_amt"))
+    if side == "BUY":
+        held, bought = held + qty, bought + qty * price
+    else:
+        remaining = max(held - qty, 0)
+        bought = round(bought * remaining / held) if held else 0
+        held = remaining
+
+    if held == 0:
+        rows.remove(row)
+        return {**row, "hldg_qty": "0", "pchs_amt": "0", "evlu_amt": "0"}
+    current = _num(row.get("prpr")) or price
+    evaluation = held * current
+    row.update({
+        "hldg_qty": str(held),
+        "pchs_amt": str(bought),
+        "pchs_avg_pric": f"{bought / held:.4f}",
+        "evlu_amt": str(evaluation),
+        "evlu_pfls_amt": str(evaluation - bought),
+        "evlu_pfls_rt": f"{((evaluation - bought) / bought * 100) if bought else 0:.2f}"
+    })
+    return row
+
+class BalanceSnapshotCache:
+    """
+    Per-account snapshot of the last enriched inquire-balance result.
+    A snapshot stays valid until something changes the account:
+    - order placed / revised / cancelled through KisClient
+    - BALANCE_SNAPSHOT_MAX_AGE seconds elapsed (fallback)
+    H0STCNI0 fills patch the snapshot in place (apply_fill) instead of dropping it.
+
+    Each invalidation bumps the account's generation, so a fetch that started
+    before a fill can never store its (stale) result afterwards. A global
+    invalidation bumps the epoch instead, which also covers accounts the cache
+    has never seen.
+    """
+    _entries: Dict[int, Tuple[float, Dict[str, Any]]] = {}
+    _generations: Dict[int, int] = {}
+    _epoch = 0
+    _lock = threading.Lock()
+    _hits = 0
+    _misses = 0
+    _invalidations = 0
+    _incremental_updates = 0
+
+    @classmethod
+    def get(cls, account_id: int) -> Optional[Dict[str, Any]]:
+        with cls._lock:
+            entry = cls._entries.get(account_id)
+            if entry is None or (time.monotonic() - entry[0]) >= settings.BALANCE_SNAPSHOT_MAX_AGE:
+                cls._misses += 1
+                return None
+            cls._hits += 1
+            data = entry[1]
+        return copy.deepcopy(data)
+
+    @classmethod
+    def generation(cls, account_id: int) -> Tuple[int, int]:
+        """Token to pass to put(); read it before starting the upstream fetch"""
+        with cls._lock:
+            return (cls._epoch, cls._generations.get(account_id, 0))
+
+    @classmethod
+    def put(cls, account_id: int, data: Dict[str, Any], generation: Tuple[int, int]):
+        snapshot = copy.deepcopy(data)
+        with cls._lock:
+            if (cls._epoch, cls._generations.get(account_id, 0)) != generation:
+                return # Invalidated while fetching
+            cls._entries[account_id] = (time.monotonic(), snapshot)
+
+    @classmethod
+    def invalidate(cls, account_id: int = None, reason: str = ""):
+        with cls._lock:
+            cls._invalidations += 1
+            if account_id is None:
+                cls._entries.clear()
+                cls._epoch += 1
+            else:
+                cls._entries.pop(account_id, None)
+                cls._generations[account_id] = cls._generations.get(account_id, 0) + 1
+        if reason:
+            print(f"[BalanceCache] Invalidated {'all accounts' if account_id is None else f'account {account_id}'}: {reason}")
+
+    @classmethod
+    def apply_fill(cls, account_id: int, ticker: str, side: str, qty: int, price: int, name: str = "") -> Optional[Dict[str, Any]]:
+        """
+        Apply one fill to the cached snapshot's holdings (no REST reload) and return a
+        copy of the patched holding row. Returns None when there is no live snapshot.
+        Bumps the generation either way, so a fetch that started before the fill
+        cannot store its stale result.
+        """
+        with cls._lock:
+            cls._generations[account_id] = cls._generations.get(account_id, 0) + 1
+            entry = cls._entries.get(account_id)
+            if entry is None or (time.monotonic() - entry[0]) >= settings.BALANCE_SNAPSHOT_MAX_AGE:
+                return None
+            # Keep the original timestamp: the max-age fallback also refreshes the summary
+            holding = apply_fill_to_balance(entry[1], ticker, side, qty, price, name)
+            cls._incremental_updates += 1
+        return copy.deepcopy(holding)
+
+    @classmethod
+    def stats(cls) -> Dict[str, Any]:
+        with cls._lock:
+            return {
+                "accounts": len(cls._entries),
+                "max_age": settings.BALANCE_SNAPSHOT_MAX_AGE,
+                "hits": cls._hits,
+                "misses": cls._misses,
+                "invalidations": cls._invalidations,
+                "incremental_updates": cls._incremental_updates
+            }
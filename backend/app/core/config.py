@@ -12,13 +12,70 @@ class Settings(BaseSettings):
     KIS_APP_KEY: str = ""
     KIS_APP_SECRET: str = ""
     KIS_ACCOUNT_NO: str = ""
-    
+    KIS_BASE_URL: str = "" # Override REST endpoint (e.g. local fake KIS: http://127.0.0.1:9443)
+    KIS_WS_URL: str = "ws://ops.koreainvestment.com:21000" # KIS WebSocket Endpoint (Real) - Ops
+    KIS_WS_MAX_SUBSCRIPTIONS: int = 41 # Registrations per KIS WebSocket session (approval key)
+    KIS_WS_APPROVAL_KEY_TTL: int = 82800 # seconds an approval key is reused (KIS: 24h)
+    KIS_WS_RECONNECT_BASE_DELAY: float = 0.5 # seconds, doubled per failed reconnect
+    KIS_WS_RECONNECT_MAX_BACKOFF: float = 30.0 # seconds
+    KIS_WS_IDLE_TIMEOUT: float = 60.0 # seconds without any frame (incl. PINGPONG) before reconnecting
+
+    # KIS HTTP Transport (Connection Pool / Keep-Alive)
+    KIS_HTTP_POOL_CONNECTIONS: int = 4 # Number of per-host pools
+    KIS_HTTP_POOL_MAXSIZE: int = 20 # Max keep-alive connections per host
+    KIS_HTTP_CONNECT_TIMEOUT: float = 3.0 # seconds
+    KIS_HTTP_READ_TIMEOUT: float = 10.0 # seconds
+    KIS_MAX_CONCURRENT_REQUESTS: int = 16 # Global cap on in-flight KIS requests (sync + async paths)
+    KIS_IO_MAX_WORKERS: int = 8 # Shared IoExecutor size for KIS fan-out work
+
+    # KIS Rate Limit (per App Key). KIS allows 20 TRs/sec per app key on real accounts,
+    # shared by inquiry and order TRs: keep (rate + burst) of both buckets summed <= 20.
+    # Orders at 5/s keep the old fixed 0.2 s spacing.
+    KIS_RATE_INQUIRY_PER_SEC: float = 12.0
+    KIS_RATE_INQUIRY_BURST: int = 2
+    KIS_RATE_ORDER_PER_SEC: float = 5.0
+    KIS_RATE_ORDER_BURST: int = 1
+
+    # KIS Retry / Circuit Breaker
+    KIS_RETRY_MAX_ATTEMPTS: int = 3
+    KIS_RETRY_BASE_DELAY: float = 0.2 # seconds, doubled per attempt
+    KIS_RETRY_MAX_DELAY: float = 2.0 # seconds
+    KIS_RETRYABLE_MSG_CODES: str = "EGW00201" # Comma separated (EGW00201: 초당 거래건수 초과)
+    KIS_ORDER_RETRYABLE_MSG_CODES: str = "EGW00201" # Subset retried for orders: rejected at the gateway before the order is processed
+    KIS_BREAKER_FAILURE_THRESHOLD: int = 5 # Consecutive transient failures before opening
+    KIS_BREAKER_RESET_TIMEOUT: float = 30.0 # seconds before a half-open probe
+
+    # Balance Pagination (inquire-balance tr_cont)
+    KIS_BALANCE_MAX_PAGES: int = 20 # Safety cap on continuation requests
+
+    # Quote Cache (process-wide, keyed by ticker)
+    QUOTE_CACHE_TTL_MARKET: float = 3.0 # seconds, during market hours (until next open otherwise)
+    QUOTE_CACHE_MAX_SIZE: int = 2000
+    KIS_MULTI_QUOTE_MAX: int = 30 # Tickers per multi-stock quotation request (FHKST11300006)
+
+    # Balance Snapshot Cache (invalidated by H0STCNI0 notices and orders)
+    BALANCE_SNAPSHOT_MAX_AGE: float = 60.0 # seconds, fallback when no event arrives
+
+    # Frontend WebSocket fan-out (per-client bounded send queue)
+    WS_CLIENT_QUEUE_SIZE: int = 256 # Messages buffered per client
+    WS_CLIENT_OVERFLOW_POLICY: str = "drop_oldest" # drop_oldest | disconnect (slow consumer)
+
+    # Decrypted Credential / Header Cache
+    CREDENTIAL_CACHE_TTL: int = 3600 # seconds
+
     # Scheduler
     SCHEDULER_ENABLED: bool = True
+
+    # Background Token Pre-Refresh (random point inside the window before expiry)
+    TOKEN_PREREFRESH_WINDOW: int = 3600 # seconds before expiry the window opens
+    TOKEN_PREREFRESH_MIN_LEAD: int = 300 # seconds before expiry the window closes
+    TOKEN_PREREFRESH_RETRY: int = 60 # seconds until a failed refresh is retried
     
     # Token Sync (Multi-Server)
     MASTER_API_URL: str = "" # If set, this server acts as a Client (Slave)
     SYNC_API_KEY: str = "fam_sync_secret" # Simple shared secret
+    TOKEN_SYNC_POLL_TIMEOUT: float = 25.0 # seconds a token subscription long-poll is parked on the master
+    TOKEN_SYNC_MAX_BACKOFF: float = 30.0 # seconds, cap on slave reconnect backoff
     
     # Google Sheets
     GOOGLE_SHEET_JSON_PATH: str = "backend/service_account.json"
@@ -40,7 +97,9 @@ class Settings(BaseSettings):
 settings = Settings()
 
 def get_base_url() -> str:
-    """Return KIS API Base URL (Real Only)"""
+    """Return KIS API Base URL (Real Only, unless KIS_BASE_URL overrides it)"""
+    if settings.KIS_BASE_URL:
+        return settings.KIS_BASE_URL.rstrip("/")
     return "https://openapi.koreainvestment.com:9443"
 
 print(f"[Config] Loaded settings.")
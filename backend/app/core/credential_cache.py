@@ -0,0 +1,102 @@
+import threading
+import time
+from typing import Dict, NamedTuple, Optional, Tuple
+from backend.app.core.config import settings
+from backend.app.core.security import decrypt_data
+from backend.app.models import Account
+
+class AccountCredentials(NamedTuple):
+    app_key: str
+    app_secret: str
+    cano: str
+    fingerprint: Tuple[str, str, str] # Ciphertexts the plaintext was derived from
+    loaded_at: float
+
+class CredentialCache:
+    """
+    In-memory, time-bounded cache of decrypted per-account credentials
+    and prebuilt KIS header templates, so the request hot path does no Fernet work.
+
+    Entries are keyed by account id and checked against the stored ciphertexts
+    (and the plaintext token for header templates): re-encrypted keys
+    (update_account) or a new access token never hit a stale entry.
+    update_account / token refresh also invalidate explicitly.
+    """
+    _credentials: Dict[int, AccountCredentials] = {}
+    _headers: Dict[int, Tuple[Tuple[str, str, str, str], float, Dict[str, str]]] = {}
+    _lock = threading.Lock()
+
+    @staticmethod
+    def _fingerprint(account: Account) -> Tuple[str, str, str]:
+        return (account.app_key or "", account.app_secret or "", account.cano or "")
+
+    @staticmethod
+    def _is_fresh(loaded_at: float) -> bool:
+        return (time.monotonic() - loaded_at) < settings.CREDENTIAL_CACHE_TTL
+
+    @classmethod
+    def get(cls, account: Account) -> AccountCredentials:
+        """Decrypted app_key / app_secret / cano for the account"""
+        fingerprint = cls._fingerprint(account)
+        entry = cls._credentials.get(account.id)
+        if entry is not None and entry.fingerprint == fingerprint and cls._is_fresh(entry.loaded_at):
+            return entry
+
+        entry = AccountCredentials(
+            app_key=decrypt_data(account.app_key),
+            app_secret=decrypt_data(account.app_secret),
+            cano=decrypt_data(account.cano),
+            fingerprint=fingerprint,
+            loaded_at=time.monotonic()
+        )
+        with cls._lock:
+            cls._credentials[account.id] = entry
+        return entry
+
+    @classmethod
+    def get_header_template(cls, account: Account, token: str) -> Optional[Dict[str, str]]:
+        """
+        Cached header template (without tr_id) built for the given token.
+        Returns None when missing, stale, or built from a different token/keys.
+        Caller is responsible for checking token expiry.
+        """
+        entry = cls._headers.get(account.id)
+        if entry is None:
+            return None
+
+        fingerprint, loaded_at, template = entry
+        if fingerprint != cls._fingerprint(account) + (token,) or not cls._is_fresh(loaded_at):
+            return None
+        return template
+
+    @classmethod
+    def build_header_template(cls, account: Account, token: str) -> Dict[str, str]:
+        creds = cls.get(account)
+        template = {
+            "content-type": "application/json",
+            "authorization": f"Bearer {token}",
+            "appkey": creds.app_key,
+            "appsecret": creds.app_secret,
+            "custtype": "P"
+        }
+        fingerprint = cls._fingerprint(account) + (token,)
+        with cls._lock:
+            cls._headers[account.id] = (fingerprint, time.monotonic(), template)
+        return template
+
+    @classmethod
+    def invalidate_headers(cls, account_id: int):
+        """Drop the header template (e.g. after token refresh)"""
+        with cls._lock:
+            cls._headers.pop(account_id, None)
+
+    @classmethod
+    def invalidate(cls, account_id: int = None):
+        """Drop credentials and headers for one account, or everything"""
+        with cls._lock:
+            if account_id is None:
+                cls._credentials.clear()
+                cls._headers.clear()
+            else:
+                cls._credentials.pop(account_id, None)
+                cls._headers.pop(account_id, None)
@@ -0,0 +1,118 @@
+import asyncio
+import contextlib
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from typing import Optional, Tuple
+from backend.app.core.config import settings
+
+class HttpTransport:
+    """
+    Shared HTTP transport for outbound KIS calls.
+    One pooled requests.Session per process, so TCP+TLS connections
+    to the KIS host are kept alive and reused across calls and threads.
+    The concurrency budget (_slots) is shared with AsyncKisClient via async_slot(),
+    so sync threads and every event loop together stay under KIS_MAX_CONCURRENT_REQUESTS.
+    """
+    _session: Optional[requests.Session] = None
+    _lock = threading.Lock()
+
+    # Global cap on concurrent outbound requests (all threads, all loops, all accounts)
+    _slots = threading.BoundedSemaphore(settings.KIS_MAX_CONCURRENT_REQUESTS)
+    _in_flight = 0
+    _peak_in_flight = 0
+    _async_in_flight = 0
+    _ASYNC_POLL_INTERVAL = 0.005 # seconds between non-blocking acquire attempts
+
+    @classmethod
+    def get_session(cls) -> requests.Session:
+        if cls._session is not None:
+            return cls._session
+
+        with cls._lock:
+            if cls._session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(
+                    pool_connections=settings.KIS_HTTP_POOL_CONNECTIONS, # Number of host pools
+                    pool_maxsize=settings.KIS_HTTP_POOL_MAXSIZE,         # Keep-alive connections per host
+                    max_retries=0
+                )
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                session.headers.update({"connection": "keep-alive"})
+                cls._session = session
+        return cls._session
+
+    @staticmethod
+    def default_timeout() -> Tuple[float, float]:
+        """(connect, read) timeout applied when the caller does not pass one"""
+        return (settings.KIS_HTTP_CONNECT_TIMEOUT, settings.KIS_HTTP_READ_TIMEOUT)
+
+    @classmethod
+    def _enter(cls, is_async: bool):
+        with cls._lock:
+            cls._in_flight += 1
+            cls._peak_in_flight = max(cls._peak_in_flight, cls._in_flight)
+            if is_async:
+                cls._async_in_flight += 1
+
+    @classmethod
+    def _exit(cls, is_async: bool):
+        with cls._lock:
+            cls._in_flight -= 1
+            if is_async:
+                cls._async_in_flight -= 1
+
+    @classmethod
+    def request(cls, method: str, url: str, **kwargs) -> requests.Response:
+        kwargs.setdefault("timeout", cls.default_timeout())
+        session = cls.get_session()
+        with cls._slots:
+            cls._enter(False)
+            try:
+                return session.request(method, url, **kwargs)
+            finally:
+                cls._exit(False)
+
+    @classmethod
+    @contextlib.asynccontextmanager
+    async def async_slot(cls):
+        """
+        Hold one slot of the global budget around an async request.
+        Polls without blocking so the event loop never waits on the threading semaphore
+        (and a cancelled waiter holds nothing).
+        """
+        while not cls._slots.acquire(blocking=False):
+            await asyncio.sleep(cls._ASYNC_POLL_INTERVAL)
+        cls._enter(True)
+        try:
+            yield
+        finally:
+            cls._exit(True)
+            cls._slots.release()
+
+    @classmethod
+    def stats(cls) -> dict:
+        with cls._lock:
+            return {
+                "max_concurrent_requests": settings.KIS_MAX_CONCURRENT_REQUESTS,
+                "in_flight": cls._in_flight, # sync + async
+                "async_in_flight": cls._async_in_flight,
+                "peak_in_flight": cls._peak_in_flight
+            }
+
+    @classmethod
+    def get(cls, url: str, **kwargs) -> requests.Response:
+        return cls.request("GET", url, **kwargs)
+
+    @classmethod
+    def post(cls, url: str, **kwargs) -> requests.Response:
+        return cls.request("POST", url, **kwargs)
+
+    @classmethod
+    def close(cls):
+        """Close pooled connections (e.g. on shutdown or after config change)"""
+        with cls._lock:
+            if cls._session is not None:
+                cls._session.close()
+                cls._session = None
@@ -0,0 +1,86 @@
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+from backend.app.core.config import settings
+
+class IoExecutor:
+    """
+    Process-wide bounded thread pool for KIS fan-out work
+    (page pricing, multi-quote chunks, ...), shared by every caller
+    instead of creating a ThreadPoolExecutor per call.
+    Tracks queue depth and active workers.
+    """
+    _executor: Optional[ThreadPoolExecutor] = None
+    _lock = threading.Lock()
+    _local = threading.local()
+    _queued = 0
+    _active = 0
+    _completed = 0
+    _peak_active = 0
+
+    @classmethod
+    def _get_executor(cls) -> ThreadPoolExecutor:
+        if cls._executor is None:
+            with cls._lock:
+                if cls._executor is None:
+                    cls._executor = ThreadPoolExecutor(
+                        max_workers=settings.KIS_IO_MAX_WORKERS,
+                        thread_name_prefix="kis-io"
+                    )
+        return cls._executor
+
+    @classmethod
+    def in_worker(cls) -> bool:
+        """True when called from an IoExecutor worker thread"""
+        return getattr(cls._local, "is_worker", False)
+
+    @classmethod
+    def submit(cls, fn: Callable, *args, **kwargs) -> Future:
+        with cls._lock:
+            cls._queued += 1
+
+        def run():
+            with cls._lock:
+                cls._queued -= 1
+                cls._active += 1
+                cls._peak_active = max(cls._peak_active, cls._active)
+            cls._local.is_worker = True
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                cls._local.is_worker = False
+                with cls._lock:
+                    cls._active -= 1
+                    cls._completed += 1
+
+        return cls._get_executor().submit(run)
+
+    @classmethod
+    def run_all(cls, fns: List[Callable[[], Any]]) -> List[Any]:
+        """
+        Run callables concurrently and return their results in order.
+        Runs inline when called from a worker (or with a single callable),
+        so nested fan-out can never deadlock the bounded pool.
+        """
+        if len(fns) <= 1 or cls.in_worker():
+            return [fn() for fn in fns]
+        futures = [cls.submit(fn) for fn in fns]
+        return [future.result() for future in futures]
+
+    @classmethod
+    def stats(cls) -> Dict[str, Any]:
+        with cls._lock:
+            return {
+                "max_workers": settings.KIS_IO_MAX_WORKERS,
+                "active_workers": cls._active,
+                "peak_active_workers": cls._peak_active,
+                "queue_depth": cls._queued,
+                "completed": cls._completed
+            }
+
+    @classmethod
+    def shutdown(cls):
+        with cls._lock:
+            if cls._executor is not None:
+                cls._executor.shutdown(wait=False)
+                cls._executor = None
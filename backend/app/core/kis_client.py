@@ -1,51 +1,97 @@
-import requests
-import time
 from datetime import datetime
-from concurrent.futures import ThreadPoolExecutor
-from typing import Dict, Any, List
+from concurrent.futures import Future
+from typing import Dict, Any, Iterator, List
 from sqlalchemy.orm import Session
-from backend.app.core.config import get_base_url
+from backend.app.core.config import settings, get_base_url
+from backend.app.core.http_transport import HttpTransport
+from backend.app.core.rate_limiter import RateLimiter
+from backend.app.core.quote_cache import QuoteCache
+from backend.app.core.single_flight import SingleFlight
+from backend.app.core.credential_cache import CredentialCache
+from backend.app.core.resilience import KisResilience
+from backend.app.core.io_executor import IoExecutor
+from backend.app.core.balance_cache import BalanceSnapshotCache
+from backend.app.core.metrics import KisCallTimer
 from backend.app.core.auth_manager import AuthManager
 from backend.app.models import Account
-from backend.app.core.security import decrypt_data
 
 class KisClient:
     """
     KIS API Proxy Client.
     Handles Auth injection and API requests for Real mode.
     """
-    
+    # Concurrent identical lookups share one upstream request
+    _balance_flight = SingleFlight("balance") # key: (account, TR, params)
+    _price_flight = SingleFlight("price")     # key: ticker
+
+    @staticmethod
+    def _send(method: str, url: str, headers: Dict[str, str], bucket: str = None, endpoint: str = None, idempotent: bool = True, **kwargs):
+        """
+        Single exit point for KIS REST calls: rate budget (bucket), retries and
+        per-endpoint circuit breaker (KisResilience). Returns the final response.
+        """
+        endpoint = endpoint or headers.get("tr_id") or url
+
+        def attempt():
+            if bucket:
+                RateLimiter.acquire(headers["appkey"], bucket)
+            with KisCallTimer(endpoint) as timer:
+                return timer.response(HttpTransport.request(method, url, headers=headers, **kwargs))
+
+        return KisResilience.execute(endpoint, attempt, idempotent=idempotent)
+
     @staticmethod
     def _get_headers(account: Account, db: Session, tr_id: str = None) -> Dict[str, str]:
+        # Hot path: cached token + prebuilt template for it, no decryption or DB access
         token = AuthManager.get_token(account, db)
-        app_key = decrypt_data(account.app_key)
-        app_secret = decrypt_data(account.app_secret)
-        
-        headers = {
-            "content-type": "application/json",
-            "authorization": f"Bearer {token}",
-            "appkey": app_key,
-            "appsecret": app_secret,
-            "tr_id": tr_id or "",
-            "custtype": "P"
-        }
+        template = CredentialCache.get_header_template(account, token)
+        if template is None:
+            template = CredentialCache.build_header_template(account, token)
+
+        headers = dict(template)
+        headers["tr_id"] = tr_id or ""
         return headers
 
     @classmethod
-    def get_balance(cls, account: Account, db: Session) -> Dict[str, Any]:
+    def get_balance(cls, account: Account, db: Session, use_cache: bool = True) -> Dict[str, Any]:
         """
         Get Account Balance (Stock Balance).
         Using TT840003R (Standard Stock Balance API).
+        Follows tr_cont continuation, so output1 holds every page's holdings.
+        Concurrent calls for the same account are coalesced into one request.
+        Served from BalanceSnapshotCache until a fill / order invalidates it (use_cache=False to bypass).
         """
-        time.sleep(0.1)
-        url = f"{get_base_url()}/uapi/domestic-stock/v1/trading/inquire-balance"
+        if use_cache:
+            cached = BalanceSnapshotCache.get(account.id)
+            if cached is not None:
+                return cached
+
         tr_id = "TTTC8434R" 
-        
-        headers = cls._get_headers(account, db, tr_id=tr_id)
-        cano_decrypted = decrypt_data(account.cano)
-        
-        params = {
-            "CANO": cano_decrypted,
+        params = cls._balance_params(account)
+        flight_key = (account.id, tr_id, tuple(sorted((k, v) for k, v in params.items() if k != "CANO")))
+        return cls._balance_flight.do(flight_key, lambda: cls._fetch_and_store_balance(account, db))
+
+    @classmethod
+    def _fetch_and_store_balance(cls, account: Account, db: Session) -> Dict[str, Any]:
+        generation = BalanceSnapshotCache.generation(account.id)
+        data = cls._fetch_balance(account, db)
+        BalanceSnapshotCache.put(account.id, data, generation)
+        return data
+
+    @classmethod
+    def _fetch_balance(cls, account: Account, db: Session) -> Dict[str, Any]:
+        data = None
+        holdings = []
+        for page in cls.iter_balance_pages(account, db):
+            holdings.extend(page.get("output1", []))
+            data = page
+        data["output1"] = holdings
+        return data
+
+    @staticmethod
+    def _balance_params(account: Account) -> Dict[str, str]:
+        return {
+            "CANO": CredentialCache.get(account).cano,
             "ACNT_PRDT_CD": account.acnt_prdt_cd,
             "AFHR_FLPR_YN": "N",
             "OFL_YN": "N",
@@ -58,45 +104,102 @@ class KisClient:
             "CTX_AREA_NK100": ""
         }
 
+    @classmethod
+    def iter_balance_pages(cls, account: Account, db: Session, enrich: bool = True) -> Iterator[Dict[str, Any]]:
+        """
+        Stream inquire-balance page by page (generator).
+        Each yielded page is a raw KIS response: output1 = holdings of that page,
+        output2 = account summary. With enrich=True, holdings of page N are priced
+        in the background while page N+1 is being fetched.
+        """
+        pending = None # (page, pricing futures)
+        for page in cls._iter_raw_balance_pages(account, db):
+            futures = []
+            if enrich and page.get("output1"):
+                if IoExecutor.in_worker():
+                    cls._enrich_holdings(account, db, page["output1"])
+                else:
+                    futures = [IoExecutor.submit(cls._enrich_holdings, account, db, page["output1"])]
+
+            if pending is not None:
+                yield cls._wait_page(*pending)
+            pending = (page, futures)
+
+        if pending is not None:
+            yield cls._wait_page(*pending)
+
+    @staticmethod
+    def _wait_page(page: Dict[str, Any], futures: List[Future]) -> Dict[str, Any]:
+        for future in futures:
+            future.result()
+        return page
+
+    @classmethod
+    def _iter_raw_balance_pages(cls, account: Account, db: Session) -> Iterator[Dict[str, Any]]:
+        url = f"{get_base_url()}/uapi/domestic-stock/v1/trading/inquire-balance"
+        tr_id = "TTTC8434R"
+        params = cls._balance_params(account)
+        tr_cont = ""
+
+        for _ in range(settings.KIS_BALANCE_MAX_PAGES):
+            headers = cls._get_headers(account, db, tr_id=tr_id)
+            headers["tr_cont"] = tr_cont
+
+            try:
+                res = cls._send("GET", url, headers, RateLimiter.INQUIRY, params=params)
+                res.raise_for_status()
+                data = res.json()
+                if data.get("rt_cd") != "0":
+                    error_msg = f"KIS Error: {data.get('msg1')} ({data.get('msg_cd')})"
+                    raise ValueError(error_msg)
+            except Exception as e:
+                print(f"[KisClient] Error fetching balance: {e}")
+                raise e
+
+            yield data
+
+            # tr_cont: "F"/"M" = more pages, "D"/"E" = last page
+            next_fk = (data.get("ctx_area_fk100") or "").strip()
+            next_nk = (data.get("ctx_area_nk100") or "").strip()
+            if res.headers.get("tr_cont") not in ("F", "M") or not next_nk:
+                return
+
+            params["CTX_AREA_FK100"] = next_fk
+            params["CTX_AREA_NK100"] = next_nk
+            tr_cont = "N"
+
+        print(f"[KisClient] Balance pagination stopped at {settings.KIS_BALANCE_MAX_PAGES} pages")
+
+    @classmethod
+    def _enrich_holdings(cls, account: Account, db: Session, holdings: List[Dict[str, Any]]):
+        """Overlay real-time price fields on holding rows (one batched quote request per chunk)"""
         try:
-            res = requests.get(url, headers=headers, params=params)
-            res.raise_for_status()
-            data = res.json()
-            if data.get("rt_cd") != "0":
-                error_msg = f"KIS Error: {data.get('msg1')} ({data.get('msg_cd')})"
-                raise ValueError(error_msg)
-            
-            # Enrich with real-time price data in parallel
-            holdings = data.get("output1", [])
-            
-            def enrich_holding(holding):
-                ticker = holding.get("pdno")
-                if not ticker: return
-                try:
-                    price_data = cls.get_price(account, db, ticker)
-                    output = price_data.get("output", {})
-                    if output:
-                        holding["prdy_vrss"] = output.get("prdy_vrss")
-                        holding["prdy_ctrt"] = output.get("prdy_ctrt")
-                        holding["prpr"] = output.get("stck_prpr")
-                except Exception as e:
-                    print(f"[KisClient] Failed to enrich {ticker}: {e}")
-
-            if holdings:
-                with ThreadPoolExecutor(max_workers=min(len(holdings), 10)) as executor:
-                    executor.map(enrich_holding, holdings)
-            
-            return data
+            prices = cls.get_prices(account, db, [h.get("pdno") for h in holdings])
         except Exception as e:
-            print(f"[KisClient] Error fetching balance: {e}")
-            raise e
+            print(f"[KisClient] Failed to enrich holdings: {e}")
+            return
+
+        for holding in holdings:
+            output = prices.get(holding.get("pdno"), {}).get("output", {})
+            if output:
+                holding["prdy_vrss"] = output.get("prdy_vrss")
+                holding["prdy_ctrt"] = output.get("prdy_ctrt")
+                holding["prpr"] = output.get("stck_prpr")
 
     @classmethod
     def get_price(cls, account: Account, db: Session, ticker: str) -> Dict[str, Any]:
         """
         Get Current Price for a ticker.
+        Served from the process-wide QuoteCache when fresh.
         """
-        time.sleep(0.1)
+        cached = QuoteCache.get(ticker)
+        if cached is not None:
+            return cached
+
+        return cls._price_flight.do(ticker, lambda: cls._fetch_price(account, db, ticker))
+
+    @classmethod
+    def _fetch_price(cls, account: Account, db: Session, ticker: str) -> Dict[str, Any]:
         url = f"{get_base_url()}/uapi/domestic-stock/v1/quotations/inquire-price"
         tr_id = "FHKST01010100"
         
@@ -107,30 +210,132 @@ class KisClient:
         }
         
         try:
-            res = requests.get(url, headers=headers, params=params)
+            res = cls._send("GET", url, headers, RateLimiter.INQUIRY, params=params)
             res.raise_for_status()
-            return res.json()
+            data = res.json()
+            if data.get("rt_cd") == "0" and data.get("output"):
+                QuoteCache.put(ticker, data)
+            return data
         except Exception as e:
             print(f"[KisClient] Error fetching price for {ticker}: {e}")
             raise e
 
+    @classmethod
+    def get_prices(cls, account: Account, db: Session, tickers: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Batch quote: ticker -> price response (same shape as get_price()).
+        Cache hits are served locally; misses are fetched with the multi-stock
+        quotation TR (FHKST11300006), KIS_MULTI_QUOTE_MAX tickers per request.
+        Tickers the batch TR cannot price fall back to get_price. Failed tickers are omitted.
+        """
+        unique = list(dict.fromkeys(t for t in tickers if t and t != "CASH"))
+        prices = {}
+        misses = []
+        for ticker in unique:
+            cached = QuoteCache.get(ticker)
+            if cached is not None:
+                prices[ticker] = cached
+            else:
+                misses.append(ticker)
+
+        chunk_size = settings.KIS_MULTI_QUOTE_MAX
+        chunks = [misses[i:i + chunk_size] for i in range(0, len(misses), chunk_size)]
+
+        def fetch_chunk(chunk):
+            try:
+                return cls._price_flight.do(("multi",) + tuple(chunk), lambda: cls._fetch_multi_price(account, db, chunk))
+            except Exception as e:
+                print(f"[KisClient] Multi-quote failed, falling back to single quotes: {e}")
+                return {}
+
+        # Chunks run concurrently on the shared IoExecutor
+        for result in IoExecutor.run_all([lambda c=c: fetch_chunk(c) for c in chunks]):
+            prices.update(result)
+
+        for ticker in misses:
+            if ticker in prices:
+                continue
+            try:
+                prices[ticker] = cls.get_price(account, db, ticker)
+            except Exception as e:
+                print(f"[KisClient] Error fetching price for {ticker}: {e}")
+
+        return prices
+
+    @classmethod
+    def _fetch_multi_price(cls, account: Account, db: Session, tickers: List[str]) -> Dict[str, Dict[str, Any]]:
+        url = f"{get_base_url()}/uapi/domestic-stock/v1/quotations/intstock-multprice"
+        tr_id = "FHKST11300006"
+
+        headers = cls._get_headers(account, db, tr_id=tr_id)
+        params = cls._multi_price_params(tickers)
+
+        res = cls._send("GET", url, headers, RateLimiter.INQUIRY, params=params)
+        res.raise_for_status()
+        data = res.json()
+        if data.get("rt_cd") != "0":
+            raise ValueError(f"KIS Error: {data.get('msg1')} ({data.get('msg_cd')})")
+        return cls._parse_multi_price(data)
+
+    @staticmethod
+    def _multi_price_params(tickers: List[str]) -> Dict[str, str]:
+        params = {}
+        for i, ticker in enumerate(tickers, start=1):
+            params[f"FID_COND_MRKT_DIV_CODE_{i}"] = "J"
+            params[f"FID_INPUT_ISCD_{i}"] = ticker
+        return params
+
+    @staticmethod
+    def _parse_multi_price(data: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+        """
+        Map FHKST11300006 rows to the inquire-price response shape
+        (stck_prpr / prdy_vrss / prdy_ctrt ...) and store them in the QuoteCache.
+        """
+        rows = data.get("output") or data.get("output1") or []
+        if isinstance(rows, dict):
+            rows = [rows]
+
+        prices = {}
+        for row in rows:
+            ticker = (row.get("inter_shrn_iscd") or "").strip()
+            if not ticker or not row.get("inter2_prpr"):
+                continue
+            quote = {
+                "rt_cd": "0",
+                "msg_cd": data.get("msg_cd"),
+                "msg1": data.get("msg1"),
+                "output": {
+                    "stck_prpr": row.get("inter2_prpr"),
+                    "prdy_vrss": row.get("inter2_prdy_vrss"),
+                    "prdy_vrss_sign": row.get("prdy_vrss_sign"),
+                    "prdy_ctrt": row.get("prdy_ctrt"),
+                    "acml_vol": row.get("acml_vol"),
+                    "stck_oprc": row.get("inter2_oprc"),
+                    "stck_hgpr": row.get("inter2_hgpr"),
+                    "stck_lwpr": row.get("inter2_lwpr"),
+                    "hts_kor_isnm": row.get("inter_kor_isnm")
+                }
+            }
+            QuoteCache.put(ticker, quote)
+            prices[ticker] = quote
+        return prices
+
     @staticmethod
     def _get_hashkey(account: Account, payload: Dict[str, Any]) -> str:
         """
         Generate Hashkey for POST requests.
         """
         url = f"{get_base_url()}/uapi/hashkey"
-        app_key = decrypt_data(account.app_key)
-        app_secret = decrypt_data(account.app_secret)
+        creds = CredentialCache.get(account)
         
         headers = {
             "content-type": "application/json",
-            "appkey": app_key,
-            "appsecret": app_secret
+            "appkey": creds.app_key,
+            "appsecret": creds.app_secret
         }
         
         try:
-            res = requests.post(url, headers=headers, json=payload)
+            res = KisClient._send("POST", url, headers, None, endpoint="hashkey", json=payload)
             res.raise_for_status()
             data = res.json()
             return data["HASH"]
@@ -144,7 +349,6 @@ class KisClient:
         Place Order.
         ord_dvsn: "00" (Limit), "01" (Market), etc.
         """
-        time.sleep(0.2) 
         url = f"{get_base_url()}/uapi/domestic-stock/v1/trading/order-cash"
         
         is_buy = action.upper() == "BUY"
@@ -152,7 +356,7 @@ class KisClient:
 
         # Headers will be updated with hashkey later
         headers = cls._get_headers(account, db, tr_id=tr_id)
-        cano_decrypted = decrypt_data(account.cano)
+        cano_decrypted = CredentialCache.get(account).cano
 
         # If Market Order, Price must be "0"
         final_price = str(int(price))
@@ -178,7 +382,7 @@ class KisClient:
             raise e
 
         try:
-            res = requests.post(url, headers=headers, json=payload)
+            res = cls._send("POST", url, headers, RateLimiter.ORDER, idempotent=False, json=payload)
             res.raise_for_status()
             data = res.json()
             if data.get("rt_cd") != "0":
@@ -203,18 +407,20 @@ class KisClient:
             else:
                 print(f"[KisClient] Error placing order: {e}")
                 raise e
+        finally:
+            # Sent (or possibly sent): holdings / orderable cash may have changed
+            BalanceSnapshotCache.invalidate(account.id)
 
     @classmethod
     def get_unfilled_orders(cls, account: Account, db: Session) -> Dict[str, Any]:
         """
         Get Unfilled Orders (inquire-psbl-rvsecncl).
         """
-        time.sleep(0.1)
         url = f"{get_base_url()}/uapi/domestic-stock/v1/trading/inquire-psbl-rvsecncl"
         tr_id = "TTTC0084R"
         
         headers = cls._get_headers(account, db, tr_id=tr_id)
-        cano_decrypted = decrypt_data(account.cano)
+        cano_decrypted = CredentialCache.get(account).cano
         
         params = {
             "CANO": cano_decrypted,
@@ -226,7 +432,7 @@ class KisClient:
         }
         
         try:
-            res = requests.get(url, headers=headers, params=params)
+            res = cls._send("GET", url, headers, RateLimiter.INQUIRY, params=params)
             res.raise_for_status()
             data = res.json()
             if data.get("rt_cd") != "0":
@@ -254,12 +460,11 @@ class KisClient:
         """
         Get Daily Execution History (TTTC8001R).
         """
-        time.sleep(0.1)
         url = f"{get_base_url()}/uapi/domestic-stock/v1/trading/inquire-daily-ccld"
         tr_id = "TTTC8001R"
         
         headers = cls._get_headers(account, db, tr_id=tr_id)
-        cano_decrypted = decrypt_data(account.cano)
+        cano_decrypted = CredentialCache.get(account).cano
         
         today = datetime.now().strftime("%Y%m%d")
         
@@ -285,7 +490,7 @@ class KisClient:
         }
         
         try:
-            res = requests.get(url, headers=headers, params=params)
+            res = cls._send("GET", url, headers, RateLimiter.INQUIRY, params=params)
             res.raise_for_status()
             data = res.json()
             if data.get("rt_cd") != "0":
@@ -318,12 +523,11 @@ class KisClient:
         price: New Price (0 for market)
         ord_dvsn: "00" (Limit), "01" (Market), etc.
         """
-        time.sleep(0.2)
         url = f"{get_base_url()}/uapi/domestic-stock/v1/trading/order-rvsecncl"
         tr_id = "TTTC0803U"
 
         headers = cls._get_headers(account, db, tr_id=tr_id)
-        cano_decrypted = decrypt_data(account.cano)
+        cano_decrypted = CredentialCache.get(account).cano
 
         final_price = str(int(price))
         if ord_dvsn == "01":
@@ -352,7 +556,7 @@ class KisClient:
             raise e
 
         try:
-            res = requests.post(url, headers=headers, json=payload)
+            res = cls._send("POST", url, headers, RateLimiter.ORDER, idempotent=False, json=payload)
             res.raise_for_status()
             data = res.json()
             if data.get("rt_cd") != "0":
@@ -377,6 +581,9 @@ class KisClient:
             else:
                 print(f"[KisClient] Error revising/cancelling order: {e}")
                 raise e
+        finally:
+            # Sent (or possibly sent): holdings / orderable cash may have changed
+            BalanceSnapshotCache.invalidate(account.id)
 
     @classmethod
     def get_approval_key(cls, account: Account, db: Session) -> str:
@@ -384,27 +591,16 @@ class KisClient:
         Get WebSocket Approval Key (POST /oauth2/Approval)
         """
         url = f"{get_base_url()}/oauth2/Approval"
-        
-        # Helper to decrypt
-        def decrypt_data_local(encrypted_data):
-            try:
-                from backend.app.core.security import decrypt_data
-                return decrypt_data(encrypted_data)
-            except Exception as e:
-                print(f"Decryption failed: {e}")
-                return encrypted_data
-
-        app_key = decrypt_data_local(account.app_key)
-        app_secret = decrypt_data_local(account.app_secret)
+        creds = CredentialCache.get(account)
 
         body = {
             "grant_type": "client_credentials",
-            "appkey": app_key,
-            "secretkey": app_secret
+            "appkey": creds.app_key,
+            "secretkey": creds.app_secret
         }
         
         try:
-            res = requests.post(url, json=body)
+            res = cls._send("POST", url, {}, None, endpoint="Approval", json=body)
             res.raise_for_status()
             data = res.json()
             approval_key = data.get("approval_key")
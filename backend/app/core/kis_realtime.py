@@ -0,0 +1,173 @@
+import base64
+from datetime import date
+from typing import Any, Dict, List, NamedTuple
+from cryptography.hazmat.primitives import padding
+from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+from backend.app.core.metrics import REGISTRY, Counter
+
+KIS_WS_MALFORMED_RECORDS = REGISTRY.register(Counter(
+    "kis_ws_malformed_records_total", "Realtime records skipped because a field could not be decoded", ["tr_id"]))
+
+# H0STCNT0 (국내주식 실시간체결가) record layout: 46 fields per record, data_cnt records per frame
+H0STCNT0_FIELDS = [
+    "MKSC_SHRN_ISCD", "STCK_CNTG_HOUR", "STCK_PRPR", "PRDY_VRSS_SIGN", "PRDY_VRSS", "PRDY_CTRT",
+    "WGHN_AVRG_STCK_PRC", "STCK_OPRC", "STCK_HGPR", "STCK_LWPR", "ASKP1", "BIDP1", "CNTG_VOL",
+    "ACML_VOL", "ACML_TR_PBMN", "SELN_CNTG_CSNU", "SHNU_CNTG_CSNU", "NTBY_CNTG_CSNU", "CTTR",
+    "SELN_CNTG_SMTN", "SHNU_CNTG_SMTN", "CCLD_DVSN", "SHNU_RATE", "PRDY_VOL_VRSS_ACML_VOL_RATE",
+    "OPRC_HOUR", "OPRC_VRSS_PRPR_SIGN", "OPRC_VRSS_PRPR", "HGPR_HOUR", "HGPR_VRSS_PRPR_SIGN",
+    "HGPR_VRSS_PRPR", "LWPR_HOUR", "LWPR_VRSS_PRPR_SIGN", "LWPR_VRSS_PRPR", "BSOP_DATE",
+    "NEW_MKOP_CLS_CODE", "TRHT_YN", "ASKP_RSQN1", "BIDP_RSQN1", "TOTAL_ASKP_RSQN", "TOTAL_BIDP_RSQN",
+    "VOL_TNRT", "PRDY_SMNS_HOUR_ACML_VOL", "PRDY_SMNS_HOUR_ACML_VOL_RATE", "HOUR_CLS_CODE",
+    "MRKT_TRTM_CLS_CODE", "VI_STND_PRC"
+]
+_CNT_WIDTH = len(H0STCNT0_FIELDS)
+_CNT = {name: i for i, name in enumerate(H0STCNT0_FIELDS)}
+_CNT_CODE, _CNT_TIME, _CNT_PRICE, _CNT_CHANGE, _CNT_RATE = (
+    _CNT["MKSC_SHRN_ISCD"], _CNT["STCK_CNTG_HOUR"], _CNT["STCK_PRPR"], _CNT["PRDY_VRSS"], _CNT["PRDY_CTRT"]
+)
+_CNT_ASK, _CNT_BID, _CNT_VOL, _CNT_ACML_VOL = _CNT["ASKP1"], _CNT["BIDP1"], _CNT["CNTG_VOL"], _CNT["ACML_VOL"]
+
+# H0STCNI0 (국내주식 실시간체결통보) record layout, AES-256-CBC encrypted on the wire
+H0STCNI0_FIELDS = [
+    "CUST_ID", "ACNT_NO", "ODER_NO", "OODER_NO", "SELN_BYOV_CLS", "RCTF_CLS", "ODER_KIND",
+    "ODER_COND", "STCK_SHRN_ISCD", "CNTG_QTY", "CNTG_UNPR", "STCK_CNTG_HOUR", "RFUS_YN",
+    "CNTG_YN", "ACPT_YN", "BRNC_NO", "ODER_QTY", "ACNT_NAME", "CNTG_ISNM", "CRDT_CLS",
+    "CRDT_LOAN_DATE", "CNTG_ISNM40", "ODER_PRC"
+]
+_CNI = {name: i for i, name in enumerate(H0STCNI0_FIELDS)}
+
+def decrypt_payload(key: str, iv: str, payload: str) -> str:
+    """AES-256-CBC (PKCS7, base64) with the key / iv from the subscribe response"""
+    decryptor = Cipher(algorithms.AES(key.encode("utf-8")), modes.CBC(iv.encode("utf-8"))).decryptor()
+    padded = decryptor.update(base64.b64decode(payload)) + decryptor.finalize()
+    unpadder = padding.PKCS7(128).unpadder()
+    return (unpadder.update(padded) + unpadder.finalize()).decode("utf-8")
+
+def _int(value: str) -> int:
+    value = (value or "").strip()
+    if not value:
+        return 0
+    try:
+        return int(value)
+    except ValueError:
+        return int(float(value))
+
+class Tick(NamedTuple):
+    """One H0STCNT0 record, only the fields the dashboard uses (numbers, not strings)"""
+    code: str
+    time: str # HHMMSS
+    price: int
+    change: int # vs previous close, signed
+    rate: float # %
+    volume: int # This trade
+    cumulative_volume: int
+    ask: int # Best ask
+    bid: int # Best bid
+
+    def to_message(self) -> Dict[str, Any]:
+        return {
+            "type": "PRICE",
+            "code": self.code,
+            "time": self.time,
+            "price": self.price,
+            "change": self.change,
+            "rate": self.rate,
+            "volume": self.volume,
+            "acml_vol": self.cumulative_volume,
+            "ask": self.ask,
+            "bid": self.bid
+        }
+
+def parse_ticks(payload: str, count: int = 1) -> List[Tick]:
+    """
+    Decode every record of a H0STCNT0 payload. KIS batches data_cnt records of
+    46 fields into one '^'-joined string; a truncated trailing record is dropped.
+    """
+    values = payload.split("^")
+    records = min(len(values) // _CNT_WIDTH, max(count, 1))
+    ticks = []
+    for base in range(0, records * _CNT_WIDTH, _CNT_WIDTH):
+        try:
+            ticks.append(Tick(
+                values[base + _CNT_CODE],
+                values[base + _CNT_TIME],
+                int(values[base + _CNT_PRICE]),
+                int(values[base + _CNT_CHANGE]),
+                float(values[base + _CNT_RATE]),
+                int(values[base + _CNT_VOL]),
+                int(values[base + _CNT_ACML_VOL]),
+                int(values[base + _CNT_ASK]),
+                int(values[base + _CNT_BID])
+            ))
+        except ValueError:
+            KIS_WS_MALFORMED_RECORDS.inc(tr_id="H0STCNT0")
+            continue # Malformed record, keep the rest of the frame
+    return ticks
+
+class FillEvent(NamedTuple):
+    """One H0STCNI0 notice. is_fill=False: order accepted / revised / cancelled / refused."""
+    hts_id: str
+    account_no: str
+    order_no: str
+    original_order_no: str
+    ticker: str
+    name: str
+    side: str # "BUY" / "SELL"
+    is_fill: bool
+    refused: bool
+    filled_qty: int # This notice
+    filled_price: int
+    order_qty: int
+    order_price: int
+    remaining_qty: int # After this notice (order_qty - cumulative fills)
+    time: str # HHMMSS
+
+    def to_dict(self) -> Dict[str, Any]:
+        return self._asdict()
+
+def parse_executions(payload: str, count: int = 1) -> List[FillEvent]:
+    """Split a (decrypted) H0STCNI0 payload into notices; remaining_qty is filled in by FillTracker"""
+    values = payload.split("^")
+    width = len(H0STCNI0_FIELDS)
+    events = []
+    for i in range(min(len(values) // width, max(count, 1))):
+        f = values[i * width:(i + 1) * width]
+        try:
+            is_fill = f[_CNI["CNTG_YN"]] == "2"
+            order_qty = _int(f[_CNI["ODER_QTY"]])
+            events.append(FillEvent(
+                hts_id=f[_CNI["CUST_ID"]],
+                account_no=f[_CNI["ACNT_NO"]],
+                order_no=f[_CNI["ODER_NO"]],
+                original_order_no=f[_CNI["OODER_NO"]],
+                ticker=f[_CNI["STCK_SHRN_ISCD"]],
+                name=f[_CNI["CNTG_ISNM"]],
+                side="SELL" if f[_CNI["SELN_BYOV_CLS"]] == "01" else "BUY",
+                is_fill=is_fill,
+                refused=f[_CNI["RFUS_YN"]] == "1",
+                filled_qty=_int(f[_CNI["CNTG_QTY"]]) if is_fill else 0,
+                filled_price=_int(f[_CNI["CNTG_UNPR"]]) if is_fill else 0,
+                order_qty=order_qty,
+                order_price=_int(f[_CNI["ODER_PRC"]]),
+                remaining_qty=order_qty,
+                time=f[_CNI["STCK_CNTG_HOUR"]]
+            ))
+        except ValueError:
+            KIS_WS_MALFORMED_RECORDS.inc(tr_id="H0STCNI0")
+            continue # Malformed notice, keep the rest of the frame
+    return events
+
+class FillTracker:
+    """Cumulative filled quantity per order number (reset daily) to derive remaining_qty"""
+    def __init__(self):
+        self._day = date.today()
+        self._filled: Dict[str, int] = {}
+
+    def track(self, event: FillEvent) -> FillEvent:
+        if date.today() != self._day:
+            self._day = date.today()
+            self._filled.clear()
+        filled = self._filled.get(event.order_no, 0) + event.filled_qty
+        if event.is_fill:
+            self._filled[event.order_no] = filled
+        return event._replace(remaining_qty=max(event.order_qty - filled, 0))
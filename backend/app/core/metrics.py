@@ -0,0 +1,210 @@
+import math
+import re
+import threading
+import time
+from typing import Callable, Dict, List, Sequence, Tuple
+
+# Latency buckets (seconds) shared by KIS calls and API routes
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: Tuple[str, str] = None) -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(f'{extra[0]}="{extra[1]}"')
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+class _Metric:
+    """Base for labelled metrics (Prometheus text exposition format 0.0.4)"""
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values: Dict[Tuple[str, ...], object] = {}
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            items = sorted(self._values.items())
+        lines.extend(self._render_samples(items))
+        return lines
+
+    def _render_samples(self, items) -> List[str]:
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}" for key, value in items]
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels):
+        self.inc(-amount, **labels)
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * len(self.buckets), 0.0, 0] # bucket counts, sum, count
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[0][i] += 1
+                    break
+            state[1] += value
+            state[2] += 1
+
+    def _render_samples(self, items) -> List[str]:
+        lines = []
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, ('le', _format_value(bound)))} {cumulative}")
+            lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, ('le', '+Inf'))} {count}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {count}")
+        return lines
+
+class MetricsRegistry:
+    """
+    Process-wide metric registry.
+    Collectors are called at scrape time for values that already live elsewhere
+    (circuit breakers, caches) and return extra exposition lines.
+    """
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+        self._collectors: List[Callable[[], List[str]]] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def add_collector(self, collector: Callable[[], List[str]]):
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        for collector in self._collectors:
+            try:
+                lines.extend(collector())
+            except Exception as e:
+                print(f"[Metrics] Collector failed: {e}")
+        return "\n".join(lines) + "\n"
+
+REGISTRY = MetricsRegistry()
+
+KIS_REQUEST_DURATION = REGISTRY.register(Histogram(
+    "kis_request_duration_seconds", "Outbound KIS request latency per attempt", ["tr_id", "status", "msg_cd"]))
+KIS_REQUESTS_IN_FLIGHT = REGISTRY.register(Gauge(
+    "kis_requests_in_flight", "Outbound KIS requests currently in flight", ["tr_id"]))
+KIS_RATE_LIMIT_WAIT = REGISTRY.register(Histogram(
+    "kis_rate_limit_wait_seconds", "Time spent waiting for the client-side KIS rate limiter", ["kind"],
+    buckets=(0.0, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)))
+HTTP_REQUEST_DURATION = REGISTRY.register(Histogram(
+    "http_request_duration_seconds", "FastAPI request latency per route", ["method", "route", "status"]))
+HTTP_REQUESTS_IN_FLIGHT = REGISTRY.register(Gauge(
+    "http_requests_in_flight", "FastAPI requests currently being served"))
+
+_MSG_CD_PATTERN = re.compile(rb'"msg_cd"\s*:\s*"([A-Za-z0-9]*)"')
+
+class KisCallTimer:
+    """
+    Times one outbound KIS attempt (sync or async code, plain `with`).
+    Call response(res) with the HTTP response; an exception leaves status="error".
+    """
+    def __init__(self, tr_id: str):
+        self.tr_id = tr_id
+        self.status = "error"
+        self.msg_cd = ""
+
+    def __enter__(self) -> "KisCallTimer":
+        KIS_REQUESTS_IN_FLIGHT.inc(tr_id=self.tr_id)
+        self._started = time.perf_counter()
+        return self
+
+    def response(self, res):
+        self.status = str(res.status_code)
+        match = _MSG_CD_PATTERN.search(res.content or b"")
+        self.msg_cd = match.group(1).decode("ascii") if match else ""
+        return res
+
+    def __exit__(self, *exc):
+        KIS_REQUESTS_IN_FLIGHT.dec(tr_id=self.tr_id)
+        KIS_REQUEST_DURATION.observe(time.perf_counter() - self._started, tr_id=self.tr_id, status=self.status, msg_cd=self.msg_cd)
+
+def _collect_resilience() -> List[str]:
+    from backend.app.core.resilience import KisResilience
+
+    snapshot = KisResilience.snapshot()
+    lines = [
+        "# HELP kis_circuit_open Whether the endpoint's circuit breaker is open (1) or half-open (0.5)",
+        "# TYPE kis_circuit_open gauge"
+    ]
+    states = {"CLOSED": 0, "HALF_OPEN": 0.5, "OPEN": 1}
+    for endpoint, info in snapshot.items():
+        lines.append(f'kis_circuit_open{{tr_id="{_escape(endpoint)}"}} {_format_value(states.get(info.get("state"), 0))}')
+    lines += ["# HELP kis_retries_total KIS attempts retried by KisResilience", "# TYPE kis_retries_total counter"]
+    for endpoint, info in snapshot.items():
+        lines.append(f'kis_retries_total{{tr_id="{_escape(endpoint)}"}} {info["retries"]}')
+    return lines
+
+REGISTRY.add_collector(_collect_resilience)
+
+def _collect_websocket() -> List[str]:
+    from backend.app.core.websocket_manager import manager
+
+    stats = manager.stats()
+    return [
+        "# HELP ws_clients Connected frontend WebSocket clients",
+        "# TYPE ws_clients gauge",
+        f"ws_clients {stats['clients']}",
+        "# HELP ws_client_queue_depth Messages waiting in frontend send queues",
+        "# TYPE ws_client_queue_depth gauge",
+        f'ws_client_queue_depth{{agg="total"}} {stats["queue_depth_total"]}',
+        f'ws_client_queue_depth{{agg="max"}} {stats["queue_depth_max"]}',
+        "# HELP ws_dropped_messages_total Messages dropped by the client overflow policy",
+        "# TYPE ws_dropped_messages_total counter",
+        f"ws_dropped_messages_total {stats['dropped_messages']}",
+        "# HELP ws_slow_disconnects_total Clients disconnected for falling behind",
+        "# TYPE ws_slow_disconnects_total counter",
+        f"ws_slow_disconnects_total {stats['slow_disconnects']}"
+    ]
+
+REGISTRY.add_collector(_collect_websocket)
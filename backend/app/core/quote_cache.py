@@ -0,0 +1,100 @@
+import copy
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Dict, Any, Optional, Tuple
+from pytz import timezone
+from backend.app.core.config import settings
+
+KST = timezone('Asia/Seoul')
+
+# KRX regular session (KST)
+MARKET_OPEN = (9, 0)
+MARKET_CLOSE = (15, 30)
+
+def is_market_open(now: datetime = None) -> bool:
+    now = now or datetime.now(KST)
+    if now.weekday() >= 5:
+        return False
+    return MARKET_OPEN <= (now.hour, now.minute) < MARKET_CLOSE
+
+def next_market_open(now: datetime = None) -> datetime:
+    """Next regular-session open after `now` (weekends skipped, holidays not tracked)"""
+    now = now or datetime.now(KST)
+    candidate = now.replace(hour=MARKET_OPEN[0], minute=MARKET_OPEN[1], second=0, microsecond=0)
+    if candidate <= now:
+        candidate += timedelta(days=1)
+    while candidate.weekday() >= 5:
+        candidate += timedelta(days=1)
+    return candidate
+
+class QuoteCache:
+    """
+    Process-wide quote cache keyed by ticker.
+    A quote does not depend on the account, so one cached price serves
+    every account in the household.
+    - TTL: QUOTE_CACHE_TTL_MARKET seconds during market hours, until next open otherwise
+    - Size-bounded LRU eviction (QUOTE_CACHE_MAX_SIZE)
+    """
+    _entries: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+    _lock = threading.Lock()
+    _hits = 0
+    _misses = 0
+    _evictions = 0
+
+    @staticmethod
+    def ttl_seconds(now: datetime = None) -> float:
+        now = now or datetime.now(KST)
+        if is_market_open(now):
+            return settings.QUOTE_CACHE_TTL_MARKET
+        return max((next_market_open(now) - now).total_seconds(), settings.QUOTE_CACHE_TTL_MARKET)
+
+    @classmethod
+    def get(cls, ticker: str) -> Optional[Dict[str, Any]]:
+        with cls._lock:
+            entry = cls._entries.get(ticker)
+            if entry is None:
+                cls._misses += 1
+                return None
+
+            expires_at, data = entry
+            if time.time() >= expires_at:
+                del cls._entries[ticker]
+                cls._misses += 1
+                return None
+
+            cls._entries.move_to_end(ticker)
+            cls._hits += 1
+            return copy.deepcopy(data)
+
+    @classmethod
+    def put(cls, ticker: str, data: Dict[str, Any]):
+        expires_at = time.time() + cls.ttl_seconds()
+        with cls._lock:
+            cls._entries[ticker] = (expires_at, copy.deepcopy(data))
+            cls._entries.move_to_end(ticker)
+            while len(cls._entries) > settings.QUOTE_CACHE_MAX_SIZE:
+                cls._entries.popitem(last=False)
+                cls._evictions += 1
+
+    @classmethod
+    def invalidate(cls, ticker: str = None):
+        with cls._lock:
+            if ticker is None:
+                cls._entries.clear()
+            else:
+                cls._entries.pop(ticker, None)
+
+    @classmethod
+    def stats(cls) -> Dict[str, Any]:
+        with cls._lock:
+            total = cls._hits + cls._misses
+            return {
+                "size": len(cls._entries),
+                "max_size": settings.QUOTE_CACHE_MAX_SIZE,
+                "hits": cls._hits,
+                "misses": cls._misses,
+                "evictions": cls._evictions,
+                "hit_rate": round(cls._hits / total, 4) if total else 0.0
+            }
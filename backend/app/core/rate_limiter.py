@@ -0,0 +1,84 @@
+import asyncio
+import threading
+import time
+from typing import Dict, Tuple
+from backend.app.core.config import settings
+from backend.app.core.metrics import KIS_RATE_LIMIT_WAIT
+
+class TokenBucket:
+    """
+    Token bucket with reservation semantics.
+    reserve() takes a token immediately (the balance may go negative) and returns
+    how long the caller must wait before using it, so waiters are served FIFO
+    and the lock is never held while sleeping.
+    """
+    def __init__(self, rate: float, capacity: float):
+        self.rate = max(rate, 0.001)
+        self.capacity = max(capacity, 1.0)
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+            self.updated_at = now
+
+            self.tokens -= 1
+            if self.tokens >= 0:
+                return 0.0
+            return -self.tokens / self.rate
+
+class RateLimiter:
+    """
+    Process-wide KIS rate limiter.
+    One bucket per (app_key, kind): every Account has its own app key and
+    KIS counts the per-second TR limit per app key.
+    Order TRs and inquiry TRs use separate buckets.
+    """
+    INQUIRY = "inquiry"
+    ORDER = "order"
+
+    _buckets: Dict[Tuple[str, str], TokenBucket] = {}
+    _lock = threading.Lock()
+
+    @classmethod
+    def _get_bucket(cls, app_key: str, kind: str) -> TokenBucket:
+        key = (app_key, kind)
+        bucket = cls._buckets.get(key)
+        if bucket is not None:
+            return bucket
+
+        with cls._lock:
+            bucket = cls._buckets.get(key)
+            if bucket is None:
+                if kind == cls.ORDER:
+                    bucket = TokenBucket(settings.KIS_RATE_ORDER_PER_SEC, settings.KIS_RATE_ORDER_BURST)
+                else:
+                    bucket = TokenBucket(settings.KIS_RATE_INQUIRY_PER_SEC, settings.KIS_RATE_INQUIRY_BURST)
+                cls._buckets[key] = bucket
+        return bucket
+
+    @classmethod
+    def acquire(cls, app_key: str, kind: str = INQUIRY) -> float:
+        """Block until a request slot is available. Returns seconds waited."""
+        wait = cls._get_bucket(app_key, kind).reserve()
+        KIS_RATE_LIMIT_WAIT.observe(wait, kind=kind)
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    @classmethod
+    async def acquire_async(cls, app_key: str, kind: str = INQUIRY) -> float:
+        """Asyncio variant of acquire()"""
+        wait = cls._get_bucket(app_key, kind).reserve()
+        KIS_RATE_LIMIT_WAIT.observe(wait, kind=kind)
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return wait
+
+    @classmethod
+    def reset(cls):
+        with cls._lock:
+            cls._buckets.clear()
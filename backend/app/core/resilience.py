@@ -0,0 +1,254 @@
+import asyncio
+import random
+import re
+import threading
+import time
+import httpx
+import requests
+from typing import Any, Awaitable, Callable, Dict, Set, Tuple
+from backend.app.core.config import settings
+
+_RT_CD_PATTERN = re.compile(rb'"rt_cd"\s*:\s*"([0-9]*)"')
+_MSG_CD_PATTERN = re.compile(rb'"msg_cd"\s*:\s*"([A-Za-z0-9]+)"')
+
+class CircuitOpenError(ValueError):
+    """Raised without calling KIS while an endpoint's circuit is open"""
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker for one KIS endpoint.
+    CLOSED -> (threshold transient failures) -> OPEN -> (reset timeout) -> HALF_OPEN
+    HALF_OPEN lets a single probe through: success closes, failure re-opens.
+    """
+    CLOSED = "CLOSED"
+    OPEN = "OPEN"
+    HALF_OPEN = "HALF_OPEN"
+
+    def __init__(self, name: str):
+        self.name = name
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.open_count = 0
+        self.rejected = 0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    def before_call(self):
+        with self._lock:
+            if self.state == self.OPEN:
+                if time.monotonic() - self.opened_at < settings.KIS_BREAKER_RESET_TIMEOUT:
+                    self.rejected += 1
+                    raise CircuitOpenError(f"KIS circuit open for {self.name} (failing fast)")
+                self.state = self.HALF_OPEN
+                self._probe_in_flight = False
+
+            if self.state == self.HALF_OPEN:
+                if self._probe_in_flight:
+                    self.rejected += 1
+                    raise CircuitOpenError(f"KIS circuit half-open for {self.name} (probe in flight)")
+                self._probe_in_flight = True
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+            self._probe_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._probe_in_flight = False
+            if self.state == self.HALF_OPEN or self.failures >= settings.KIS_BREAKER_FAILURE_THRESHOLD:
+                if self.state != self.OPEN:
+                    self.open_count += 1
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+
+    def release(self):
+        """
+        Call finished with a non-transient outcome that is not a success (throttled,
+        business error): frees the half-open probe slot, state / failures untouched.
+        """
+        with self._lock:
+            self._probe_in_flight = False
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "state": self.state,
+                "consecutive_failures": self.failures,
+                "open_count": self.open_count,
+                "rejected": self.rejected
+            }
+
+class KisResilience:
+    """
+    Retry + circuit breaker around outbound KIS requests (sync and asyncio).
+
+    Classification:
+    - Rate-limit rejection (msg_cd in KIS_RETRYABLE_MSG_CODES, e.g. EGW00201): retried for
+      inquiries. Orders (idempotent=False) retry only codes in KIS_ORDER_RETRYABLE_MSG_CODES,
+      which KIS rejects before the order is processed. Does not count against the breaker.
+    - Connect failures: always retried (nothing was sent). Count against the breaker.
+    - KIS errors carrying a msg_cd (EGW00123 expired token, business errors), even as
+      HTTP 500: not transient, not retried, never count against the breaker.
+    - HTTP 5xx without msg_cd / read timeouts / dropped connections: retried only for
+      idempotent calls (inquiries), never for orders. Count against the breaker.
+    - Anything else (4xx, rt_cd != "0"): returned to the caller untouched.
+    Only a genuine success (HTTP < 400, rt_cd "0" or absent) closes the breaker.
+
+    Backoff is jittered exponential; every attempt goes back through the caller's
+    send function, which re-acquires the RateLimiter budget.
+    """
+    _breakers: Dict[str, CircuitBreaker] = {}
+    _retries: Dict[str, int] = {}
+    _giveups: Dict[str, int] = {}
+    _lock = threading.Lock()
+
+    @classmethod
+    def get_breaker(cls, endpoint: str) -> CircuitBreaker:
+        breaker = cls._breakers.get(endpoint)
+        if breaker is None:
+            with cls._lock:
+                breaker = cls._breakers.setdefault(endpoint, CircuitBreaker(endpoint))
+        return breaker
+
+    @staticmethod
+    def _retryable_msg_codes(idempotent: bool = True) -> Set[str]:
+        codes = {code.strip() for code in settings.KIS_RETRYABLE_MSG_CODES.split(",") if code.strip()}
+        if not idempotent:
+            # Orders: only codes guaranteed to be rejected before execution
+            codes &= {code.strip() for code in settings.KIS_ORDER_RETRYABLE_MSG_CODES.split(",") if code.strip()}
+        return codes
+
+    @staticmethod
+    def is_success(res) -> bool:
+        """HTTP < 400 and rt_cd "0" (or no rt_cd at all, e.g. tokenP)"""
+        if res.status_code >= 400:
+            return False
+        match = _RT_CD_PATTERN.search(res.content or b"")
+        return match is None or match.group(1) == b"0"
+
+    @classmethod
+    def classify_response(cls, res, idempotent: bool) -> Tuple[bool, bool]:
+        """(transient, retryable) for an HTTP response"""
+        # Cheap byte scan instead of parsing every body
+        match = _MSG_CD_PATTERN.search(res.content or b"")
+        if match is not None:
+            # KIS answered (auth / business / rate-limit error, even as HTTP 500): gateway is healthy
+            return False, match.group(1).decode("ascii") in cls._retryable_msg_codes(idempotent)
+        if res.status_code >= 500:
+            return True, idempotent
+        return False, False
+
+    @staticmethod
+    def classify_exception(e: Exception, idempotent: bool) -> Tuple[bool, bool]:
+        """(transient, retryable) for a transport exception"""
+        if isinstance(e, (requests.exceptions.ConnectTimeout, httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)):
+            return True, True
+        if isinstance(e, (requests.exceptions.ConnectionError, requests.exceptions.Timeout, httpx.TransportError)):
+            return True, idempotent
+        return False, False
+
+    @staticmethod
+    def backoff_delay(attempt: int) -> float:
+        """Exponential backoff with jitter (between half and the full step)"""
+        cap = min(settings.KIS_RETRY_MAX_DELAY, settings.KIS_RETRY_BASE_DELAY * (2 ** attempt))
+        return random.uniform(cap / 2, cap)
+
+    @classmethod
+    def _count(cls, table: Dict[str, int], endpoint: str):
+        with cls._lock:
+            table[endpoint] = table.get(endpoint, 0) + 1
+
+    @classmethod
+    def _attempt_outcome(cls, breaker: CircuitBreaker, endpoint: str, attempt: int, transient: bool, retryable: bool) -> bool:
+        """Update breaker/counters for a failed attempt. Returns True if the caller should retry."""
+        if transient:
+            breaker.record_failure()
+        else:
+            breaker.release()
+
+        if retryable and attempt < settings.KIS_RETRY_MAX_ATTEMPTS - 1:
+            cls._count(cls._retries, endpoint)
+            return True
+        if retryable:
+            cls._count(cls._giveups, endpoint)
+        return False
+
+    @classmethod
+    def execute(cls, endpoint: str, send: Callable[[], Any], idempotent: bool = True):
+        """
+        Run send() (returns a requests.Response) with retries and the endpoint's breaker.
+        The last response is returned as-is so callers keep their own error handling.
+        """
+        breaker = cls.get_breaker(endpoint)
+        attempt = 0
+        while True:
+            breaker.before_call()
+            try:
+                res = send()
+            except Exception as e:
+                transient, retryable = cls.classify_exception(e, idempotent)
+                if not cls._attempt_outcome(breaker, endpoint, attempt, transient, retryable):
+                    raise
+                print(f"[KisResilience] {endpoint} attempt {attempt + 1} failed ({e}), retrying")
+            else:
+                transient, retryable = cls.classify_response(res, idempotent)
+                if not transient and not retryable:
+                    if cls.is_success(res):
+                        breaker.record_success()
+                    else:
+                        breaker.release()
+                    return res
+                if not cls._attempt_outcome(breaker, endpoint, attempt, transient, retryable):
+                    return res
+                print(f"[KisResilience] {endpoint} attempt {attempt + 1} got HTTP {res.status_code}, retrying")
+
+            time.sleep(cls.backoff_delay(attempt))
+            attempt += 1
+
+    @classmethod
+    async def execute_async(cls, endpoint: str, send: Callable[[], Awaitable[Any]], idempotent: bool = True):
+        """Asyncio variant of execute() (send returns an httpx.Response)"""
+        breaker = cls.get_breaker(endpoint)
+        attempt = 0
+        while True:
+            breaker.before_call()
+            try:
+                res = await send()
+            except Exception as e:
+                transient, retryable = cls.classify_exception(e, idempotent)
+                if not cls._attempt_outcome(breaker, endpoint, attempt, transient, retryable):
+                    raise
+                print(f"[KisResilience] {endpoint} attempt {attempt + 1} failed ({e}), retrying")
+            else:
+                transient, retryable = cls.classify_response(res, idempotent)
+                if not transient and not retryable:
+                    if cls.is_success(res):
+                        breaker.record_success()
+                    else:
+                        breaker.release()
+                    return res
+                if not cls._attempt_outcome(breaker, endpoint, attempt, transient, retryable):
+                    return res
+                print(f"[KisResilience] {endpoint} attempt {attempt + 1} got HTTP {res.status_code}, retrying")
+
+            await asyncio.sleep(cls.backoff_delay(attempt))
+            attempt += 1
+
+    @classmethod
+    def snapshot(cls) -> Dict[str, Any]:
+        with cls._lock:
+            endpoints = set(cls._breakers) | set(cls._retries)
+            retries = dict(cls._retries)
+            giveups = dict(cls._giveups)
+        return {
+            endpoint: {
+                **(cls._breakers[endpoint].snapshot() if endpoint in cls._breakers else {}),
+                "retries": retries.get(endpoint, 0),
+                "retry_exhausted": giveups.get(endpoint, 0)
+            }
+            for endpoint in sorted(endpoints)
+        }
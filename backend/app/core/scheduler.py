@@ -3,7 +3,9 @@ from sqlalchemy.orm import Session
 from backend.app.db.session import SessionLocal
 from backend.app.models import ScheduledOrder, Account, TradeLog
 from backend.app.core.kis_client import KisClient
+from backend.app.core.async_kis_client import AsyncKisClient
 from datetime import datetime
+import asyncio
 import math
 from backend.app.services.sheet_sync_service import SheetSyncService
 import logging
@@ -23,6 +25,20 @@ def get_db():
     finally:
         db.close()
 
+async def _prefetch_order_prices(orders, db: Session):
+    """
+    Fetch current prices for all scheduled orders up front with batched quote requests.
+    Quotes are account-independent, so one account's credentials serve every code.
+    Returns stock_code -> price response; failed codes are omitted.
+    """
+    try:
+        return await AsyncKisClient.get_prices(orders[0].account, db, [order.stock_code for order in orders])
+    except Exception as e:
+        logger.error(f"Failed to prefetch prices: {e}")
+        return {}
+    finally:
+        await AsyncKisClient.aclose()
+
 def execute_orders_by_action(action_type: str):
     """
     Execute active scheduled orders filtered by action type.
@@ -36,6 +52,9 @@ def execute_orders_by_action(action_type: str):
             ScheduledOrder.status == "ACTIVE",
             ScheduledOrder.action == action_type
         ).all()
+
+        # Pre-trade pricing: fetch every order's price up front, concurrently
+        prefetched_prices = asyncio.run(_prefetch_order_prices(active_orders, db)) if active_orders else {}
         
         for order in active_orders:
             try:
@@ -60,7 +79,9 @@ def execute_orders_by_action(action_type: str):
                 target_daily_amt = 0
                 
                 # Get Current Price first to calculate quantity for Amount mode
-                price_data = KisClient.get_price(order.account, db, order.stock_code)
+                price_data = prefetched_prices.get(order.stock_code)
+                if price_data is None:
+                    price_data = KisClient.get_price(order.account, db, order.stock_code)
                 current_price = int(price_data['output']['stck_prpr'])
 
                 if order.order_mode == "AMOUNT":
@@ -183,14 +204,36 @@ def execute_orders_by_action(action_type: str):
 def scheduled_token_refresh():
     """
     Background job to refresh tokens if they are close to expiration.
+    With the scheduler running, per-account jittered jobs (TokenRefresher) do the
+    refreshing and this only plans accounts without one; otherwise it falls back to
+    the direct check.
     """
     logger.info("[Scheduler] Checking for expiring tokens...")
     db = SessionLocal()
+    try:
+        if scheduler.running:
+            from backend.app.core.token_refresher import TokenRefresher
+            TokenRefresher.sweep(db)
+        else:
+            from backend.app.core.auth_manager import AuthManager
+            AuthManager.check_and_refresh_all_accounts(db)
+    except Exception as e:
+        logger.error(f"[Scheduler] Token refresh failed: {e}")
+    finally:
+        db.close()
+
+def force_token_refresh():
+    """
+    Manual batch trigger: refresh every token expiring within the hour (or already
+    expired) right now, instead of only planning jobs.
+    """
+    logger.info("[Scheduler] Forced token refresh...")
+    db = SessionLocal()
     try:
         from backend.app.core.auth_manager import AuthManager
         AuthManager.check_and_refresh_all_accounts(db)
     except Exception as e:
-        logger.error(f"[Scheduler] Token refresh failed: {e}")
+        logger.error(f"[Scheduler] Forced token refresh failed: {e}")
     finally:
         db.close()
 
@@ -206,9 +249,10 @@ def record_daily_asset_job():
         accounts = db.query(Account).all()
         for account in accounts:
             try:
-                # Fetch Balance
-                balance_data = KisClient.get_balance(account, db)
-                output2 = balance_data.get("output2", [])
+                # Fetch Balance Summary (output2 only; holdings are not priced)
+                output2 = []
+                for page in KisClient.iter_balance_pages(account, db, enrich=False):
+                    output2 = page.get("output2") or output2
                 if not output2:
                     logger.warning(f"[Scheduler] No balance data for account {account.alias}")
                     continue
@@ -301,7 +345,7 @@ def start_scheduler():
     # 2. Update: Buy orders at 12:30 PM
     scheduler.add_job(execute_orders_by_action, 'cron', args=['BUY'], hour=12, minute=30, id='daily_buy_job')
     
-    # 3. Token Refresh: Every hour
+    # 3. Token Refresh: Every hour (safety net for TokenRefresher's per-account jobs)
     scheduler.add_job(scheduled_token_refresh, 'interval', minutes=60, id='hourly_token_refresh')
     
     # 4. Daily Asset Recording: Daily at 4:00 PM
@@ -332,3 +376,6 @@ def start_scheduler():
 
     scheduler.add_listener(save_job_history, EVENT_JOB_EXECUTED | EVENT_JOB_ERROR)
     scheduler.start()
+
+    # Plan per-account token pre-refresh jobs for tokens already in the DB
+    scheduler.add_job(scheduled_token_refresh, id='startup_token_refresh')
@@ -2,6 +2,7 @@ from cryptography.fernet import Fernet
 from backend.app.core.config import settings
 import base64
 import hashlib
+import hmac
 
 # Derive a 32-byte key from the SECRET_KEY for Fernet
 def _get_start_key():
@@ -26,3 +27,15 @@ def decrypt_data(token: str) -> str:
     except Exception:
         # If decryption fails, return the original data (legacy plaintext support)
         return token
+
+# Separate key for the blind index (never reuse the encryption key directly)
+_blind_index_key = hashlib.sha256(b"blind-index:" + settings.SECRET_KEY.encode()).digest()
+
+def blind_index(data: str) -> str:
+    """
+    Deterministic keyed hash (HMAC-SHA256) for equality lookups on encrypted columns.
+    Fernet ciphertexts are randomized, so they cannot be indexed or compared.
+    """
+    if not data:
+        return ""
+    return hmac.new(_blind_index_key, data.encode(), hashlib.sha256).hexdigest()
@@ -0,0 +1,109 @@
+import asyncio
+import copy
+import threading
+import weakref
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+class _Call:
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+        self.dups = 0
+
+class SingleFlight:
+    """
+    In-flight request coalescing (thread version).
+    Concurrent do() calls with the same key share one execution of fn.
+    Shared results are deep-copied per caller so callers may mutate them freely.
+    """
+    def __init__(self, name: str):
+        self.name = name
+        self._calls: Dict[Hashable, _Call] = {}
+        self._lock = threading.Lock()
+        self.executions = 0
+        self.coalesced = 0
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                call.dups += 1
+                self.coalesced += 1
+                leader = False
+            else:
+                call = self._calls[key] = _Call()
+                self.executions += 1
+                leader = True
+
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return copy.deepcopy(call.result)
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+                shared = call.dups > 0
+            call.event.set()
+
+        return copy.deepcopy(call.result) if shared else call.result
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "in_flight": len(self._calls),
+                "executions": self.executions,
+                "coalesced": self.coalesced
+            }
+
+class AsyncSingleFlight:
+    """
+    In-flight request coalescing (asyncio version).
+    Futures are bound to their event loop, so in-flight calls are tracked per loop.
+    """
+    def __init__(self, name: str):
+        self.name = name
+        self._calls: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[Hashable, list]]" = weakref.WeakKeyDictionary()
+        self.executions = 0
+        self.coalesced = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        loop = asyncio.get_running_loop()
+        calls = self._calls.setdefault(loop, {})
+
+        entry = calls.get(key)
+        if entry is not None:
+            entry[1] += 1
+            self.coalesced += 1
+            # shield: a cancelled follower must not cancel the shared call
+            result = await asyncio.shield(entry[0])
+            return copy.deepcopy(result)
+
+        # fn runs in its own task, so cancelling the leader leaves it running for the followers
+        task = loop.create_task(fn())
+        entry = calls[key] = [task, 0]
+        self.executions += 1
+
+        def _done(t: asyncio.Task):
+            if calls.get(key) is entry:
+                del calls[key]
+            if not t.cancelled():
+                t.exception() # Mark retrieved when nobody is waiting
+        task.add_done_callback(_done)
+
+        result = await asyncio.shield(task)
+        return copy.deepcopy(result) if entry[1] > 0 else result
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "in_flight": sum(len(calls) for calls in self._calls.values()),
+            "executions": self.executions,
+            "coalesced": self.coalesced
+        }
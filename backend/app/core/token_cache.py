@@ -0,0 +1,62 @@
+import threading
+from datetime import datetime, timedelta
+from typing import Any, Dict, NamedTuple, Optional
+
+class CachedToken(NamedTuple):
+    token: str          # Plaintext access token
+    expires_at: datetime
+
+class TokenCache:
+    """
+    Process-level cache of plaintext KIS access tokens, keyed by account id.
+    The DB (encrypted Account.access_token) stays the durable store; this cache
+    lets scheduler jobs, API threads and the WebSocket path share one token
+    without a Fernet decrypt or SQLite round trip per request.
+    """
+    EXPIRY_BUFFER = timedelta(seconds=60) # Same buffer as AuthManager._is_token_valid
+
+    _tokens: Dict[int, CachedToken] = {}
+    _lock = threading.Lock()
+    _hits = 0
+    _misses = 0
+
+    @classmethod
+    def get(cls, account_id: int) -> Optional[str]:
+        """Valid token for the account, or None (missing / unknown expiry / about to expire)"""
+        with cls._lock:
+            entry = cls._tokens.get(account_id)
+            if entry is not None and entry.expires_at is not None and datetime.now() < entry.expires_at - cls.EXPIRY_BUFFER:
+                cls._hits += 1
+                return entry.token
+            cls._misses += 1
+            return None
+
+    @classmethod
+    def get_entry(cls, account_id: int) -> Optional[CachedToken]:
+        """Raw entry including expiry (no validity check)"""
+        return cls._tokens.get(account_id)
+
+    @classmethod
+    def put(cls, account_id: int, token: str, expires_at: Optional[datetime]):
+        with cls._lock:
+            if expires_at is None:
+                # Unknown expiry: never serve it (nor an older token) from the cache
+                cls._tokens.pop(account_id, None)
+                return
+            cls._tokens[account_id] = CachedToken(token, expires_at)
+
+    @classmethod
+    def invalidate(cls, account_id: int = None):
+        with cls._lock:
+            if account_id is None:
+                cls._tokens.clear()
+            else:
+                cls._tokens.pop(account_id, None)
+
+    @classmethod
+    def stats(cls) -> Dict[str, Any]:
+        return {
+            "accounts": len(cls._tokens),
+            "hits": cls._hits,
+            "misses": cls._misses
+        }
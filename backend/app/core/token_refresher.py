@@ -0,0 +1,179 @@
+import random
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
+from backend.app.core.config import settings
+from backend.app.core.metrics import REGISTRY, Counter, Histogram
+
+TOKEN_REFRESH_DURATION = REGISTRY.register(Histogram(
+    "kis_token_refresh_duration_seconds", "Background access token pre-refresh latency", ["result"]))
+TOKEN_REFRESH_FAILURES = REGISTRY.register(Counter(
+    "kis_token_refresh_failures_total", "Background access token pre-refreshes that failed"))
+
+class TokenRefresher:
+    """
+    Proactive access token refresher.
+    Every time a token lands in TokenCache (tokenP / master sync / DB load) a one-shot
+    APScheduler job is planned at a random point inside the pre-refresh window
+    [expiry - TOKEN_PREREFRESH_WINDOW, expiry - TOKEN_PREREFRESH_MIN_LEAD].
+    Jobs run on the scheduler's thread pool, so accounts refresh concurrently and
+    the jitter keeps them from hitting tokenP at the same instant.
+    In steady state the request path only ever sees a cached, valid token.
+    """
+    JOB_PREFIX = "token_refresh_"
+
+    _lock = threading.Lock()
+    _planned: Dict[int, datetime] = {} # account_id -> planned refresh time
+    _refreshed = 0
+    _failures = 0
+    _last_error: Optional[str] = None
+
+    @classmethod
+    def _scheduler(cls):
+        # Lazy import: scheduler -> kis_client -> auth_manager -> token_refresher
+        from backend.app.core.scheduler import scheduler
+        return scheduler
+
+    @classmethod
+    def pick_refresh_time(cls, expires_at: datetime) -> datetime:
+        """Random point inside the pre-refresh window (now if the window already started)"""
+        now = datetime.now()
+        window_start = expires_at - timedelta(seconds=settings.TOKEN_PREREFRESH_WINDOW)
+        window_end = expires_at - timedelta(seconds=settings.TOKEN_PREREFRESH_MIN_LEAD)
+        start = max(window_start, now)
+        if window_end <= start:
+            return now
+        return start + timedelta(seconds=random.uniform(0, (window_end - start).total_seconds()))
+
+    @classmethod
+    def track(cls, account_id: int, expires_at: Optional[datetime]):
+        """Plan (or re-plan) the background refresh for a freshly cached token"""
+        if expires_at is None:
+            return
+        # Slaves receive renewed tokens from the master's push channel
+        from backend.app.core.token_sync import TokenSubscriber
+        if TokenSubscriber.is_running():
+            return
+        scheduler = cls._scheduler()
+        if not scheduler.running:
+            return
+        with cls._lock:
+            planned = cls._planned.get(account_id)
+            # Same token seen again (e.g. DB reload) - keep the existing plan
+            window_start = expires_at - timedelta(seconds=settings.TOKEN_PREREFRESH_WINDOW)
+            if planned is not None and datetime.now() < planned and window_start <= planned < expires_at:
+                return
+            run_at = cls.pick_refresh_time(expires_at)
+            cls._planned[account_id] = run_at
+        # Naive local time -> aware, the scheduler runs in Asia/Seoul
+        scheduler.add_job(
+            cls.refresh_account, 'date', run_date=run_at.astimezone(), args=[account_id],
+            id=f"{cls.JOB_PREFIX}{account_id}", replace_existing=True, misfire_grace_time=None
+        )
+
+    @classmethod
+    def forget(cls, account_id: int):
+        """Drop the plan for a deleted account / replaced credentials"""
+        with cls._lock:
+            cls._planned.pop(account_id, None)
+        scheduler = cls._scheduler()
+        if scheduler.running and scheduler.get_job(f"{cls.JOB_PREFIX}{account_id}"):
+            scheduler.remove_job(f"{cls.JOB_PREFIX}{account_id}")
+
+    @classmethod
+    def refresh_account(cls, account_id: int):
+        """Scheduled job: refresh one account's token with its own DB session"""
+        from backend.app.db.session import SessionLocal
+        from backend.app.models import Account
+        from backend.app.core.auth_manager import AuthManager
+        from backend.app.core.token_cache import TokenCache
+
+        with cls._lock:
+            cls._planned.pop(account_id, None)
+        db = SessionLocal()
+        started = time.perf_counter()
+        try:
+            account = db.query(Account).filter(Account.id == account_id).first()
+            if account is None:
+                return
+            with AuthManager._get_account_lock(account.id):
+                # Someone (manual refresh / master push) already renewed it
+                entry = TokenCache.get_entry(account.id)
+                horizon = datetime.now() + timedelta(seconds=settings.TOKEN_PREREFRESH_WINDOW)
+                if entry is not None and entry.expires_at > horizon:
+                    cls.track(account.id, entry.expires_at)
+                    return
+                AuthManager._refresh_token(account, db)
+            elapsed = time.perf_counter() - started
+            TOKEN_REFRESH_DURATION.observe(elapsed, result="success")
+            with cls._lock:
+                cls._refreshed += 1
+            print(f"[TokenRefresher] Refreshed token for {account.alias} in {elapsed:.2f}s")
+        except Exception as e:
+            TOKEN_REFRESH_DURATION.observe(time.perf_counter() - started, result="failure")
+            TOKEN_REFRESH_FAILURES.inc()
+            with cls._lock:
+                cls._failures += 1
+                cls._last_error = f"account {account_id}: {e}"
+            print(f"[TokenRefresher] Failed to refresh token for account {account_id}: {e}")
+            cls._retry_later(account_id)
+        finally:
+            db.close()
+
+    @classmethod
+    def _retry_later(cls, account_id: int):
+        scheduler = cls._scheduler()
+        if not scheduler.running:
+            return
+        run_at = datetime.now() + timedelta(seconds=settings.TOKEN_PREREFRESH_RETRY)
+        with cls._lock:
+            cls._planned[account_id] = run_at
+        scheduler.add_job(
+            cls.refresh_account, 'date', run_date=run_at.astimezone(), args=[account_id],
+            id=f"{cls.JOB_PREFIX}{account_id}", replace_existing=True, misfire_grace_time=None
+        )
+
+    @classmethod
+    def sweep(cls, db):
+        """
+        Safety net (startup + hourly): plan every account that holds a token and has no
+        pending job. Expired / soon-expiring tokens are planned for right away. Accounts
+        that never had a token (dormant / not configured yet) are skipped; their first
+        real request mints one lazily (tokenP is limited to 1/min).
+        """
+        from backend.app.models import Account
+
+        count = 0
+        for account in db.query(Account).all():
+            with cls._lock:
+                pending = cls._planned.get(account.id)
+            if pending is not None and pending > datetime.now():
+                continue
+            if not (account.access_token and account.token_expired_at):
+                continue
+            cls.track(account.id, account.token_expired_at)
+            count += 1
+        print(f"[TokenRefresher] Sweep planned {count} account(s).")
+
+    @classmethod
+    def stats(cls) -> Dict[str, Any]:
+        with cls._lock:
+            return {
+                "window_seconds": settings.TOKEN_PREREFRESH_WINDOW,
+                "planned": {
+                    str(account_id): run_at.strftime("%Y-%m-%d %H:%M:%S")
+                    for account_id, run_at in cls._planned.items()
+                },
+                "refreshed": cls._refreshed,
+                "failures": cls._failures,
+                "last_error": cls._last_error
+            }
+
+    @classmethod
+    def reset(cls):
+        with cls._lock:
+            cls._planned.clear()
+            cls._refreshed = 0
+            cls._failures = 0
+            cls._last_error = None
@@ -0,0 +1,207 @@
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from typing import Any, Deque, Dict, List, NamedTuple, Optional
+import requests
+from backend.app.core.config import settings
+
+class TokenEvent(NamedTuple):
+    version: int
+    account_number: str # Plaintext CANO (what the sync API keys tokens by)
+    access_token: str
+    expired_at: Optional[datetime]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "version": self.version,
+            "account_number": self.account_number,
+            "access_token": self.access_token,
+            "expired_at": self.expired_at.isoformat() if self.expired_at else None
+        }
+
+class TokenBroadcaster:
+    """
+    Master side of token distribution.
+    Every token minted here is appended to a short versioned log and waiting
+    long-poll requests (/v1/sync/kis-tokens/subscribe) are woken up at once.
+    A subscriber that fell behind the retained log gets resync=True and is
+    answered with a full snapshot instead.
+    """
+    MAX_EVENTS = 256
+
+    _cond = threading.Condition()
+    _events: Deque[TokenEvent] = deque(maxlen=MAX_EVENTS)
+    _version = 0
+    _waiting = 0
+
+    @classmethod
+    def publish(cls, account_number: str, access_token: str, expired_at: Optional[datetime]):
+        with cls._cond:
+            cls._version += 1
+            cls._events.append(TokenEvent(cls._version, account_number, access_token, expired_at))
+            cls._cond.notify_all()
+
+    @classmethod
+    def version(cls) -> int:
+        return cls._version
+
+    @classmethod
+    def wait(cls, since: int, timeout: float) -> Dict[str, Any]:
+        """
+        Block until a version newer than `since` exists (or timeout).
+        Returns {"version", "events", "resync"}.
+        """
+        deadline = time.monotonic() + timeout
+        with cls._cond:
+            cls._waiting += 1
+            try:
+                while cls._version <= since:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    cls._cond.wait(remaining)
+                oldest = cls._events[0].version if cls._events else cls._version + 1
+                resync = since < oldest - 1 and since < cls._version
+                events = [e for e in cls._events if e.version > since]
+                return {"version": cls._version, "events": events, "resync": resync}
+            finally:
+                cls._waiting -= 1
+
+    @classmethod
+    def stats(cls) -> Dict[str, Any]:
+        return {
+            "version": cls._version,
+            "retained_events": len(cls._events),
+            "waiting_subscribers": cls._waiting
+        }
+
+    @classmethod
+    def reset(cls):
+        with cls._cond:
+            cls._events.clear()
+            cls._version = 0
+
+class TokenSubscriber:
+    """
+    Slave side of token distribution (settings.MASTER_API_URL set).
+    A daemon thread long-polls the master and stores every pushed token in the
+    local DB + TokenCache, so the request path finds a valid token without
+    the cross-node round trip in AuthManager._refresh_token.
+    """
+    _thread: Optional[threading.Thread] = None
+    _stop = threading.Event()
+    _lock = threading.Lock()
+    _session: Optional[requests.Session] = None
+    _version = -1 # -1: no snapshot taken yet
+    _received = 0
+    _errors = 0
+    _connected = False
+    _last_event_at: Optional[str] = None
+    _last_error: Optional[str] = None
+
+    @classmethod
+    def is_running(cls) -> bool:
+        return cls._thread is not None and cls._thread.is_alive()
+
+    @classmethod
+    def start(cls):
+        if not settings.MASTER_API_URL or cls.is_running():
+            return
+        cls._stop.clear()
+        # Own session: a parked long-poll must not hold a KIS HttpTransport slot
+        cls._session = requests.Session()
+        cls._thread = threading.Thread(target=cls._run, name="token-subscriber", daemon=True)
+        cls._thread.start()
+        print(f"[TokenSync] Subscribed to master tokens: {settings.MASTER_API_URL}")
+
+    @classmethod
+    def stop(cls):
+        cls._stop.set()
+        if cls._session is not None:
+            cls._session.close()
+        cls._thread = None
+        cls._connected = False
+
+    @classmethod
+    def _run(cls):
+        backoff = 1.0
+        while not cls._stop.is_set():
+            try:
+                cls.poll_once()
+                backoff = 1.0
+            except Exception as e:
+                cls._connected = False
+                with cls._lock:
+                    cls._errors += 1
+                    cls._last_error = str(e)
+                print(f"[TokenSync] Subscription error (retry in {backoff:.0f}s): {e}")
+                cls._stop.wait(backoff)
+                backoff = min(backoff * 2, settings.TOKEN_SYNC_MAX_BACKOFF)
+
+    @classmethod
+    def poll_once(cls):
+        """One long-poll round trip; applies whatever the master pushed"""
+        session = cls._session or requests.Session()
+        res = session.get(
+            f"{settings.MASTER_API_URL}/v1/sync/kis-tokens/subscribe",
+            params={"since": cls._version, "timeout": settings.TOKEN_SYNC_POLL_TIMEOUT},
+            headers={"x-sync-key": settings.SYNC_API_KEY},
+            timeout=(5, settings.TOKEN_SYNC_POLL_TIMEOUT + 10)
+        )
+        res.raise_for_status()
+        cls._connected = True
+        data = res.json()
+        cls.apply(data.get("tokens", []))
+        cls._version = data.get("version", cls._version)
+
+    @classmethod
+    def apply(cls, tokens: List[Dict[str, Any]]) -> int:
+        """Store pushed tokens (local DB + TokenCache). Returns how many matched an account."""
+        if not tokens:
+            return 0
+        from backend.app.db.session import SessionLocal
+        from backend.app.models import Account
+        from backend.app.core.auth_manager import AuthManager
+        from backend.app.core.credential_cache import CredentialCache
+        from backend.app.core.token_cache import TokenCache
+        from backend.app.core.security import encrypt_data, blind_index
+
+        # Latest token per account wins, keyed by blind index (indexed lookup, no decrypt)
+        latest = {blind_index(item["account_number"]): item for item in tokens}
+        applied = 0
+        db = SessionLocal()
+        try:
+            for account in db.query(Account).filter(Account.cano_hash.in_(list(latest))).all():
+                item = latest.get(account.cano_hash)
+                if item is None or not item.get("expired_at"):
+                    continue
+                expired_at = datetime.fromisoformat(item["expired_at"])
+                with AuthManager._get_account_lock(account.id):
+                    account.access_token = encrypt_data(item["access_token"])
+                    account.token_expired_at = expired_at
+                    db.commit()
+                    TokenCache.put(account.id, item["access_token"], expired_at)
+                    CredentialCache.invalidate_headers(account.id)
+                applied += 1
+        finally:
+            db.close()
+        with cls._lock:
+            cls._received += applied
+            cls._last_event_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        print(f"[TokenSync] Applied {applied} token(s) pushed by master.")
+        return applied
+
+    @classmethod
+    def stats(cls) -> Dict[str, Any]:
+        with cls._lock:
+            return {
+                "enabled": bool(settings.MASTER_API_URL),
+                "running": cls.is_running(),
+                "connected": cls._connected,
+                "version": cls._version,
+                "received": cls._received,
+                "errors": cls._errors,
+                "last_event_at": cls._last_event_at,
+                "last_error": cls._last_error
+            }
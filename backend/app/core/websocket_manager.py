@@ -2,164 +2,597 @@
 import asyncio
 import json
 import logging
+import random
+import time
 import websockets
-from typing import Dict, List, Optional
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
 from sqlalchemy.orm import Session
-from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
-from cryptography.hazmat.backends import default_backend
-from backend.app.core.kis_client import KisClient
+from backend.app.core.config import settings
+from backend.app.core.balance_cache import BalanceSnapshotCache
+from backend.app.core.kis_realtime import FillEvent, FillTracker, decrypt_payload, parse_executions, parse_ticks
 from backend.app.models import Account
-from backend.app.core.security import decrypt_data
 
 logger = logging.getLogger("websocket_manager")
 logger.setLevel(logging.INFO)
 
-# KIS WebSocket Endpoint (Real) - Ops
-KIS_WS_URL = "ws://ops.koreainvestment.com:21000"
-
-class WebSocketManager:
+class ClientConnection:
     """
-    Manages WebSocket connection to KIS and broadcasts to Frontend clients.
+    One frontend WebSocket with its own bounded send queue, drained by its own task.
+    Producers (the KIS reader) only enqueue, so a slow tab never delays other
+    clients or the KIS socket. On overflow the policy drops the oldest queued
+    message or disconnects the slow consumer.
     """
-    def __init__(self):
-        self.active_connections: List[websockets.WebSocketServerProtocol] = []
-        self.kis_ws = None
-        self.approval_key = None
-        self.is_connected = False
-        self.account_subscriptions: Dict[str, Account] = {} # hts_id -> Account
+    def __init__(self, websocket, queue_size: int, overflow_policy: str):
+        self.websocket = websocket
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.overflow_policy = overflow_policy
+        self.codes: Set[str] = set() # Price codes this client asked for
+        self.execution_key: Optional[Tuple[str, str]] = None # H0STCNI0 registration held by this client
+        self.sent = 0
+        self.dropped = 0
+        self.closed = False
+        self.task: Optional[asyncio.Task] = None
+
+    def start(self, on_error):
+        self.task = asyncio.create_task(self._drain(on_error))
 
-    async def connect(self, approval_key: str):
-        """Connect to KIS WebSocket"""
-        self.approval_key = approval_key
+    def enqueue(self, text: str) -> bool:
+        """Non-blocking. Returns False when the client should be disconnected."""
+        if self.closed:
+            return True
         try:
-            self.kis_ws = await websockets.connect(f"{KIS_WS_URL}/tryitout/H0STCN0")
-            self.is_connected = True
-            logger.info("Connected to KIS WebSocket")
-            asyncio.create_task(self.listen_kis())
+            self.queue.put_nowait(text)
+            return True
+        except asyncio.QueueFull:
+            self.dropped += 1
+            if self.overflow_policy == "disconnect":
+                return False
+            self.queue.get_nowait() # drop_oldest
+            self.queue.put_nowait(text)
+            return True
+
+    async def _drain(self, on_error):
+        try:
+            while True:
+                text = await self.queue.get()
+                await self.websocket.send_text(text)
+                self.sent += 1
+        except asyncio.CancelledError:
+            pass
         except Exception as e:
-            logger.error(f"Failed to connect KIS WS: {e}")
-            self.is_connected = False
+            logger.warning(f"Client send failed, disconnecting: {e}")
+            on_error(self.websocket)
 
-    async def subscribe_execution(self, account: Account, hts_id: str):
-        """Subscribe to Execution Notification (H0STCNI0)"""
-        if not self.is_connected or not self.kis_ws:
-            logger.error("KIS WS not connected")
-            return
+    def close(self):
+        self.closed = True
+        if self.task is not None and self.task is not asyncio.current_task():
+            self.task.cancel()
 
-        self.account_subscriptions[hts_id] = account
-        
-        req = {
+    def stats(self) -> Dict[str, Any]:
+        return {"queue_depth": self.queue.qsize(), "sent": self.sent, "dropped": self.dropped, "codes": len(self.codes)}
+
+SubscriptionKey = Tuple[str, str] # (tr_id, tr_key)
+
+class KisSession:
+    """
+    One KIS WebSocket connection, opened with one account's approval key.
+    KIS caps registrations per session (KIS_WS_MAX_SUBSCRIPTIONS); the manager
+    spreads keys over several sessions once one is full.
+
+    The session is supervised: on a drop (or no traffic for KIS_WS_IDLE_TIMEOUT)
+    it reconnects with jittered exponential backoff, reusing the cached approval
+    key, and replays every registration it carries. PINGPONG frames are echoed.
+    """
+    def __init__(self, manager: "WebSocketManager", account_id: int, capacity: int):
+        self.manager = manager
+        self.account_id = account_id
+        self.approval_key: Optional[str] = None
+        self.capacity = capacity
+        self.registered: Set[SubscriptionKey] = set() # Desired registrations (replayed on reconnect)
+        self.ws = None
+        self.task: Optional[asyncio.Task] = None
+        self.connected = False
+        self.closed = False
+        self.reconnects = 0
+        self.last_error: Optional[str] = None
+        self.cipher_keys: Dict[str, Tuple[str, str]] = {} # tr_id -> (AES key, iv) from the subscribe ack
+
+    def has_price_slot(self) -> bool:
+        # One slot stays reserved for this account's own H0STCNI0 registration
+        return len(self.registered) < self.capacity - 1
+
+    async def open(self, account: Account = None):
+        """First connection (errors surface to the caller), then supervise in the background"""
+        await self._connect(account)
+        self.task = asyncio.create_task(self._supervise())
+        logger.info(f"Connected to KIS WebSocket (account {self.account_id})")
+
+    async def _connect(self, account: Account = None):
+        self.approval_key = await self.manager._approval_key(self.account_id, account)
+        self.ws = await websockets.connect(f"{settings.KIS_WS_URL}/tryitout/H0STCN0")
+        self.connected = True
+        # A new KIS session starts empty: replay what this session carries
+        for key in list(self.registered):
+            await self.ws.send(self._request("1", key))
+
+    async def _supervise(self):
+        while not self.closed:
+            await self._listen()
+            if self.closed:
+                break
+            logger.warning(f"KIS WebSocket dropped (account {self.account_id}): {self.last_error}")
+            delay = settings.KIS_WS_RECONNECT_BASE_DELAY
+            while not self.closed:
+                await asyncio.sleep(delay * random.uniform(0.5, 1.0))
+                try:
+                    await self._connect()
+                    self.reconnects += 1
+                    logger.info(f"Reconnected to KIS WebSocket (account {self.account_id}), replayed {len(self.registered)} registration(s)")
+                    await self.manager._on_session_reconnected(self)
+                    break
+                except Exception as e:
+                    self.last_error = str(e)
+                    logger.error(f"KIS reconnect failed (account {self.account_id}): {e}")
+                    delay = min(delay * 2, settings.KIS_WS_RECONNECT_MAX_BACKOFF)
+
+    def _request(self, tr_type: str, key: SubscriptionKey) -> str:
+        return json.dumps({
             "header": {
                 "approval_key": self.approval_key,
                 "custtype": "P",
-                "tr_type": "1", # Register
+                "tr_type": tr_type, # 1: Register, 2: Unregister
                 "content-type": "utf-8"
             },
             "body": {
                 "input": {
-                    "tr_id": "H0STCNI0", # Real Environment
-                    "tr_key": hts_id
+                    "tr_id": key[0],
+                    "tr_key": key[1]
                 }
             }
+        })
+
+    async def _send(self, text: str):
+        try:
+            await self.ws.send(text)
+        except Exception as e:
+            # Connection is going down; the registration is replayed on reconnect
+            logger.warning(f"KIS send failed (account {self.account_id}): {e}")
+
+    async def register(self, key: SubscriptionKey):
+        self.registered.add(key)
+        if self.connected:
+            await self._send(self._request("1", key))
+
+    async def unregister(self, key: SubscriptionKey):
+        self.registered.discard(key)
+        if self.connected:
+            await self._send(self._request("2", key))
+
+    async def _listen(self):
+        """Listen to KIS messages and hand them to the manager (returns when the socket drops)"""
+        try:
+            while True:
+                msg = str(await asyncio.wait_for(self.ws.recv(), timeout=settings.KIS_WS_IDLE_TIMEOUT))
+                if msg.startswith("{") and '"PINGPONG"' in msg:
+                    await self._send(msg) # KIS expects the PINGPONG frame echoed back
+                    continue
+                try:
+                    await self.manager._handle_kis_message(self, msg)
+                except Exception as e:
+                    logger.error(f"KIS message handling failed: {e}")
+        except asyncio.TimeoutError:
+            self.last_error = f"no traffic for {settings.KIS_WS_IDLE_TIMEOUT}s"
+        except Exception as e:
+            self.last_error = str(e)
+        finally:
+            self.connected = False
+            try:
+                await self.ws.close()
+            except Exception:
+                pass
+
+    def reconnect(self):
+        """Force a reconnect (e.g. approval key rejected); the supervisor takes over"""
+        if self.connected and self.ws is not None:
+            asyncio.ensure_future(self.ws.close())
+
+    async def close(self):
+        self.closed = True
+        self.connected = False
+        if self.task is not None:
+            self.task.cancel()
+        if self.ws is not None:
+            await self.ws.close()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "account_id": self.account_id,
+            "connected": self.connected,
+            "registered": len(self.registered),
+            "capacity": self.capacity,
+            "reconnects": self.reconnects,
+            "last_error": self.last_error
         }
-        
-        await self.kis_ws.send(json.dumps(req))
-        logger.info(f"Subscribed to execution for HTS ID: {hts_id}")
+
+class WebSocketManager:
+    """
+    Manages WebSocket connection to KIS and broadcasts to Frontend clients.
+    KIS registrations are reference-counted across clients: registered on the
+    first interested client, unregistered (tr_type 2) when the last one leaves.
+    """
+    def __init__(self):
+        self.clients: Dict[Any, ClientConnection] = {} # websocket -> ClientConnection
+        self.code_subscribers: Dict[str, Set[ClientConnection]] = {} # Inverted index: code -> clients
+        self.dropped_messages = 0 # Totals incl. disconnected clients
+        self.slow_disconnects = 0
+        self.sessions: List[KisSession] = []
+        self.refcounts: Dict[SubscriptionKey, int] = {}
+        self.routes: Dict[SubscriptionKey, KisSession] = {} # Registered key -> session carrying it
+        self.rejected_subscriptions = 0
+        self.account_subscriptions: Dict[str, Account] = {} # hts_id -> Account
+        self._approval_keys: Dict[int, Tuple[str, float]] = {} # account_id -> (key, monotonic expiry)
+        self.approval_key_fetches = 0
+        self._fills = FillTracker()
+        self._session_lock = asyncio.Lock()
+
+    @property
+    def is_connected(self) -> bool:
+        return any(session.connected for session in self.sessions)
+
+    def _session_of(self, account_id: int) -> Optional[KisSession]:
+        for session in self.sessions:
+            if session.account_id == account_id and not session.closed:
+                return session
+        return None
+
+    async def _approval_key(self, account_id: int, account: Account = None) -> str:
+        """Approval key for the account, reused until KIS_WS_APPROVAL_KEY_TTL instead of per (re)connect"""
+        cached = self._approval_keys.get(account_id)
+        if cached is not None and time.monotonic() < cached[1]:
+            return cached[0]
+        from backend.app.core.async_kis_client import AsyncKisClient
+        from backend.app.db.session import SessionLocal
+
+        db = SessionLocal()
+        try:
+            if account is None:
+                account = db.query(Account).filter(Account.id == account_id).first()
+                if account is None:
+                    raise ValueError(f"Account {account_id} not found")
+            approval_key = await AsyncKisClient.get_approval_key(account, db)
+        finally:
+            db.close()
+        self._approval_keys[account_id] = (approval_key, time.monotonic() + settings.KIS_WS_APPROVAL_KEY_TTL)
+        self.approval_key_fetches += 1
+        return approval_key
+
+    async def ensure_session(self, account: Account, db: Session = None) -> KisSession:
+        """Session opened with this account's approval key (opens one if needed)"""
+        async with self._session_lock:
+            return await self._ensure_session_locked(account)
+
+    async def _ensure_session_locked(self, account: Account) -> KisSession:
+        session = self._session_of(account.id)
+        if session is not None:
+            return session
+        session = KisSession(self, account.id, settings.KIS_WS_MAX_SUBSCRIPTIONS)
+        await session.open(account)
+        self.sessions.append(session)
+        return session
+
+    async def _on_session_reconnected(self, session: KisSession):
+        # Notices may have been missed while down: drop snapshots and let those accounts' clients reload
+        missed = {key for key in session.registered if key[0] == "H0STCNI0"}
+        for _, hts_id in missed:
+            account = self.account_subscriptions.get(hts_id)
+            if account is not None:
+                BalanceSnapshotCache.invalidate(account.id, reason="KIS WS reconnect")
+        if not missed:
+            return
+        text = json.dumps({"type": "EXECUTION", "data": "Refresh Required"})
+        for client in list(self.clients.values()):
+            if client.execution_key in missed and not client.enqueue(text):
+                self._disconnect_slow(client)
+
+    async def _pick_session(self, account: Optional[Account]) -> KisSession:
+        async with self._session_lock:
+            # Execution notices ride on the owning account's session
+            if account is not None:
+                return await self._ensure_session_locked(account)
+            for session in self.sessions:
+                if not session.closed and session.has_price_slot():
+                    return session
+            # Every session is full: shard onto another household account's approval key
+            used = {session.account_id for session in self.sessions if not session.closed}
+            # Sync DB query: keep it off the event loop
+            candidates = await asyncio.to_thread(self._candidate_accounts)
+            last_error = None
+            for candidate in candidates:
+                if candidate.id in used:
+                    continue
+                try:
+                    session = await self._ensure_session_locked(candidate)
+                except Exception as e:
+                    # Bad key / approval or connect failure: try the next account
+                    last_error = e
+                    logger.warning(f"KIS WS shard on account {candidate.id} failed: {e}")
+                    continue
+                if session.has_price_slot():
+                    return session
+            detail = f", last error: {last_error}" if last_error else ""
+            raise RuntimeError(f"KIS WebSocket capacity exhausted ({len(used)} session(s) full{detail})")
+
+    @staticmethod
+    def _candidate_accounts() -> List[Account]:
+        """Accounts whose approval keys may open extra sessions"""
+        from backend.app.db.session import SessionLocal
+
+        db = SessionLocal()
+        try:
+            accounts = db.query(Account).filter(Account.app_key.isnot(None)).all()
+            for account in accounts:
+                db.expunge(account)
+            return accounts
+        finally:
+            db.close()
+
+    async def acquire(self, tr_id: str, tr_key: str, account: Account = None):
+        """Reference-counted registration; only the first holder reaches KIS"""
+        key = (tr_id, tr_key)
+        count = self.refcounts.get(key, 0)
+        self.refcounts[key] = count + 1
+        if count > 0:
+            return
+        await self._route(key, account)
+
+    async def _route(self, key: SubscriptionKey, account: Account = None):
+        try:
+            session = await self._pick_session(account)
+            self.routes[key] = session
+            await session.register(key)
+            logger.info(f"Subscribed {key[0]} {key[1]} (account {session.account_id} session)")
+        except Exception as e:
+            # Stays refcounted (release still balances) but carries no KIS registration
+            self.rejected_subscriptions += 1
+            logger.error(f"Failed to subscribe {key[0]} {key[1]}: {e}")
+
+    def release(self, tr_id: str, tr_key: str):
+        """Drop one holder; the last one sends the KIS unregister (tr_type 2)"""
+        key = (tr_id, tr_key)
+        count = self.refcounts.get(key, 0)
+        if count > 1:
+            self.refcounts[key] = count - 1
+            return
+        self.refcounts.pop(key, None)
+        session = self.routes.pop(key, None)
+        if session is not None:
+            asyncio.ensure_future(session.unregister(key))
+            logger.info(f"Unsubscribed {tr_id} {tr_key}")
+
+    async def subscribe_execution(self, account: Account, hts_id: str, websocket=None):
+        """Subscribe to Execution Notification (H0STCNI0), held by the given client until it leaves"""
+        self.account_subscriptions[hts_id] = account
+        client = self.clients.get(websocket)
+        if client is not None:
+            if client.execution_key is not None:
+                return
+            client.execution_key = ("H0STCNI0", hts_id)
+        await self.acquire("H0STCNI0", hts_id, account)
 
     async def subscribe_stock_price(self, stock_code: str):
         """Subscribe to Real-time Stock Price (H0STCNT0)"""
-        if not self.is_connected or not self.kis_ws:
-            logger.error("KIS WS not connected")
+        await self.acquire("H0STCNT0", stock_code)
+
+    def unsubscribe_stock_price(self, stock_code: str):
+        self.release("H0STCNT0", stock_code)
+
+    async def _handle_kis_message(self, session: KisSession, text_msg: str):
+        """Decrypt / parse one KIS frame and fan it out"""
+        if not text_msg:
             return
 
-        req = {
-            "header": {
-                "approval_key": self.approval_key,
-                "custtype": "P",
-                "tr_type": "1", # Register
-                "content-type": "utf-8"
-            },
-            "body": {
-                "input": {
-                    "tr_id": "H0STCNT0", # Real-time Price
-                    "tr_key": stock_code
-                }
-            }
-        }
+        first_char = text_msg[0]
         
-        await self.kis_ws.send(json.dumps(req))
-        logger.info(f"Subscribed to price for Stock: {stock_code}")
+        if first_char == '0' or first_char == '1':
+            parts = text_msg.split('|')
+            if len(parts) >= 4:
+                encrypted = parts[0] == '1'
+                tr_id = parts[1]
+                data_cnt = parts[2]
+                payload = parts[3] # Verified data separated by ^
 
-    async def listen_kis(self):
-        """Listen to KIS messages, decrypt, and broadcast"""
-        try:
-            while self.is_connected:
-                msg = await self.kis_ws.recv()
+                if encrypted:
+                    # AES256 Decrypt with the key / iv from this session's subscribe response
+                    cipher = session.cipher_keys.get(tr_id)
+                    if cipher is None:
+                        logger.warning(f"No AES key for {tr_id} yet, frame dropped")
+                        return
+                    payload = decrypt_payload(cipher[0], cipher[1], payload)
                 
-                text_msg = str(msg)
-                if not text_msg: continue
+                if tr_id == "H0STCNI0": # Execution
+                    for event in parse_executions(payload, int(data_cnt or 1)):
+                        await self._handle_fill_event(self._fills.track(event))
+                    
+                elif tr_id == "H0STCNT0": # Real-time Price, data_cnt records per frame
+                    for tick in parse_ticks(payload, int(data_cnt or 1)):
+                        await self.publish_price(tick.code, tick.to_message())
                 
-                first_char = text_msg[0]
-                
-                if first_char == '0' or first_char == '1':
-                    parts = text_msg.split('|')
-                    if len(parts) >= 4:
-                        encrypted = parts[0] == '1'
-                        tr_id = parts[1]
-                        data_cnt = parts[2]
-                        payload = parts[3] # Verified data separated by ^
-
-                        if encrypted:
-                            # AES256 Decrypt (Skipped for now)
-                            pass
-                        
-                        if tr_id == "H0STCNI0": # Execution
-                            logger.info(f"KIS MSG ({tr_id}): {payload[:50]}...")
-                            await self.broadcast({"type": "EXECUTION", "data": "Refresh Required"})
-                            
-                        elif tr_id == "H0STCNT0": # Real-time Price
-                            # Payload format: MKSC_SHRN_ISCD^STCK_CNTG_HOUR^STCK_PRPR^... 
-                            # 0: Code, 1: Time, 2: Price, ...
-                            data_parts = payload.split('^')
-                            if len(data_parts) > 10:
-                                stock_code = data_parts[0]
-                                current_price = data_parts[2]
-                                price_change = data_parts[4] # prdy_vrss
-                                change_rate = data_parts[5] # prdy_ctrt
-                                
-                                await self.broadcast({
-                                    "type": "PRICE",
-                                    "code": stock_code,
-                                    "price": current_price,
-                                    "change": price_change,
-                                    "rate": change_rate
-                                })
-                        
-                else:
-                    # Json message (ping/pong or sub response)
-                    try:
-                        data = json.loads(text_msg)
-                        logger.info(f"KIS JSON: {data}")
-                    except:
-                        pass
-                        
-        except Exception as e:
-            logger.error(f"KIS Listen Error: {e}")
-            self.is_connected = False
+        else:
+            # Json message (ping/pong or sub response)
+            try:
+                data = json.loads(text_msg)
+            except ValueError:
+                return
+            logger.info(f"KIS JSON: {data}")
+            self._handle_ack(session, data)
+
+    async def _handle_fill_event(self, event: FillEvent):
+        """Typed H0STCNI0 notice: patch caches and push it to that account's clients only"""
+        account = self.account_subscriptions.get(event.hts_id)
+        holding = None
+        if event.is_fill:
+            logger.info(f"Fill {event.side} {event.ticker} {event.filled_qty}@{event.filled_price} (order {event.order_no}, {event.remaining_qty} left)")
+            if account is not None:
+                holding = BalanceSnapshotCache.apply_fill(account.id, event.ticker, event.side, event.filled_qty, event.filled_price, event.name)
+        # Patched holding row from the snapshot, so clients don't repeat the balance math
+        message = json.dumps({"type": "FILL", "data": event.to_dict(), "holding": holding})
+        execution_key = ("H0STCNI0", event.hts_id)
+        for client in list(self.clients.values()):
+            if client.execution_key == execution_key and not client.enqueue(message):
+                self._disconnect_slow(client)
+
+    def _handle_ack(self, session: KisSession, data: dict):
+        header = data.get("header", {})
+        body = data.get("body", {})
+        key = (header.get("tr_id"), header.get("tr_key"))
+        output = body.get("output") or {}
+        if body.get("msg_cd") == "OPSP0000" and output.get("key") and output.get("iv"):
+            # AES-256 key / iv for this session's encrypted frames of that TR
+            session.cipher_keys[key[0]] = (output["key"], output["iv"])
+        elif body.get("msg_cd") == "OPSP0011": # invalid approval
+            # Cached key no longer accepted: fetch a new one on reconnect (replays registrations)
+            self._approval_keys.pop(session.account_id, None)
+            session.reconnect()
+        elif body.get("msg_cd") == "OPSP0008": # MAX SUBSCRIBE OVER
+            # KIS cap is lower than assumed: shrink this session and re-route the key
+            session.registered.discard(key)
+            session.capacity = len(session.registered)
+            if self.routes.get(key) is session:
+                del self.routes[key]
+                if self.refcounts.get(key):
+                    if key[0] == "H0STCNI0":
+                        self._reroute_execution(session, key)
+                    else:
+                        asyncio.ensure_future(self._route(key))
+            if not session.registered and session in self.sessions:
+                # Nothing left to carry (capacity 0): drop it, the next route opens a fresh one
+                self.sessions.remove(session)
+                asyncio.ensure_future(session.close())
+
+    def _reroute_execution(self, session: KisSession, key: SubscriptionKey):
+        """Notices must stay on the owner's session: move one price key off it to make room"""
+        owner = self.account_subscriptions.get(key[1])
+        if owner is None:
+            self.rejected_subscriptions += 1
+            logger.error(f"Failed to subscribe {key[0]} {key[1]}: owner account unknown")
+            return
+        moved = next((k for k in session.registered if k[0] == "H0STCNT0"), None)
+        if moved is not None:
+            session.registered.discard(moved) # Before any await: keeps the slot for the notice key
+            if self.routes.get(moved) is session:
+                del self.routes[moved]
+            asyncio.ensure_future(session.unregister(moved))
+            asyncio.ensure_future(self._route(moved))
+        asyncio.ensure_future(self._route(key, owner))
 
     # Frontend Connection Manager
     async def connect_client(self, websocket):
         await websocket.accept()
-        self.active_connections.append(websocket)
+        client = ClientConnection(websocket, settings.WS_CLIENT_QUEUE_SIZE, settings.WS_CLIENT_OVERFLOW_POLICY)
+        self.clients[websocket] = client
+        client.start(self.disconnect_client)
 
     def disconnect_client(self, websocket):
-        self.active_connections.remove(websocket)
+        client = self.clients.pop(websocket, None)
+        if client is not None:
+            self._unindex(client, list(client.codes))
+            if client.execution_key is not None:
+                self.release(*client.execution_key)
+                if client.execution_key not in self.refcounts:
+                    self.account_subscriptions.pop(client.execution_key[1], None)
+            self.dropped_messages += client.dropped
+            client.close()
+
+    async def subscribe_client(self, websocket, codes: Iterable[str]) -> List[str]:
+        """
+        Register price codes for one client. Each client holds one reference per
+        code, so KIS sees a code only once however many tabs watch it.
+        Returns the client's full code list.
+        """
+        client = self.clients.get(websocket)
+        if client is None:
+            return []
+        for code in codes:
+            # CASH is a virtual ticker
+            if not code or code == "CASH" or code in client.codes:
+                continue
+            client.codes.add(code)
+            self.code_subscribers.setdefault(code, set()).add(client)
+            await self.subscribe_stock_price(code)
+        return sorted(client.codes)
+
+    def unsubscribe_client(self, websocket, codes: Iterable[str] = None) -> List[str]:
+        """Drop price codes (all when codes is None). Returns the remaining codes."""
+        client = self.clients.get(websocket)
+        if client is None:
+            return []
+        self._unindex(client, list(client.codes) if codes is None else [c for c in codes if c in client.codes])
+        return sorted(client.codes)
+
+    def _unindex(self, client: ClientConnection, codes: List[str]):
+        for code in codes:
+            client.codes.discard(code)
+            subscribers = self.code_subscribers.get(code)
+            if subscribers is not None and client in subscribers:
+                subscribers.discard(client)
+                if not subscribers:
+                    del self.code_subscribers[code]
+                self.unsubscribe_stock_price(code)
+
+    def _disconnect_slow(self, client: ClientConnection):
+        logger.warning(f"Disconnecting slow client (queue full, {client.dropped} dropped)")
+        self.slow_disconnects += 1
+        self.disconnect_client(client.websocket)
+        asyncio.create_task(self._close_quietly(client.websocket, code=1013)) # Try Again Later
+
+    @staticmethod
+    async def _close_quietly(websocket, code: int):
+        try:
+            await websocket.close(code=code)
+        except Exception:
+            pass
+
+    def send(self, websocket, message: dict):
+        """Queue a message for one client (never blocks)"""
+        self.send_text(websocket, json.dumps(message))
+
+    def send_text(self, websocket, text: str):
+        client = self.clients.get(websocket)
+        if client is not None and not client.enqueue(text):
+            self._disconnect_slow(client)
+
+    async def publish_price(self, code: str, message: dict):
+        """Deliver a tick only to the clients watching this code"""
+        subscribers = self.code_subscribers.get(code)
+        if not subscribers:
+            return
+        text = json.dumps(message)
+        for client in list(subscribers):
+            if not client.enqueue(text):
+                self._disconnect_slow(client)
 
     async def broadcast(self, message: dict):
-        for connection in self.active_connections:
-            try:
-                await connection.send_json(message)
-            except:
-                pass
+        # Serialize once, enqueue per client; never awaits a client socket
+        text = json.dumps(message)
+        for client in list(self.clients.values()):
+            if not client.enqueue(text):
+                self._disconnect_slow(client)
+
+    def stats(self) -> Dict[str, Any]:
+        clients = [client.stats() for client in self.clients.values()]
+        return {
+            "kis_connected": self.is_connected,
+            "kis_sessions": [session.stats() for session in self.sessions],
+            "kis_subscriptions": len(self.refcounts),
+            "kis_rejected_subscriptions": self.rejected_subscriptions,
+            "approval_key_fetches": self.approval_key_fetches,
+            "clients": len(clients),
+            "watched_codes": len(self.code_subscribers),
+            "overflow_policy": settings.WS_CLIENT_OVERFLOW_POLICY,
+            "queue_depth_total": sum(c["queue_depth"] for c in clients),
+            "queue_depth_max": max((c["queue_depth"] for c in clients), default=0),
+            "dropped_messages": self.dropped_messages + sum(c["dropped"] for c in clients),
+            "slow_disconnects": self.slow_disconnects
+        }
 
 manager = WebSocketManager()
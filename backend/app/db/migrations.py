@@ -0,0 +1,29 @@
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import sessionmaker
+
+def ensure_account_cano_hash(engine: Engine):
+    """
+    Add accounts.cano_hash to databases created before the blind index existed
+    (create_all never alters existing tables) and backfill rows missing it.
+    """
+    from backend.app.models import Account
+    from backend.app.core.security import decrypt_data, blind_index
+
+    columns = {column["name"] for column in inspect(engine).get_columns("accounts")}
+    if "cano_hash" not in columns:
+        with engine.begin() as conn:
+            conn.execute(text("ALTER TABLE accounts ADD COLUMN cano_hash VARCHAR"))
+            conn.execute(text("CREATE INDEX IF NOT EXISTS ix_accounts_cano_hash ON accounts (cano_hash)"))
+        print("[DB] Added accounts.cano_hash column.")
+
+    db = sessionmaker(bind=engine)()
+    try:
+        rows = db.query(Account).filter(Account.cano_hash.is_(None), Account.cano.isnot(None)).all()
+        for account in rows:
+            account.cano_hash = blind_index(decrypt_data(account.cano))
+        if rows:
+            db.commit()
+            print(f"[DB] Backfilled cano_hash for {len(rows)} account(s).")
+    finally:
+        db.close()
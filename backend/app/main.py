@@ -1,6 +1,9 @@
-from fastapi import FastAPI
+import time
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 from backend.app.core.config import settings
+from backend.app.core.metrics import REGISTRY, HTTP_REQUEST_DURATION, HTTP_REQUESTS_IN_FLIGHT
 
 app = FastAPI(
     title="Family Asset Manager (FAM) Backend",
@@ -17,6 +20,26 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    """Per-route latency (route template, not raw path, to keep label cardinality bounded)"""
+    HTTP_REQUESTS_IN_FLIGHT.inc()
+    started = time.perf_counter()
+    status = "500"
+    try:
+        response = await call_next(request)
+        status = str(response.status_code)
+        return response
+    finally:
+        HTTP_REQUESTS_IN_FLIGHT.dec()
+        route = request.scope.get("route")
+        HTTP_REQUEST_DURATION.observe(
+            time.perf_counter() - started,
+            method=request.method,
+            route=getattr(route, "path", "unmatched"),
+            status=status
+        )
+
 @app.on_event("startup")
 def on_startup():
     from backend.app.db.base import Base
@@ -28,10 +51,31 @@ def on_startup():
     print(f"[Debug] User Columns: {User.__table__.columns.keys()}")
     Base.metadata.create_all(bind=engine)
     print("[DB] Tables created (if not exist).")
+
+    # Blind index for encrypted account numbers (older DBs lack the column)
+    from backend.app.db.migrations import ensure_account_cano_hash
+    ensure_account_cano_hash(engine)
     
     # Start Scheduler
     start_scheduler()
 
+    # Slave node: receive tokens pushed by the master instead of fetching on demand
+    from backend.app.core.token_sync import TokenSubscriber
+    TokenSubscriber.start()
+
+@app.on_event("shutdown")
+async def on_shutdown():
+    from backend.app.core.http_transport import HttpTransport
+    from backend.app.core.async_kis_client import AsyncKisClient
+    from backend.app.core.io_executor import IoExecutor
+    from backend.app.core.token_sync import TokenSubscriber
+
+    # Release pooled KIS connections and workers
+    HttpTransport.close()
+    await AsyncKisClient.aclose()
+    IoExecutor.shutdown()
+    TokenSubscriber.stop()
+
 from backend.app.api.api import api_router
 app.include_router(api_router, prefix="/v1")
 
@@ -42,6 +86,11 @@ def root():
         "docs": "/docs"
     }
 
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    """Prometheus text exposition (KIS TR latency, rate limiter waits, route latency)"""
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
 @app.get("/health")
 def health_check():
     return {"status": "ok"}
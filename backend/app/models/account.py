@@ -1,6 +1,7 @@
 from sqlalchemy import Column, Integer, String, DateTime, ForeignKey
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, validates
 from backend.app.db.base import Base
+from backend.app.core.security import decrypt_data, blind_index
 
 class Account(Base):
     __tablename__ = "accounts"
@@ -13,6 +14,7 @@ class Account(Base):
     
     # Encrypted Fields
     cano = Column(String, unique=True, index=True) # Encrypted Account No (Front 8)
+    cano_hash = Column(String, index=True, nullable=True) # HMAC blind index of the plaintext cano (lookups)
     acnt_prdt_cd = Column(String, index=True) # Account Product Code (Back 2)
     app_key = Column(String) # Encrypted
     app_secret = Column(String) # Encrypted
@@ -28,3 +30,9 @@ class Account(Base):
     trade_logs = relationship("TradeLog", back_populates="account", cascade="all, delete-orphan")
     target_portfolios = relationship("TargetPortfolio", back_populates="account", cascade="all, delete-orphan")
     scheduled_orders = relationship("ScheduledOrder", back_populates="account", cascade="all, delete-orphan")
+
+    @validates("cano")
+    def _set_cano_hash(self, key, value):
+        # Keep the blind index in step with every cano write (value is the ciphertext)
+        self.cano_hash = blind_index(decrypt_data(value)) if value else None
+        return value
@@ -31,82 +31,34 @@ class SheetSyncService:
             logger.error("[SheetSync] No accounts found.")
             return
             
-        # 1. Aggregate Holdings
-        all_holdings = []
+        # 1. Aggregate Holdings (paged per account; only one account is buffered at a time)
+        # Key: Stock Code
+        agg_map = {}
         total_asset_sum = 0.0
         
         for account in accounts:
             logger.info(f"[SheetSync] Fetching data for Account: {account.alias}")
             try:
-                balance_data = KisClient.get_balance(account, db)
-                holdings = balance_data.get("output1", [])
-                summary = balance_data.get("output2", [])[0]
-                
-                all_holdings.extend(holdings)
-                total_asset_sum += float(summary.get("tot_evlu_amt", "0"))
-                
+                holdings = []
+                summary = None
+                for page in KisClient.iter_balance_pages(account, db):
+                    holdings.extend(page.get("output1", []))
+                    if page.get("output2"):
+                        summary = page["output2"][0]
             except Exception as e:
+                # A failed page drops the whole account (no partial holdings without its total asset)
                 logger.error(f"[SheetSync] Failed to fetch data for {account.alias}: {e}")
+                continue
+
+            for h in holdings:
+                SheetSyncService._accumulate_holding(agg_map, h)
+            if summary:
+                total_asset_sum += float(summary.get("tot_evlu_amt", "0"))
         
-        if not all_holdings:
+        if not agg_map:
             logger.warning("[SheetSync] No holdings found.")
             return
 
-        # Aggregation Map
-        # Key: Stock Code
-        agg_map = {}
-        
-        for h in all_holdings:
-            code = h["pdno"]
-            
-            # Normalize Code (remove A prefix if KIS returns it, usually KIS returns numbers)
-            # But we want to WRITE clean codes.
-            
-            name = h.get("prdt_name", "")
-            qty = int(h.get("hldg_qty", 0))
-            if qty == 0: continue
-            
-            # Prices
-            current_price = float(h.get("prpr", 0))
-            # The user wants "등락" to be the rate (%), not amount.
-            # KIS 'prdy_ctrt' is "Previous Day Compare Rate" (e.g. "1.5" for 1.5%)
-            day_diff_rate = float(h.get("prdy_ctrt", 0)) 
-            
-            # Amounts (Per account)
-            # pchs_amt = Purchase Amount
-            buy_amt = float(h.get("pchs_amt", 0)) 
-            if buy_amt == 0: # Fallback
-                buy_amt = float(h.get("pchs_avg_pric", 0)) * qty
-                
-            eval_amt = float(h.get("evlu_amt", 0))
-            eval_pl = float(h.get("evlu_pfls_amt", 0))
-            
-            if code not in agg_map:
-                agg_map[code] = {
-                    "code": code,
-                    "name": name,
-                    "qty": 0,
-                    "buy_amt": 0.0,
-                    "eval_amt": 0.0,
-                    "eval_pl": 0.0,
-                    "cur_price": current_price,
-                    "day_diff_rate": day_diff_rate
-                }
-            
-            agg = agg_map[code]
-            agg["qty"] += qty
-            agg["buy_amt"] += buy_amt
-            agg["eval_amt"] += eval_amt
-            agg["eval_pl"] += eval_pl
-            
-            # Keep latest price (should be adequate)
-            if current_price > 0:
-                agg["cur_price"] = current_price
-                agg["day_diff_rate"] = day_diff_rate
-                # Update Name if missing
-                if not agg["name"] and name:
-                    agg["name"] = name
-
         # 2. Prepare Rows
         # Header: 종목코드, 종목명, 수량, 평균단가, 현재가, 전일가, 등락률, 매입금액, 평가금액, 평가손익, 수익률, 자산비중
         headers = ["종목코드", "종목명", "수량", "평균단가", "현재가", "전일가", "등락률", "매입금액", "평가금액", "평가손익", "수익률", "자산비중"]
@@ -169,3 +121,56 @@ class SheetSyncService:
             logger.info(f"[SheetSync] Dashboard Updated: {len(final_rows)-1} stocks.")
         except Exception as e:
             logger.error(f"[SheetSync] Failed to write to sheet: {e}")
+
+    @staticmethod
+    def _accumulate_holding(agg_map: dict, h: dict):
+        """Fold one KIS holding row into the per-stock aggregation map"""
+        code = h["pdno"]
+        
+        # Normalize Code (remove A prefix if KIS returns it, usually KIS returns numbers)
+        # But we want to WRITE clean codes.
+        
+        name = h.get("prdt_name", "")
+        qty = int(h.get("hldg_qty", 0))
+        if qty == 0: return
+        
+        # Prices
+        current_price = float(h.get("prpr", 0))
+        # The user wants "등락" to be the rate (%), not amount.
+        # KIS 'prdy_ctrt' is "Previous Day Compare Rate" (e.g. "1.5" for 1.5%)
+        day_diff_rate = float(h.get("prdy_ctrt", 0)) 
+        
+        # Amounts (Per account)
+        # pchs_amt = Purchase Amount
+        buy_amt = float(h.get("pchs_amt", 0)) 
+        if buy_amt == 0: # Fallback
+            buy_amt = float(h.get("pchs_avg_pric", 0)) * qty
+            
+        eval_amt = float(h.get("evlu_amt", 0))
+        eval_pl = float(h.get("evlu_pfls_amt", 0))
+        
+        if code not in agg_map:
+            agg_map[code] = {
+                "code": code,
+                "name": name,
+                "qty": 0,
+                "buy_amt": 0.0,
+                "eval_amt": 0.0,
+                "eval_pl": 0.0,
+                "cur_price": current_price,
+                "day_diff_rate": day_diff_rate
+            }
+        
+        agg = agg_map[code]
+        agg["qty"] += qty
+        agg["buy_amt"] += buy_amt
+        agg["eval_amt"] += eval_amt
+        agg["eval_pl"] += eval_pl
+        
+        # Keep latest price (should be adequate)
+        if current_price > 0:
+            agg["cur_price"] = current_price
+            agg["day_diff_rate"] = day_diff_rate
+            # Update Name if missing
+            if not agg["name"] and name:
+                agg["name"] = name
@@ -0,0 +1,6 @@
+"""
+Local stand-in for the KIS OpenAPI (REST + WebSocket) for offline tests and benchmarks.
+Point the app at it with KIS_BASE_URL / KIS_WS_URL (see docs/fake_kis.md).
+"""
+from backend.fake_kis.state import FakeKisConfig, FakeKisState
+from backend.fake_kis.server import FakeKisServer, create_app
@@ -0,0 +1,36 @@
+import argparse
+import uvicorn
+from backend.fake_kis.server import create_app
+from backend.fake_kis.state import FakeKisConfig
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake KIS OpenAPI server (REST + WebSocket)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9443)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Added REST latency")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="Uniform extra latency")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Probability of HTTP 500")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="Probability of EGW00201")
+    parser.add_argument("--rate-limit", type=float, default=0.0, help="TR/sec per appkey (0 = off)")
+    parser.add_argument("--holdings", type=int, default=20, help="Holdings per account")
+    parser.add_argument("--page-size", type=int, default=50, help="inquire-balance rows per page")
+    parser.add_argument("--tick-interval", type=float, default=1.0, help="H0STCNT0 push interval (s)")
+    parser.add_argument("--no-fill", action="store_true", help="Keep orders unfilled")
+    args = parser.parse_args()
+
+    config = FakeKisConfig(
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate,
+        throttle_rate=args.throttle_rate,
+        rate_limit_per_sec=args.rate_limit,
+        holdings=args.holdings,
+        page_size=args.page_size,
+        tick_interval=args.tick_interval,
+        fill_orders=not args.no_fill
+    )
+    print(f"[FakeKIS] Listening on http://{args.host}:{args.port} (ws://{args.host}:{args.port})")
+    uvicorn.run(create_app(config), host=args.host, port=args.port, log_level="warning")
+
+if __name__ == "__main__":
+    main()
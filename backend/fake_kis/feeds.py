@@ -0,0 +1,80 @@
+import base64
+import os
+from datetime import datetime
+from typing import List
+from cryptography.hazmat.primitives import padding
+from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+from backend.app.core.kis_realtime import H0STCNI0_FIELDS, H0STCNT0_FIELDS # Same tables the decoder uses
+from backend.fake_kis.state import FakeKisState, FakeOrder
+
+def new_cipher_material() -> tuple:
+    """(key, iv) strings as returned in the KIS subscribe response (32 / 16 chars)"""
+    return os.urandom(16).hex(), os.urandom(8).hex()
+
+def encrypt_payload(key: str, iv: str, plaintext: str) -> str:
+    padder = padding.PKCS7(128).padder()
+    data = padder.update(plaintext.encode("utf-8")) + padder.finalize()
+    encryptor = Cipher(algorithms.AES(key.encode("utf-8")), modes.CBC(iv.encode("utf-8"))).encryptor()
+    return base64.b64encode(encryptor.update(data) + encryptor.finalize()).decode("ascii")
+
+def price_record(state: FakeKisState, code: str) -> str:
+    quote = state.quote(code)
+    now = datetime.now()
+    price = int(quote["stck_prpr"])
+    values = {name: "0" for name in H0STCNT0_FIELDS}
+    values.update({
+        "MKSC_SHRN_ISCD": code,
+        "STCK_CNTG_HOUR": now.strftime("%H%M%S"),
+        "STCK_PRPR": quote["stck_prpr"],
+        "PRDY_VRSS_SIGN": quote["prdy_vrss_sign"],
+        "PRDY_VRSS": quote["prdy_vrss"],
+        "PRDY_CTRT": quote["prdy_ctrt"],
+        "WGHN_AVRG_STCK_PRC": quote["stck_prpr"],
+        "STCK_OPRC": quote["stck_oprc"],
+        "STCK_HGPR": quote["stck_hgpr"],
+        "STCK_LWPR": quote["stck_lwpr"],
+        "ASKP1": str(price + 10),
+        "BIDP1": str(price),
+        "CNTG_VOL": "1",
+        "ACML_VOL": quote["acml_vol"],
+        "ACML_TR_PBMN": str(price * int(quote["acml_vol"])),
+        "CCLD_DVSN": "1",
+        "BSOP_DATE": now.strftime("%Y%m%d"),
+        "NEW_MKOP_CLS_CODE": "20",
+        "TRHT_YN": "N",
+        "HOUR_CLS_CODE": "0",
+        "MRKT_TRTM_CLS_CODE": "0"
+    })
+    return "^".join(values[name] for name in H0STCNT0_FIELDS)
+
+def price_frame(state: FakeKisState, codes: List[str]) -> str:
+    """One H0STCNT0 frame carrying a record per code (multi-record frames like KIS)"""
+    return f"0|H0STCNT0|{len(codes):03d}|" + "^".join(price_record(state, code) for code in codes)
+
+def execution_record(order: FakeOrder, filled: bool) -> str:
+    values = {
+        "CUST_ID": order.hts_id,
+        "ACNT_NO": f"{order.cano}01",
+        "ODER_NO": order.odno,
+        "OODER_NO": "",
+        "SELN_BYOV_CLS": order.side,
+        "RCTF_CLS": "0",
+        "ODER_KIND": "00",
+        "ODER_COND": "0",
+        "STCK_SHRN_ISCD": order.pdno,
+        "CNTG_QTY": str(order.filled_qty if filled else 0),
+        "CNTG_UNPR": str(order.price if filled else 0),
+        "STCK_CNTG_HOUR": datetime.now().strftime("%H%M%S"),
+        "RFUS_YN": "0",
+        "CNTG_YN": "2" if filled else "1", # 2: 체결, 1: 접수/정정/취소
+        "ACPT_YN": "2",
+        "BRNC_NO": "00950",
+        "ODER_QTY": str(order.qty),
+        "ACNT_NAME": "FAKE",
+        "CNTG_ISNM": f"종목{order.pdno}",
+        "CRDT_CLS": "10",
+        "CRDT_LOAN_DATE": "",
+        "CNTG_ISNM40": f"종목{order.pdno}",
+        "ODER_PRC": str(order.price)
+    }
+    return "^".join(values[name] for name in H0STCNI0_FIELDS)
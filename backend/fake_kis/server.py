@@ -0,0 +1,439 @@
+import asyncio
+import hashlib
+import json
+import random
+import socket
+import threading
+import time
+from dataclasses import asdict
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional, Set, Tuple
+import uvicorn
+from fastapi import FastAPI, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import JSONResponse
+from backend.fake_kis.state import FakeKisConfig, FakeKisState, FakeOrder
+from backend.fake_kis import feeds
+
+STOCK_API = "/uapi/domestic-stock/v1"
+
+def _kis_error(status_code: int, msg_cd: str, msg1: str) -> JSONResponse:
+    return JSONResponse(status_code=status_code, content={"rt_cd": "1", "msg_cd": msg_cd, "msg1": msg1})
+
+def _kis_ok(body: Dict[str, Any], msg_cd: str = "KIOK0000", msg1: str = "정상처리 되었습니다.", headers: Dict[str, str] = None) -> JSONResponse:
+    return JSONResponse(content={"rt_cd": "0", "msg_cd": msg_cd, "msg1": msg1, **body}, headers=headers)
+
+class FakeWsSession:
+    """One client WebSocket session (KIS allows up to ws_max_subscriptions registrations each)"""
+    def __init__(self, websocket: WebSocket):
+        self.websocket = websocket
+        self.subscriptions: Set[Tuple[str, str]] = set() # (tr_id, tr_key)
+        self.key, self.iv = feeds.new_cipher_material()
+        self.outbox: "asyncio.Queue[str]" = asyncio.Queue()
+
+    def codes(self, tr_id: str):
+        return sorted(key for tr, key in self.subscriptions if tr == tr_id)
+
+def create_app(config: FakeKisConfig = None) -> FastAPI:
+    """
+    Build the fake KIS OpenAPI app.
+    REST: tokenP, Approval, hashkey, inquire-balance (tr_cont paging), inquire-price,
+          intstock-multprice, order-cash, order-rvsecncl, inquire-daily-ccld, inquire-psbl-rvsecncl
+    WebSocket: /tryitout/{path} with H0STCNT0 ticks, encrypted H0STCNI0 notices and PINGPONG
+    Admin: /__admin/stats, /__admin/reset, /__admin/config, /__admin/tokens/expire, /__admin/ws/drop
+    """
+    state = FakeKisState(config or FakeKisConfig())
+    sessions: Set[FakeWsSession] = set()
+    app = FastAPI(title="Fake KIS OpenAPI")
+    app.state.kis = state
+
+    async def gate(request: Request, tr_id: str, appkey: str = None, auth: bool = True) -> Optional[JSONResponse]:
+        """Latency, error injection, rate limit and token check shared by every REST TR"""
+        cfg = state.config
+        delay = cfg.latency_ms + random.uniform(0, cfg.jitter_ms)
+        if delay > 0:
+            await asyncio.sleep(delay / 1000.0)
+
+        if cfg.error_rate and random.random() < cfg.error_rate:
+            state.count(tr_id, "HTTP500")
+            # Gateway-level failure: no KIS msg_cd in the body
+            return JSONResponse(status_code=500, content={"error": "Internal Server Error (injected)"})
+        appkey = appkey if appkey is not None else request.headers.get("appkey", "")
+        if (cfg.throttle_rate and random.random() < cfg.throttle_rate) or not state.allow(appkey):
+            state.count(tr_id, "EGW00201")
+            return _kis_error(500, "EGW00201", "초당 거래건수를 초과하였습니다.")
+        if auth and not state.token_valid(request.headers.get("authorization")):
+            state.count(tr_id, "EGW00123")
+            return _kis_error(500, "EGW00123", "기간이 만료된 token 입니다.")
+        state.count(tr_id)
+        return None
+
+    def push_execution(order: FakeOrder, filled: bool):
+        """Queue an encrypted H0STCNI0 notice on the sessions subscribed to the order owner's HTS ID"""
+        record = feeds.execution_record(order, filled)
+        for session in list(sessions):
+            if order.hts_id in session.codes("H0STCNI0"):
+                session.outbox.put_nowait(f"1|H0STCNI0|001|{feeds.encrypt_payload(session.key, session.iv, record)}")
+
+    # --- OAuth ---
+    @app.post("/oauth2/tokenP")
+    async def token_p(request: Request):
+        body = await request.json()
+        appkey = body.get("appkey", "")
+        rejected = await gate(request, "tokenP", appkey=appkey, auth=False)
+        if rejected:
+            return rejected
+        if not appkey or not body.get("appsecret"):
+            return JSONResponse(status_code=403, content={"error_code": "EGW00103", "error_description": "유효하지 않은 AppKey입니다."})
+        token = state.issue_token(appkey)
+        if token is None:
+            state.count("tokenP", "EGW00133")
+            return JSONResponse(status_code=403, content={"error_code": "EGW00133", "error_description": "접근토큰 발급 잠시 후 다시 시도하세요(1분당 1회)"})
+        expires = datetime.now() + timedelta(seconds=state.config.token_ttl)
+        return {
+            "access_token": token,
+            "access_token_token_expired": expires.strftime("%Y-%m-%d %H:%M:%S"),
+            "token_type": "Bearer",
+            "expires_in": state.config.token_ttl
+        }
+
+    @app.post("/oauth2/Approval")
+    async def approval(request: Request):
+        body = await request.json()
+        rejected = await gate(request, "Approval", appkey=body.get("appkey", ""), auth=False)
+        if rejected:
+            return rejected
+        return {"approval_key": state.issue_approval_key()}
+
+    @app.post("/uapi/hashkey")
+    async def hashkey(request: Request):
+        body = await request.json()
+        rejected = await gate(request, "hashkey", auth=False)
+        if rejected:
+            return rejected
+        digest = hashlib.sha256(json.dumps(body, sort_keys=True).encode("utf-8")).hexdigest()
+        return {"BODY": body, "HASH": digest}
+
+    # --- Inquiry ---
+    @app.get(f"{STOCK_API}/trading/inquire-balance")
+    async def inquire_balance(request: Request):
+        rejected = await gate(request, "TTTC8434R")
+        if rejected:
+            return rejected
+        params = request.query_params
+        cano = params.get("CANO", "")
+        rows = state.balance_rows(cano)
+
+        offset = 0
+        if request.headers.get("tr_cont") == "N":
+            try:
+                offset = int(params.get("CTX_AREA_NK100") or 0)
+            except ValueError:
+                return _kis_error(200, "OPSQ2001", "CTX_AREA_NK100 값이 올바르지 않습니다.")
+        page = rows[offset:offset + state.config.page_size]
+        next_offset = offset + len(page)
+        has_more = next_offset < len(rows)
+
+        return _kis_ok({
+            "ctx_area_fk100": f"{cano}^01^" if has_more else "",
+            "ctx_area_nk100": str(next_offset) if has_more else "",
+            "output1": page,
+            "output2": [state.balance_summary(cano, rows)]
+        }, msg_cd="KIOK0510", msg1="조회가 완료되었습니다", headers={"tr_cont": "M" if has_more else "D"})
+
+    @app.get(f"{STOCK_API}/quotations/inquire-price")
+    async def inquire_price(request: Request):
+        rejected = await gate(request, "FHKST01010100")
+        if rejected:
+            return rejected
+        ticker = request.query_params.get("FID_INPUT_ISCD", "")
+        if not ticker:
+            return _kis_error(200, "OPSQ2002", "FID_INPUT_ISCD 값이 없습니다.")
+        return _kis_ok({"output": state.quote(ticker)}, msg_cd="MCA00000")
+
+    @app.get(f"{STOCK_API}/quotations/intstock-multprice")
+    async def intstock_multprice(request: Request):
+        rejected = await gate(request, "FHKST11300006")
+        if rejected:
+            return rejected
+        params = request.query_params
+        tickers = [params[k] for k in sorted(params, key=lambda k: int(k.rsplit("_", 1)[-1])) if k.startswith("FID_INPUT_ISCD_")]
+        if len(tickers) > 30:
+            return _kis_error(200, "OPSQ2003", "최대 30종목까지 조회 가능합니다.")
+        rows = []
+        for ticker in tickers:
+            quote = state.quote(ticker)
+            rows.append({
+                "inter_shrn_iscd": ticker,
+                "inter_kor_isnm": quote["hts_kor_isnm"],
+                "inter2_prpr": quote["stck_prpr"],
+                "inter2_prdy_vrss": quote["prdy_vrss"],
+                "prdy_vrss_sign": quote["prdy_vrss_sign"],
+                "prdy_ctrt": quote["prdy_ctrt"],
+                "acml_vol": quote["acml_vol"],
+                "inter2_oprc": quote["stck_oprc"],
+                "inter2_hgpr": quote["stck_hgpr"],
+                "inter2_lwpr": quote["stck_lwpr"]
+            })
+        return _kis_ok({"output": rows}, msg_cd="MCA00000")
+
+    @app.get(f"{STOCK_API}/trading/inquire-psbl-rvsecncl")
+    async def inquire_psbl_rvsecncl(request: Request):
+        rejected = await gate(request, "TTTC0084R")
+        if rejected:
+            return rejected
+        cano = request.query_params.get("CANO", "")
+        with state.lock:
+            open_orders = [o for o in state.orders if o.cano == cano and o.remaining > 0]
+        return _kis_ok({
+            "ctx_area_fk100": "",
+            "ctx_area_nk100": "",
+            "output": [{
+                "ord_gno_brno": "00950",
+                "odno": o.odno,
+                "orgn_odno": "",
+                "pdno": o.pdno,
+                "prdt_name": f"종목{o.pdno}",
+                "ord_qty": str(o.qty),
+                "ord_unpr": str(o.price),
+                "ord_tmd": o.ord_tmd,
+                "tot_ccld_qty": str(o.filled_qty),
+                "psbl_qty": str(o.remaining),
+                "sll_buy_dvsn_cd": o.side,
+                "ord_dvsn_cd": "00"
+            } for o in open_orders]
+        })
+
+    @app.get(f"{STOCK_API}/trading/inquire-daily-ccld")
+    async def inquire_daily_ccld(request: Request):
+        rejected = await gate(request, "TTTC8001R")
+        if rejected:
+            return rejected
+        cano = request.query_params.get("CANO", "")
+        today = datetime.now().strftime("%Y%m%d")
+        with state.lock:
+            executed = [o for o in reversed(state.orders) if o.cano == cano and o.filled_qty > 0]
+        return _kis_ok({
+            "ctx_area_fk100": "",
+            "ctx_area_nk100": "",
+            "output1": [{
+                "ord_dt": today,
+                "odno": o.odno,
+                "sll_buy_dvsn_cd": o.side,
+                "sll_buy_dvsn_cd_name": "매수" if o.side == "02" else "매도",
+                "pdno": o.pdno,
+                "prdt_name": f"종목{o.pdno}",
+                "ord_qty": str(o.qty),
+                "ord_unpr": str(o.price),
+                "ord_tmd": o.ord_tmd,
+                "tot_ccld_qty": str(o.filled_qty),
+                "avg_prvs": str(o.price),
+                "tot_ccld_amt": str(o.filled_qty * o.price),
+                "rmn_qty": str(o.remaining),
+                "cncl_yn": "Y" if o.cancelled else "N"
+            } for o in executed],
+            "output2": {
+                "tot_ord_qty": str(sum(o.qty for o in executed)),
+                "tot_ccld_qty": str(sum(o.filled_qty for o in executed)),
+                "tot_ccld_amt": str(sum(o.filled_qty * o.price for o in executed))
+            }
+        })
+
+    # --- Orders ---
+    @app.post(f"{STOCK_API}/trading/order-cash")
+    async def order_cash(request: Request):
+        tr_id = request.headers.get("tr_id", "")
+        rejected = await gate(request, tr_id or "order-cash")
+        if rejected:
+            return rejected
+        body = await request.json()
+        side = "02" if tr_id == "TTTC0802U" else "01"
+        cano, pdno = body.get("CANO", ""), body.get("PDNO", "")
+        qty = int(body.get("ORD_QTY") or 0)
+        price = int(body.get("ORD_UNPR") or 0) or state.price(pdno)
+        if qty <= 0:
+            return _kis_error(200, "APBK0919", "주문수량을 확인하세요.")
+
+        acc = state.account(cano)
+        if side == "02" and qty * price > acc["cash"]:
+            return _kis_error(200, "APBK0952", "주문가능금액을 초과 했습니다")
+        if side == "01" and qty > acc["holdings"].get(pdno, {}).get("qty", 0):
+            return _kis_error(200, "APBK0400", "주문 가능한 수량을 초과하였습니다.")
+
+        order = state.place_order(cano, pdno, side, qty, price)
+        push_execution(order, filled=False)
+        if order.filled_qty:
+            push_execution(order, filled=True)
+        return _kis_ok({
+            "output": {"KRX_FWDG_ORD_ORGNO": "00950", "ODNO": order.odno, "ORD_TMD": order.ord_tmd}
+        }, msg_cd="APBK0013", msg1="주문 전송 완료 되었습니다.")
+
+    @app.post(f"{STOCK_API}/trading/order-rvsecncl")
+    async def order_rvsecncl(request: Request):
+        rejected = await gate(request, "TTTC0803U")
+        if rejected:
+            return rejected
+        body = await request.json()
+        cano = body.get("CANO", "")
+        original = state.find_order(cano, body.get("ORGN_ODNO", ""))
+        if original is None or original.remaining <= 0:
+            return _kis_error(200, "APBK1010", "정정/취소할 수량이 없습니다.")
+
+        remaining = original.remaining
+        original.cancelled = True
+        if body.get("RVSE_CNCL_DVSN_CD") == "02": # Cancel
+            order = original
+            push_execution(order, filled=False)
+        else: # Revise: remaining quantity moves to a new order number
+            qty = remaining if body.get("QTY_ALL_ORD_YN") == "Y" else int(body.get("ORD_QTY") or remaining)
+            order = state.place_order(cano, original.pdno, original.side, qty, int(body.get("ORD_UNPR") or 0))
+            push_execution(order, filled=False)
+            if order.filled_qty:
+                push_execution(order, filled=True)
+        return _kis_ok({
+            "output": {"KRX_FWDG_ORD_ORGNO": "00950", "ODNO": order.odno, "ORD_TMD": datetime.now().strftime("%H%M%S")}
+        }, msg_cd="APBK0013", msg1="주문 전송 완료 되었습니다.")
+
+    # --- WebSocket ---
+    @app.websocket("/tryitout/{path:path}")
+    async def realtime(websocket: WebSocket, path: str):
+        await websocket.accept()
+        session = FakeWsSession(websocket)
+        sessions.add(session)
+
+        async def ticker():
+            while True:
+                await asyncio.sleep(state.config.tick_interval)
+                codes = session.codes("H0STCNT0")
+                if codes:
+                    session.outbox.put_nowait(feeds.price_frame(state, codes))
+
+        async def pinger():
+            while state.config.pingpong_interval > 0:
+                await asyncio.sleep(state.config.pingpong_interval)
+                session.outbox.put_nowait(json.dumps({"header": {"tr_id": "PINGPONG", "datetime": datetime.now().strftime("%Y%m%d%H%M%S")}}))
+
+        async def sender():
+            while True:
+                await websocket.send_text(await session.outbox.get())
+
+        tasks = [asyncio.create_task(t()) for t in (ticker, pinger, sender)]
+        try:
+            while True:
+                message = json.loads(await websocket.receive_text())
+                header = message.get("header", {})
+                if header.get("tr_id") == "PINGPONG":
+                    state.count("PINGPONG")
+                    continue
+                session.outbox.put_nowait(json.dumps(handle_subscription(session, header, message.get("body", {}).get("input", {}))))
+        except (WebSocketDisconnect, json.JSONDecodeError, RuntimeError):
+            pass
+        finally:
+            for task in tasks:
+                task.cancel()
+            sessions.discard(session)
+
+    def handle_subscription(session: FakeWsSession, header: Dict[str, Any], body: Dict[str, Any]) -> Dict[str, Any]:
+        tr_id, tr_key = body.get("tr_id", ""), body.get("tr_key", "")
+        state.count(f"WS:{tr_id}")
+        reply_header = {"tr_id": tr_id, "tr_key": tr_key, "encrypt": "N"}
+
+        def reply(rt_cd: str, msg_cd: str, msg1: str, output: Dict[str, str] = None):
+            body = {"rt_cd": rt_cd, "msg_cd": msg_cd, "msg1": msg1}
+            if output:
+                body["output"] = output
+            return {"header": reply_header, "body": body}
+
+        if header.get("approval_key") not in state.approval_keys:
+            return reply("1", "OPSP0011", "invalid approval : NOT FOUND")
+        if header.get("tr_type") == "2":
+            if (tr_id, tr_key) not in session.subscriptions:
+                return reply("1", "OPSP0003", "UNSUBSCRIBE ERROR(not found!)")
+            session.subscriptions.discard((tr_id, tr_key))
+            return reply("0", "OPSP0001", "UNSUBSCRIBE SUCCESS")
+        if (tr_id, tr_key) in session.subscriptions:
+            return reply("1", "OPSP0002", "ALREADY IN SUBSCRIBE")
+        if len(session.subscriptions) >= state.config.ws_max_subscriptions:
+            return reply("1", "OPSP0008", "MAX SUBSCRIBE OVER")
+        session.subscriptions.add((tr_id, tr_key))
+        return reply("0", "OPSP0000", "SUBSCRIBE SUCCESS", {"iv": session.iv, "key": session.key})
+
+    # --- Admin (test / benchmark control) ---
+    @app.get("/__admin/stats")
+    def admin_stats():
+        return {**state.stats(), "ws_sessions": len(sessions)}
+
+    @app.post("/__admin/reset")
+    def admin_reset():
+        state.reset_stats()
+        return {"status": "ok"}
+
+    @app.get("/__admin/config")
+    def admin_get_config():
+        return asdict(state.config)
+
+    @app.post("/__admin/config")
+    async def admin_set_config(request: Request):
+        state.config.update(await request.json())
+        return asdict(state.config)
+
+    @app.post("/__admin/tokens/expire")
+    def admin_expire_tokens():
+        state.expire_tokens()
+        return {"status": "ok"}
+
+    @app.post("/__admin/ws/drop")
+    async def admin_drop_ws():
+        dropped = list(sessions)
+        for session in dropped:
+            await session.websocket.close(code=1011)
+        return {"dropped": len(dropped)}
+
+    return app
+
+class FakeKisServer:
+    """Run the fake KIS app on a background uvicorn thread (tests, benchmarks)"""
+    def __init__(self, config: FakeKisConfig = None, host: str = "127.0.0.1", port: int = 0):
+        self.app = create_app(config)
+        self.host = host
+        self.port = port or self._free_port(host)
+        self._server = uvicorn.Server(uvicorn.Config(self.app, host=self.host, port=self.port, log_level="warning"))
+        self._thread: Optional[threading.Thread] = None
+
+    @staticmethod
+    def _free_port(host: str) -> int:
+        with socket.socket() as sock:
+            sock.bind((host, 0))
+            return sock.getsockname()[1]
+
+    @property
+    def state(self) -> FakeKisState:
+        return self.app.state.kis
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    @property
+    def ws_url(self) -> str:
+        return f"ws://{self.host}:{self.port}"
+
+    def start(self, timeout: float = 10.0) -> "FakeKisServer":
+        self._thread = threading.Thread(target=self._server.run, name="fake-kis", daemon=True)
+        self._thread.start()
+        deadline = time.monotonic() + timeout
+        while not self._server.started:
+            if time.monotonic() > deadline or not self._thread.is_alive():
+                raise RuntimeError("Fake KIS server failed to start")
+            time.sleep(0.02)
+        return self
+
+    def stop(self):
+        self._server.should_exit = True
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    def __enter__(self) -> "FakeKisServer":
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
@@ -0,0 +1,266 @@
+import math
+import random
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+@dataclass
+class FakeKisConfig:
+    """Behaviour knobs of the fake KIS server (all adjustable at runtime via /__admin/config)"""
+    latency_ms: float = 0.0          # Added to every REST response
+    jitter_ms: float = 0.0           # Uniform extra latency in [0, jitter_ms]
+    error_rate: float = 0.0          # Probability of HTTP 500 (generic server error)
+    throttle_rate: float = 0.0       # Probability of EGW00201 (초당 거래건수 초과) regardless of rate
+    rate_limit_per_sec: float = 0.0  # Per-appkey TR limit, EGW00201 above it (0 = off)
+    token_ttl: int = 86400           # expires_in of issued access tokens (seconds)
+    token_issue_interval: float = 0.0 # Min seconds between tokenP per appkey, EGW00133 below it (KIS: 60)
+    holdings: int = 20               # Holdings generated per account
+    page_size: int = 50              # inquire-balance rows per page (tr_cont continuation)
+    initial_cash: int = 10_000_000
+    fill_orders: bool = True         # True: orders fill immediately (H0STCNI0 pushed), False: stay unfilled
+    tick_interval: float = 1.0       # H0STCNT0 push interval per subscribed code (seconds)
+    pingpong_interval: float = 10.0  # PINGPONG push interval (seconds, 0 = off)
+    ws_max_subscriptions: int = 41   # Registrations per WebSocket session (MAX SUBSCRIBE OVER above it)
+    seed: int = 42
+
+    def update(self, values: Dict[str, Any]):
+        for key, value in values.items():
+            if hasattr(self, key):
+                setattr(self, key, type(getattr(self, key))(value))
+
+def ticker_at(index: int) -> str:
+    """Synthetic 6-digit ticker universe: 000010, 000020, ..."""
+    return f"{(index + 1) * 10:06d}"
+
+@dataclass
+class FakeOrder:
+    odno: str
+    cano: str
+    hts_id: str # Owner, H0STCNI0 notices go only to sessions subscribed to it
+    pdno: str
+    side: str # "01" sell / "02" buy
+    qty: int
+    price: int
+    filled_qty: int = 0
+    cancelled: bool = False
+    ord_tmd: str = field(default_factory=lambda: datetime.now().strftime("%H%M%S"))
+
+    @property
+    def remaining(self) -> int:
+        return 0 if self.cancelled else self.qty - self.filled_qty
+
+class FakeKisState:
+    """
+    In-memory market + brokerage state behind the fake server.
+    Accounts are created lazily (per CANO) with deterministic holdings,
+    so any account registered in the app works without setup.
+    """
+    def __init__(self, config: FakeKisConfig):
+        self.config = config
+        self.lock = threading.Lock()
+        self.tokens: Dict[str, float] = {} # access_token -> expires_at (epoch)
+        self.token_issued_at: Dict[str, float] = {} # appkey -> last tokenP (monotonic)
+        self.approval_keys = set()
+        self.accounts: Dict[str, Dict[str, Any]] = {} # cano -> {"cash": int, "holdings": {pdno: {...}}}
+        self.orders: List[FakeOrder] = []
+        self.request_counts: Dict[str, int] = {}
+        self.rejections: Dict[str, int] = {}
+        self._next_odno = 1
+        self._rate_windows: Dict[str, List[float]] = {}
+        self._started = time.time()
+
+    # --- Accounting ---
+    def count(self, tr_id: str, rejected: str = None):
+        with self.lock:
+            self.request_counts[tr_id] = self.request_counts.get(tr_id, 0) + 1
+            if rejected:
+                self.rejections[rejected] = self.rejections.get(rejected, 0) + 1
+
+    def allow(self, appkey: str) -> bool:
+        """Sliding one-second window per appkey"""
+        limit = self.config.rate_limit_per_sec
+        if limit <= 0:
+            return True
+        now = time.monotonic()
+        with self.lock:
+            window = [t for t in self._rate_windows.get(appkey, []) if now - t < 1.0]
+            if len(window) >= limit:
+                self._rate_windows[appkey] = window
+                return False
+            window.append(now)
+            self._rate_windows[appkey] = window
+            return True
+
+    def stats(self) -> Dict[str, Any]:
+        with self.lock:
+            return {
+                "requests": dict(self.request_counts),
+                "total_requests": sum(self.request_counts.values()),
+                "rejections": dict(self.rejections),
+                "accounts": len(self.accounts),
+                "orders": len(self.orders)
+            }
+
+    def reset_stats(self):
+        with self.lock:
+            self.request_counts.clear()
+            self.rejections.clear()
+
+    # --- Tokens ---
+    def issue_token(self, appkey: str) -> Optional[str]:
+        """New access token, or None while appkey is inside token_issue_interval"""
+        now = time.monotonic()
+        with self.lock:
+            last = self.token_issued_at.get(appkey)
+            if last is not None and now - last < self.config.token_issue_interval:
+                return None
+            self.token_issued_at[appkey] = now
+            token = f"fake-{random.getrandbits(96):024x}"
+            self.tokens[token] = time.time() + self.config.token_ttl
+        return token
+
+    def expire_tokens(self):
+        with self.lock:
+            self.tokens.clear()
+            self.token_issued_at.clear()
+
+    def issue_approval_key(self) -> str:
+        key = f"{random.getrandbits(128):032x}"
+        with self.lock:
+            self.approval_keys.add(key)
+        return key
+
+    def token_valid(self, authorization: Optional[str]) -> bool:
+        if not authorization or not authorization.startswith("Bearer "):
+            return False
+        expires_at = self.tokens.get(authorization[len("Bearer "):])
+        return expires_at is not None and time.time() < expires_at
+
+    # --- Market ---
+    @staticmethod
+    def ticker_index(ticker: str) -> int:
+        try:
+            return max(int(ticker) // 10 - 1, 0)
+        except ValueError:
+            return sum(map(ord, ticker))
+
+    def base_price(self, ticker: str) -> int:
+        rng = random.Random(self.config.seed * 1_000_003 + self.ticker_index(ticker))
+        return rng.randint(100, 20_000) * 10
+
+    def price(self, ticker: str) -> int:
+        """Deterministic oscillation around the base price (+-2%), tick size 10"""
+        base = self.base_price(ticker)
+        phase = (time.time() - self._started) / 30.0 + self.ticker_index(ticker)
+        return max(10, int(base * (1 + 0.02 * math.sin(phase)) / 10) * 10)
+
+    def quote(self, ticker: str) -> Dict[str, Any]:
+        base = self.base_price(ticker)
+        price = self.price(ticker)
+        diff = price - base
+        return {
+            "stck_prpr": str(price),
+            "prdy_vrss": str(diff),
+            "prdy_vrss_sign": "2" if diff > 0 else ("5" if diff < 0 else "3"),
+            "prdy_ctrt": f"{diff / base * 100:.2f}",
+            "acml_vol": str(100_000 + self.ticker_index(ticker) * 7),
+            "stck_oprc": str(base),
+            "stck_hgpr": str(max(base, price)),
+            "stck_lwpr": str(min(base, price)),
+            "hts_kor_isnm": f"종목{ticker}"
+        }
+
+    # --- Accounts ---
+    def account(self, cano: str) -> Dict[str, Any]:
+        with self.lock:
+            acc = self.accounts.get(cano)
+            if acc is None:
+                rng = random.Random(f"{self.config.seed}:{cano}")
+                holdings = {}
+                for i in range(self.config.holdings):
+                    pdno = ticker_at(i)
+                    qty = rng.randint(1, 100)
+                    avg = int(self.base_price(pdno) * rng.uniform(0.8, 1.2))
+                    holdings[pdno] = {"qty": qty, "avg": avg}
+                acc = self.accounts[cano] = {"cash": self.config.initial_cash, "holdings": holdings}
+            return acc
+
+    def balance_rows(self, cano: str) -> List[Dict[str, Any]]:
+        acc = self.account(cano)
+        rows = []
+        for pdno, h in sorted(acc["holdings"].items()):
+            if h["qty"] <= 0:
+                continue
+            price = self.price(pdno)
+            pchs_amt = h["qty"] * h["avg"]
+            evlu_amt = h["qty"] * price
+            rows.append({
+                "pdno": pdno,
+                "prdt_name": f"종목{pdno}",
+                "hldg_qty": str(h["qty"]),
+                "ord_psbl_qty": str(h["qty"]),
+                "pchs_avg_pric": f"{h['avg']:.4f}",
+                "pchs_amt": str(pchs_amt),
+                "prpr": str(price),
+                "evlu_amt": str(evlu_amt),
+                "evlu_pfls_amt": str(evlu_amt - pchs_amt),
+                "evlu_pfls_rt": f"{(evlu_amt - pchs_amt) / pchs_amt * 100:.2f}" if pchs_amt else "0.00",
+                "prdy_vrss": self.quote(pdno)["prdy_vrss"],
+                "fltt_rt": self.quote(pdno)["prdy_ctrt"]
+            })
+        return rows
+
+    def balance_summary(self, cano: str, rows: List[Dict[str, Any]]) -> Dict[str, Any]:
+        cash = self.account(cano)["cash"]
+        evlu = sum(int(r["evlu_amt"]) for r in rows)
+        pchs = sum(int(r["pchs_amt"]) for r in rows)
+        return {
+            "dnca_tot_amt": str(cash),
+            "prvs_rcdl_excc_amt": str(cash),
+            "scts_evlu_amt": str(evlu),
+            "tot_evlu_amt": str(cash + evlu),
+            "nass_amt": str(cash + evlu),
+            "pchs_amt_smtl_amt": str(pchs),
+            "evlu_amt_smtl_amt": str(evlu),
+            "evlu_pfls_smtl_amt": str(evlu - pchs)
+        }
+
+    @staticmethod
+    def hts_id(cano: str) -> str:
+        """HTS ID owning the account (the H0STCNI0 tr_key); one per fake account"""
+        return f"HTS{cano}"
+
+    # --- Orders ---
+    def place_order(self, cano: str, pdno: str, side: str, qty: int, price: int) -> FakeOrder:
+        self.account(cano)
+        with self.lock:
+            order = FakeOrder(odno=f"{self._next_odno:010d}", cano=cano, hts_id=self.hts_id(cano), pdno=pdno, side=side, qty=qty, price=price or self.price(pdno))
+            self._next_odno += 1
+            self.orders.append(order)
+        if self.config.fill_orders:
+            self.fill(order)
+        return order
+
+    def fill(self, order: FakeOrder):
+        with self.lock:
+            qty = order.remaining
+            if qty <= 0:
+                return
+            acc = self.accounts[order.cano]
+            holding = acc["holdings"].setdefault(order.pdno, {"qty": 0, "avg": order.price})
+            if order.side == "02": # Buy
+                total = holding["qty"] * holding["avg"] + qty * order.price
+                holding["qty"] += qty
+                holding["avg"] = total // holding["qty"]
+                acc["cash"] -= qty * order.price
+            else:
+                qty = min(qty, holding["qty"])
+                holding["qty"] -= qty
+                acc["cash"] += qty * order.price
+            order.filled_qty += qty
+
+    def find_order(self, cano: str, odno: str) -> Optional[FakeOrder]:
+        with self.lock:
+            return next((o for o in self.orders if o.cano == cano and o.odno == odno.zfill(10)), None)
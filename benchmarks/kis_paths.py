@@ -0,0 +1,332 @@
+"""
+KIS call-path benchmarks against the local fake KIS server.
+
+Drives get_balance, analyze_rebalance, execute_orders_by_action and
+SheetSyncService.sync_daily_data over a sweep of holdings count, account count
+and injected upstream latency, and writes p50/p95/p99 wall time, upstream
+request counts and peak thread count to a JSON file (diffable between commits).
+
+    python -m benchmarks.kis_paths --quick
+    python -m benchmarks.kis_paths --holdings 1,50,200 --accounts 1,20 --latency-ms 0,30 --out bench.json
+    python -m benchmarks.kis_paths --quick --baseline old.json
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import itertools
+import json
+import logging
+import math
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Dict, List
+from unittest import mock
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from backend.app.core.config import settings
+from backend.app.db.base import Base
+from backend.app.models import User, Account, TargetPortfolio, ScheduledOrder, TradeLog
+from backend.app.core.security import encrypt_data
+from backend.app.core.kis_client import KisClient
+from backend.app.core.rate_limiter import RateLimiter
+from backend.app.core.async_kis_client import AsyncKisClient
+from backend.app.core.quote_cache import QuoteCache
+from backend.app.core.balance_cache import BalanceSnapshotCache
+from backend.app.core.credential_cache import CredentialCache
+from backend.app.core.token_cache import TokenCache
+from backend.app.core.google_client import GoogleSheetClient
+from backend.app.core import scheduler
+from backend.app.api.endpoints.portfolio import analyze_rebalance
+from backend.app.services.sheet_sync_service import SheetSyncService
+from backend.fake_kis import FakeKisConfig, FakeKisServer
+from backend.fake_kis.state import ticker_at
+
+SCENARIOS = ("get_balance", "analyze_rebalance", "execute_orders_by_action", "sync_daily_data")
+
+class _NullWorksheet:
+    """Stands in for the Google worksheet: sync_daily_data only clears and writes it"""
+    def clear(self):
+        pass
+
+    def update(self, values=None, **kwargs):
+        self.rows = len(values or [])
+
+class ThreadSampler:
+    """Samples threading.active_count() in the background and keeps the peak"""
+    def __init__(self, interval: float = 0.002):
+        self.interval = interval
+        self.peak = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.peak = max(self.peak, threading.active_count())
+            self._stop.wait(self.interval)
+
+    def __enter__(self) -> "ThreadSampler":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile"""
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(pct / 100.0 * len(ordered)) - 1)]
+
+class Bench:
+    def __init__(self, server: FakeKisServer, db_path: str, orders_per_account: int):
+        self.server = server
+        self.orders_per_account = orders_per_account
+        self.engine = create_engine(f"sqlite:///{db_path}", connect_args={"check_same_thread": False})
+        self.Session = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
+        self.loop = asyncio.new_event_loop()
+
+    # --- Fixture data ---
+    def prepare(self, holdings: int, accounts: int, latency_ms: float):
+        Base.metadata.drop_all(bind=self.engine)
+        Base.metadata.create_all(bind=self.engine)
+        self.server.state.accounts.clear()
+        self.server.state.orders.clear()
+        self.server.state.config.update({"holdings": holdings, "latency_ms": latency_ms})
+        CredentialCache.invalidate()
+        TokenCache.invalidate()
+
+        db = self.Session()
+        try:
+            user = User(name="bench")
+            db.add(user)
+            db.commit()
+            for i in range(accounts):
+                acc = Account(
+                    user_id=user.id,
+                    alias=f"bench-{i}",
+                    cano=encrypt_data(f"{50000000 + i}"),
+                    acnt_prdt_cd="01",
+                    app_key=encrypt_data(f"bench-app-key-{i}"), # One rate budget per account, like real app keys
+                    app_secret=encrypt_data(f"bench-app-secret-{i}")
+                )
+                db.add(acc)
+                db.flush()
+                for code, pct in ((ticker_at(0), 30.0), (ticker_at(1), 30.0), (ticker_at(holdings + 1), 20.0), ("CASH", 20.0)):
+                    db.add(TargetPortfolio(account_id=acc.id, stock_code=code, stock_name=code, target_percentage=pct))
+                for j in range(min(holdings, self.orders_per_account)):
+                    db.add(ScheduledOrder(
+                        account_id=acc.id, stock_code=ticker_at(j), stock_name=ticker_at(j), action="BUY",
+                        order_mode="QUANTITY", total_quantity=10**6, daily_quantity=1
+                    ))
+            db.commit()
+            self.account_ids = [a.id for a in db.query(Account).all()]
+            self.user_id = user.id
+        finally:
+            db.close()
+
+    def reset_iteration(self):
+        """Cold caches for every measured iteration (tokens stay valid, as in production)"""
+        QuoteCache.invalidate()
+        BalanceSnapshotCache.invalidate()
+        db = self.Session()
+        try:
+            db.query(TradeLog).delete()
+            db.query(ScheduledOrder).update({"status": "ACTIVE", "executed_quantity": 0})
+            db.commit()
+        finally:
+            db.close()
+
+    # --- Scenarios (one call = one operation over every account) ---
+    def run_get_balance(self):
+        def one(account_id):
+            db = self.Session()
+            try:
+                KisClient.get_balance(db.get(Account, account_id), db)
+            finally:
+                db.close()
+
+        # Concurrent dashboard loads, one request thread per account
+        with ThreadPoolExecutor(max_workers=len(self.account_ids)) as pool:
+            list(pool.map(one, self.account_ids))
+
+    def run_analyze_rebalance(self):
+        async def all_accounts():
+            sessions = [self.Session() for _ in self.account_ids]
+            try:
+                await asyncio.gather(*(analyze_rebalance(self.user_id, acc_id, db) for acc_id, db in zip(self.account_ids, sessions)))
+            finally:
+                for db in sessions:
+                    db.close()
+
+        self.loop.run_until_complete(all_accounts())
+
+    def run_execute_orders(self):
+        with mock.patch.object(scheduler, "SessionLocal", self.Session):
+            scheduler.execute_orders_by_action("BUY")
+
+    def run_sync_daily_data(self):
+        db = self.Session()
+        try:
+            with mock.patch.object(GoogleSheetClient, "get_worksheet", return_value=_NullWorksheet()):
+                SheetSyncService.sync_daily_data(db)
+        finally:
+            db.close()
+
+    def scenario(self, name: str) -> Callable[[], None]:
+        return {
+            "get_balance": self.run_get_balance,
+            "analyze_rebalance": self.run_analyze_rebalance,
+            "execute_orders_by_action": self.run_execute_orders,
+            "sync_daily_data": self.run_sync_daily_data
+        }[name]
+
+    def measure(self, name: str, iterations: int) -> Dict[str, Any]:
+        fn = self.scenario(name)
+        self.reset_iteration()
+        fn() # Warm-up: tokens, pooled connections
+
+        state = self.server.state
+        state.reset_stats()
+        wall_ms, errors = [], 0
+        with ThreadSampler() as sampler:
+            for _ in range(iterations):
+                self.reset_iteration()
+                start = time.perf_counter()
+                try:
+                    fn()
+                except Exception:
+                    errors += 1
+                wall_ms.append((time.perf_counter() - start) * 1000.0)
+
+        stats = state.stats()
+        return {
+            "wall_ms": {
+                "p50": round(percentile(wall_ms, 50), 2),
+                "p95": round(percentile(wall_ms, 95), 2),
+                "p99": round(percentile(wall_ms, 99), 2),
+                "mean": round(sum(wall_ms) / len(wall_ms), 2),
+                "max": round(max(wall_ms), 2)
+            },
+            "upstream_requests_per_op": round(stats["total_requests"] / iterations, 2),
+            "upstream_by_tr_per_op": {tr: round(n / iterations, 2) for tr, n in sorted(stats["requests"].items())},
+            "upstream_rejections": stats["rejections"],
+            "peak_threads": sampler.peak,
+            "errors": errors
+        }
+
+    def close(self):
+        self.loop.run_until_complete(AsyncKisClient.aclose())
+        self.loop.close()
+        self.engine.dispose()
+
+def _git_revision() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], stderr=subprocess.DEVNULL, text=True).strip()
+    except Exception:
+        return "unknown"
+
+def _ints(text: str) -> List[int]:
+    return [int(v) for v in text.split(",") if v]
+
+def _floats(text: str) -> List[float]:
+    return [float(v) for v in text.split(",") if v]
+
+def compare(baseline: Dict[str, Any], current: Dict[str, Any]):
+    """Print p50/p95 and request count deltas for matching result rows"""
+    key = lambda r: (r["scenario"], r["holdings"], r["accounts"], r["latency_ms"])
+    old = {key(r): r for r in baseline.get("results", [])}
+    print(f"\n{'scenario':<26}{'hold':>5}{'acc':>5}{'lat':>6}  {'p50 ms':>18}  {'p95 ms':>18}  {'req/op':>14}")
+    for row in current["results"]:
+        prev = old.get(key(row))
+        if prev is None:
+            continue
+        cells = []
+        for a, b in ((prev["wall_ms"]["p50"], row["wall_ms"]["p50"]), (prev["wall_ms"]["p95"], row["wall_ms"]["p95"])):
+            cells.append(f"{a:>7.1f}->{b:<7.1f}{(b / a - 1) * 100 if a else 0:+4.0f}%")
+        reqs = f"{prev['upstream_requests_per_op']:.0f}->{row['upstream_requests_per_op']:.0f}"
+        print(f"{row['scenario']:<26}{row['holdings']:>5}{row['accounts']:>5}{row['latency_ms']:>6.0f}  {cells[0]:>18}  {cells[1]:>18}  {reqs:>14}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark KIS call paths against the fake KIS server")
+    parser.add_argument("--holdings", default="1,20,50,200", help="Holdings per account (comma separated)")
+    parser.add_argument("--accounts", default="1,5,20", help="Account counts (comma separated)")
+    parser.add_argument("--latency-ms", default="0,20,50", help="Injected upstream latency (comma separated)")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS))
+    parser.add_argument("--iterations", type=int, default=10)
+    parser.add_argument("--orders-per-account", type=int, default=5, help="Scheduled BUY orders per account (capped by holdings)")
+    parser.add_argument("--unthrottled", action="store_true", help="Lift the client-side KIS rate limits (measure raw call-path cost)")
+    parser.add_argument("--quick", action="store_true", help="Small sweep (holdings 1,50 / accounts 1,5 / latency 0,20, 5 iterations)")
+    parser.add_argument("--out", default="benchmarks/results/latest.json")
+    parser.add_argument("--baseline", help="Previous result file to compare against")
+    parser.add_argument("--verbose", action="store_true", help="Keep application logs")
+    args = parser.parse_args()
+
+    if args.quick:
+        args.holdings, args.accounts, args.latency_ms, args.iterations = "1,50", "1,5", "0,20", 5
+    scenarios = [s for s in args.scenarios.split(",") if s]
+    unknown = set(scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+
+    if not args.verbose:
+        logging.disable(logging.CRITICAL)
+    quiet = contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(io.StringIO())
+
+    if args.unthrottled:
+        for name in ("KIS_RATE_INQUIRY_PER_SEC", "KIS_RATE_INQUIRY_BURST", "KIS_RATE_ORDER_PER_SEC", "KIS_RATE_ORDER_BURST"):
+            setattr(settings, name, type(getattr(settings, name))(10**6))
+        RateLimiter.reset()
+
+    results = []
+    tmpdir = tempfile.mkdtemp(prefix="fam-bench-")
+    config = FakeKisConfig(initial_cash=10**15, tick_interval=60.0, pingpong_interval=0.0)
+    with FakeKisServer(config) as server, mock.patch.object(settings, "KIS_BASE_URL", server.url):
+        bench = Bench(server, os.path.join(tmpdir, "bench.db"), args.orders_per_account)
+        try:
+            for holdings, accounts, latency in itertools.product(_ints(args.holdings), _ints(args.accounts), _floats(args.latency_ms)):
+                bench.prepare(holdings, accounts, latency)
+                for name in scenarios:
+                    with quiet:
+                        row = bench.measure(name, args.iterations)
+                    row = {"scenario": name, "holdings": holdings, "accounts": accounts, "latency_ms": latency, "iterations": args.iterations, **row}
+                    results.append(row)
+                    print(f"[Bench] {name:<26} holdings={holdings:<4} accounts={accounts:<3} latency={latency:<5.0f} "
+                          f"p50={row['wall_ms']['p50']:.1f}ms p95={row['wall_ms']['p95']:.1f}ms "
+                          f"req/op={row['upstream_requests_per_op']:.1f} threads={row['peak_threads']} errors={row['errors']}",
+                          file=sys.stderr)
+        finally:
+            with quiet:
+                bench.close()
+
+    output = {
+        "meta": {
+            "git_revision": _git_revision(),
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "iterations": args.iterations,
+            "orders_per_account": args.orders_per_account,
+            "rate_limited": not args.unthrottled
+        },
+        "results": results
+    }
+    os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(output, f, indent=2, sort_keys=True)
+    print(f"[Bench] Wrote {len(results)} results to {args.out}", file=sys.stderr)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            compare(json.load(f), output)
+
+if __name__ == "__main__":
+    main()
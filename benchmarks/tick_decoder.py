@@ -0,0 +1,143 @@
+"""
+H0STCNT0 tick decoding throughput (frames / sec), no network involved.
+
+Builds synthetic KIS frames carrying 1..N records and times
+  - legacy: the old listen_kis parse (first record only, 4 string fields)
+  - decode: kis_realtime.parse_ticks (every record, typed Tick)
+  - handle: WebSocketManager._handle_kis_message (decode + fan-out to one subscribed client)
+
+    python -m benchmarks.tick_decoder
+    python -m benchmarks.tick_decoder --records 1,10,40 --frames 50000 --out bench-ticks.json
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import sys
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List
+
+from backend.app.core.config import settings
+from backend.app.core.kis_realtime import H0STCNT0_FIELDS, parse_ticks
+from backend.app.core.websocket_manager import WebSocketManager
+from benchmarks.kis_paths import _git_revision, _ints
+
+MODES = ("legacy", "decode", "handle")
+
+def make_frame(records: int, seq: int = 0) -> str:
+    """One H0STCNT0 frame with `records` records (distinct codes, realistic field widths)"""
+    rows = []
+    for i in range(records):
+        values = {name: "0" for name in H0STCNT0_FIELDS}
+        price = 70000 + (seq + i) % 500 * 10
+        values.update({
+            "MKSC_SHRN_ISCD": f"{i:06d}", "STCK_CNTG_HOUR": "093015", "STCK_PRPR": str(price), "PRDY_VRSS_SIGN": "2",
+            "PRDY_VRSS": "300", "PRDY_CTRT": "0.43", "ASKP1": str(price + 10), "BIDP1": str(price),
+            "CNTG_VOL": "12", "ACML_VOL": str(1000000 + seq), "ACML_TR_PBMN": str(price * (1000000 + seq)),
+            "BSOP_DATE": "20260102", "NEW_MKOP_CLS_CODE": "20", "TRHT_YN": "N"
+        })
+        rows.append("^".join(values[name] for name in H0STCNT0_FIELDS))
+    return f"0|H0STCNT0|{records:03d}|" + "^".join(rows)
+
+def legacy_parse(text_msg: str) -> Dict[str, Any]:
+    """Pre-decoder listen_kis behaviour, kept as the baseline"""
+    payload = text_msg.split("|")[3]
+    data_parts = payload.split("^")
+    if len(data_parts) > 10:
+        return {"type": "PRICE", "code": data_parts[0], "price": data_parts[2], "change": data_parts[4], "rate": data_parts[5]}
+    return {}
+
+def decode(text_msg: str) -> list:
+    parts = text_msg.split("|")
+    return parse_ticks(parts[3], int(parts[2]))
+
+def _time_sync(fn: Callable[[str], Any], frames: List[str]) -> float:
+    start = time.perf_counter()
+    for frame in frames:
+        fn(frame)
+    return time.perf_counter() - start
+
+async def _time_handle(frames: List[str], records: int) -> float:
+    manager = WebSocketManager()
+    manager._candidate_accounts = lambda: [] # No KIS registration
+
+    class _Sink:
+        async def accept(self):
+            pass
+
+        async def send_text(self, text):
+            pass
+
+    sink = _Sink()
+    await manager.connect_client(sink)
+    await manager.subscribe_client(sink, [f"{i:06d}" for i in range(records)])
+    start = time.perf_counter()
+    for frame in frames:
+        await manager._handle_kis_message(None, frame)
+    elapsed = time.perf_counter() - start
+    manager.disconnect_client(sink)
+    return elapsed
+
+def measure(mode: str, records: int, frame_count: int, repeat: int) -> Dict[str, Any]:
+    frames = [make_frame(records, seq) for seq in range(min(frame_count, 1000))]
+    frames = (frames * (frame_count // len(frames) + 1))[:frame_count]
+    best = float("inf")
+    for _ in range(repeat):
+        if mode == "legacy":
+            elapsed = _time_sync(legacy_parse, frames)
+        elif mode == "decode":
+            elapsed = _time_sync(decode, frames)
+        else:
+            elapsed = asyncio.run(_time_handle(frames, records))
+        best = min(best, elapsed)
+    ticks = frame_count * (1 if mode == "legacy" else records)
+    return {
+        "frames_per_sec": round(frame_count / best),
+        "ticks_per_sec": round(ticks / best),
+        "us_per_frame": round(best / frame_count * 1e6, 2)
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark H0STCNT0 tick decoding (frames / sec)")
+    parser.add_argument("--records", default="1,5,20", help="Records per frame (comma separated)")
+    parser.add_argument("--frames", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=3, help="Best of N runs")
+    parser.add_argument("--modes", default=",".join(MODES))
+    parser.add_argument("--out", default="benchmarks/results/tick_decoder.json")
+    args = parser.parse_args()
+
+    modes = [m for m in args.modes.split(",") if m]
+    unknown = set(modes) - set(MODES)
+    if unknown:
+        parser.error(f"unknown modes: {', '.join(sorted(unknown))}")
+    logging.disable(logging.CRITICAL)
+    settings.WS_CLIENT_OVERFLOW_POLICY = "drop_oldest" # The sink never drains inside the timed loop
+
+    results = []
+    for records in _ints(args.records):
+        for mode in modes:
+            row = {"mode": mode, "records_per_frame": records, "frames": args.frames, **measure(mode, records, args.frames, args.repeat)}
+            results.append(row)
+            print(f"[Bench] {mode:<7} records={records:<3} {row['frames_per_sec']:>10,} frames/s "
+                  f"{row['ticks_per_sec']:>11,} ticks/s {row['us_per_frame']:>8.2f} us/frame", file=sys.stderr)
+
+    output = {
+        "meta": {
+            "git_revision": _git_revision(),
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "repeat": args.repeat
+        },
+        "results": results
+    }
+    os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(output, f, indent=2, sort_keys=True)
+    print(f"[Bench] Wrote {len(results)} results to {args.out}", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
@@ -10,6 +10,54 @@ import { ExecutedOrdersList } from "@/components/ExecutedOrdersList";
 import { OrderRevisionModal } from "@/components/OrderRevisionModal";
 import { cancelOrder } from "@/services/api";
 
+// FILL 이벤트 → 주문 목록 행 (KIS inquire-psbl-rvsecncl / inquire-daily-ccld 필드명)
+function toOrderRow(fill: any) {
+  return {
+    odno: fill.order_no,
+    pdno: fill.ticker,
+    prdt_name: fill.name,
+    sll_buy_dvsn_cd: fill.side === "SELL" ? "01" : "02",
+    ord_qty: String(fill.order_qty),
+    ord_unpr: String(fill.order_price),
+    rmn_qty: String(fill.remaining_qty),
+    psbl_qty: String(fill.remaining_qty),
+    nccs_qty: String(fill.remaining_qty),
+    tot_ccld_qty: String(fill.order_qty - fill.remaining_qty),
+    ord_tmd: fill.time
+  };
+}
+
+// 당일 체결 내역: 같은 주문번호면 체결수량 / 평균체결가 누적, 없으면 맨 위에 추가
+function applyFillToExecuted(orders: any[], fill: any) {
+  const index = orders.findIndex((o: any) => o.odno === fill.order_no);
+  if (index < 0) {
+    return [{ ...toOrderRow(fill), tot_ccld_qty: String(fill.filled_qty), avg_prvs: String(fill.filled_price) }, ...orders];
+  }
+  const order = orders[index];
+  const prevQty = parseInt(order.tot_ccld_qty || "0");
+  const prevAvg = parseFloat(order.avg_prvs || order.avg_unpr || "0");
+  const qty = prevQty + fill.filled_qty;
+  const next = [...orders];
+  next[index] = {
+    ...order,
+    tot_ccld_qty: String(qty),
+    avg_prvs: String(Math.round((prevAvg * prevQty + fill.filled_price * fill.filled_qty) / qty))
+  };
+  return next;
+}
+
+// 잔고 패치: 백엔드가 스냅샷에 반영한 보유종목 행으로 교체 (hldg_qty "0"이면 제거)
+// 예수금 / 합계(output2)는 수수료·세금·D+2 결제를 알 수 없으므로 다음 조회까지 그대로 둔다
+function applyHoldingToBalance(balance: any, holding: any) {
+  if (!balance) return balance;
+  const rows = (balance.output1 || []).filter((r: any) => r.pdno !== holding.pdno);
+  const index = (balance.output1 || []).findIndex((r: any) => r.pdno === holding.pdno);
+  if (parseInt(holding.hldg_qty || "0") > 0) {
+    rows.splice(index < 0 ? rows.length : index, 0, holding);
+  }
+  return { ...balance, output1: rows };
+}
+
 export default function Dashboard() {
   const { selectedAccount, accounts, isLoading: isContextLoading } = useAccount();
   const [balance, setBalance] = useState<any>(null);
@@ -232,14 +280,48 @@ export default function Dashboard() {
   }, [selectedAccount, accounts]);
 
   // WebSocket Integration
-  const { connect, disconnect } = useWebSocket(selectedAccount?.id || 0, (msg) => {
+  const { connect, disconnect, subscribe } = useWebSocket(selectedAccount?.id || 0, (msg) => {
     // Check msg type
     if (msg.type === "EXECUTION") {
-      console.log("Execution detected! Refreshing...");
-      // Trigger refresh
+      // KIS 재연결 후 "Refresh Required": 끊긴 동안 놓친 체결통보가 있을 수 있으므로 전체 재조회
+      console.log("Execution notices may have been missed. Refreshing...");
       loadBalance();
+      loadUnfilledOrders();
+      loadExecutedOrders();
+    } else if (msg.type === "FILL") {
+      // { type: "FILL", data: { order_no, original_order_no, ticker, name, side, is_fill, refused, filled_qty, filled_price, order_qty, order_price, remaining_qty, time }, holding: { pdno, hldg_qty, pchs_amt, ... } | null }
+      const fill = msg.data;
+      if (!fill.is_fill) {
+        if (fill.original_order_no || fill.refused) {
+          // 정정/취소/거부: 원주문 처리 결과를 이벤트만으로 알 수 없으므로 미체결 목록만 재조회
+          loadUnfilledOrders();
+        } else {
+          // 신규 주문 접수: 미체결 목록에 추가
+          setUnfilledOrders((prev) => prev.some((o: any) => o.odno === fill.order_no) ? prev : [toOrderRow(fill), ...prev]);
+        }
+        return;
+      }
+      // 체결: 미체결 잔량 / 체결 내역은 이벤트로, 잔고는 백엔드가 패치한 보유종목 행으로 반영
+      setUnfilledOrders((prev) => prev.flatMap((order: any) => {
+        if (order.odno !== fill.order_no) return [order];
+        if (fill.remaining_qty <= 0) return [];
+        return [{
+          ...order,
+          rmn_qty: String(fill.remaining_qty),
+          psbl_qty: String(fill.remaining_qty),
+          nccs_qty: String(fill.remaining_qty),
+          tot_ccld_qty: String(fill.order_qty - fill.remaining_qty)
+        }];
+      }));
+      setExecutedOrders((prev) => applyFillToExecuted(prev, fill));
+      if (msg.holding) {
+        setBalance((prev: any) => applyHoldingToBalance(prev, msg.holding));
+      } else {
+        // 백엔드에 잔고 스냅샷이 없었음: 재조회
+        loadBalance();
+      }
     } else if (msg.type === "PRICE") {
-      // { type: "PRICE", code: "...", price: "...", change: "...", rate: "..." }
+      // { type: "PRICE", code: "...", time: "HHMMSS", price, change, rate, volume, acml_vol, ask, bid } (숫자)
       if (!balance) return;
 
       setBalance((prev: any) => {
@@ -255,7 +337,7 @@ export default function Dashboard() {
             updated = true;
             // Calculate new evaluation
             const qty = parseInt(item.hldg_qty || "0");
-            const newPrice = parseInt(msg.price);
+            const newPrice = Number(msg.price);
             const purchaseAmt = parseInt(item.pchs_amt || "0");
 
             const newEvalAmt = qty * newPrice;
@@ -264,9 +346,9 @@ export default function Dashboard() {
 
             return {
               ...item,
-              prpr: msg.price,
-              prdy_vrss: msg.change,
-              prdy_ctrt: msg.rate,
+              prpr: String(msg.price),
+              prdy_vrss: String(msg.change),
+              prdy_ctrt: String(msg.rate),
               evlu_amt: newEvalAmt.toString(),
               evlu_pfls_amt: newProfitLoss.toString(),
               evlu_pfls_rt: newProfitRate.toFixed(2)
@@ -320,21 +402,17 @@ export default function Dashboard() {
     return () => disconnect();
   }, [selectedAccount]);
 
-  // Subscribe to prices when balance is loaded
+  // Subscribe to prices when balance is loaded (over this tab's socket; only these ticks are delivered)
+  const holdingCodes = (balance?.output1 || [])
+    .map((h: any) => h.pdno)
+    .filter((code: string) => code && code !== "CASH")
+    .join(",");
+
   useEffect(() => {
-    if (balance?.output1 && balance.output1.length > 0) {
-      const codes = balance.output1
-        .map((h: any) => h.pdno)
-        .filter((code: string) => code && code !== "CASH");
-
-      if (codes.length > 0) {
-        console.log("Subscribing to realtime prices:", codes);
-        import("@/services/api").then(({ subscribeRealtimePrice }) => {
-          subscribeRealtimePrice(codes).catch(e => console.error("Sub Error:", e));
-        });
-      }
-    }
-  }, [balance?.output1]); // Only trigger when holdings list changes
+    const codes = holdingCodes ? holdingCodes.split(",") : [];
+    console.log("Subscribing to realtime prices:", codes);
+    subscribe(codes);
+  }, [holdingCodes]); // Only trigger when holdings list changes (not on every tick)
 
   if (isContextLoading) {
     return <div className="p-10 text-center text-muted-foreground animate-pulse">데이터를 불러오는 중...</div>;
@@ -97,11 +97,6 @@ export const cancelOrder = async (data: { account_id: number, orgn_odno: string,
     return res.data;
 };
 
-export const subscribeRealtimePrice = async (codes: string[]) => {
-    const res = await api.post("/ws/subscribe", { codes });
-    return res.data;
-};
-
 export const deleteUser = async (userId: number) => {
     const res = await api.delete(`/users/${userId}`);
     return res.data;
@@ -255,6 +250,14 @@ import { useRef } from 'react';
 
 export const useWebSocket = (accountId: number, onMessage: (msg: any) => void) => {
     const ws = useRef<WebSocket | null>(null);
+    // Price codes this tab watches; (re)sent on every open so ticks are filtered server-side
+    const codes = useRef<string[]>([]);
+
+    const sendSubscription = () => {
+        if (ws.current && ws.current.readyState === WebSocket.OPEN && codes.current.length > 0) {
+            ws.current.send(JSON.stringify({ action: "subscribe", codes: codes.current }));
+        }
+    };
 
     const connect = () => {
         // Close existing
@@ -275,6 +278,7 @@ export const useWebSocket = (accountId: number, onMessage: (msg: any) => void) =
 
         ws.current.onopen = () => {
             console.log("WS Connected");
+            sendSubscription();
         };
 
         ws.current.onmessage = (event) => {
@@ -303,5 +307,14 @@ export const useWebSocket = (accountId: number, onMessage: (msg: any) => void) =
         }
     };
 
-    return { connect, disconnect };
+    const subscribe = (nextCodes: string[]) => {
+        const removed = codes.current.filter((code) => !nextCodes.includes(code));
+        codes.current = nextCodes;
+        if (ws.current && ws.current.readyState === WebSocket.OPEN && removed.length > 0) {
+            ws.current.send(JSON.stringify({ action: "unsubscribe", codes: removed }));
+        }
+        sendSubscription();
+    };
+
+    return { connect, disconnect, subscribe };
 };
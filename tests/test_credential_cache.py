@@ -0,0 +1,47 @@
+from backend.app.api.endpoints.accounts import delete_account, update_account
+from backend.app.core.credential_cache import CredentialCache
+from backend.app.core.security import encrypt_data
+from backend.app.models import Account, User
+from backend.app.schemas.user_account import AccountUpdate
+
+def _account(db_session) -> Account:
+    user = User(name="Cache User")
+    db_session.add(user)
+    db_session.commit()
+    account = Account(
+        user_id=user.id,
+        alias="cache",
+        cano=encrypt_data("11112222"),
+        acnt_prdt_cd="01",
+        app_key=encrypt_data("old-app-key"),
+        app_secret=encrypt_data("old-app-secret")
+    )
+    db_session.add(account)
+    db_session.commit()
+    return account
+
+def test_update_account_drops_stale_credentials_and_headers(db_session):
+    CredentialCache.invalidate()
+    account = _account(db_session)
+    assert CredentialCache.get(account).app_key == "old-app-key"
+    CredentialCache.build_header_template(account, "token-1")
+
+    update_account(account.id, AccountUpdate(cano="33334444", app_key="new-app-key"), db_session)
+
+    assert account.id not in CredentialCache._credentials
+    assert CredentialCache.get_header_template(account, "token-1") is None
+    creds = CredentialCache.get(account)
+    assert (creds.app_key, creds.app_secret, creds.cano) == ("new-app-key", "old-app-secret", "33334444")
+    assert CredentialCache.build_header_template(account, "token-1")["appkey"] == "new-app-key"
+
+def test_delete_account_drops_cached_credentials(db_session):
+    CredentialCache.invalidate()
+    account = _account(db_session)
+    account_id = account.id
+    CredentialCache.get(account)
+    CredentialCache.build_header_template(account, "token-1")
+
+    delete_account(account_id, db_session)
+
+    assert account_id not in CredentialCache._credentials
+    assert account_id not in CredentialCache._headers
@@ -0,0 +1,374 @@
+import asyncio
+import json
+import pytest
+import requests
+from datetime import datetime, timedelta
+import websockets
+from fastapi.testclient import TestClient
+from backend.app.main import app
+from backend.app.core.config import settings
+from backend.app.core.kis_client import KisClient
+from backend.app.core.quote_cache import QuoteCache
+from backend.app.core.balance_cache import BalanceSnapshotCache
+from backend.app.core.credential_cache import CredentialCache
+from backend.app.core.token_cache import TokenCache
+from backend.app.core.token_refresher import TokenRefresher
+from backend.app.core.websocket_manager import WebSocketManager
+from backend.app.core.security import encrypt_data
+from backend.app.models import User, Account, TargetPortfolio
+from backend.app.db import session as db_session_module
+from backend.fake_kis import FakeKisConfig, FakeKisServer
+
+client = TestClient(app)
+
+@pytest.fixture(scope="module")
+def fake_kis():
+    with FakeKisServer(FakeKisConfig(holdings=120, page_size=50, tick_interval=0.05)) as server:
+        yield server
+
+@pytest.fixture(autouse=True)
+def kis_env(fake_kis, monkeypatch):
+    monkeypatch.setattr(settings, "KIS_BASE_URL", fake_kis.url)
+    monkeypatch.setattr(settings, "KIS_WS_URL", fake_kis.ws_url)
+    fake_kis.state.reset_stats()
+    for cache in (QuoteCache, BalanceSnapshotCache, CredentialCache, TokenCache):
+        cache.invalidate()
+    yield
+
+@pytest.fixture
+def account(db_session):
+    user = User(name="Fake KIS User")
+    db_session.add(user)
+    db_session.commit()
+    acc = Account(
+        user_id=user.id,
+        alias="fake",
+        cano=encrypt_data("12345678"),
+        acnt_prdt_cd="01",
+        app_key=encrypt_data("fake-app-key"),
+        app_secret=encrypt_data("fake-app-secret")
+    )
+    db_session.add(acc)
+    db_session.commit()
+    return acc
+
+def test_balance_follows_pagination(fake_kis, account, db_session):
+    balance = KisClient.get_balance(account, db_session)
+
+    assert len(balance["output1"]) == 120
+    assert all(row["prpr"] for row in balance["output1"])
+    requests = fake_kis.state.stats()["requests"]
+    assert requests["tokenP"] == 1
+    assert requests["TTTC8434R"] == 3 # 50 + 50 + 20 rows
+    assert requests["FHKST11300006"] == 5 # Per page, 30 tickers per multi-quote: 2 + 2 + 1
+
+def test_order_invalidates_balance_snapshot(fake_kis, account, db_session):
+    before = KisClient.get_balance(account, db_session)
+    assert not any(row["pdno"] == "009990" for row in before["output1"])
+
+    result = KisClient.place_order(account, db_session, "009990", 1, 0, "BUY", ord_dvsn="01")
+    assert result["output"]["ODNO"]
+
+    after = KisClient.get_balance(account, db_session)
+    assert any(row["pdno"] == "009990" for row in after["output1"])
+    assert fake_kis.state.stats()["requests"]["TTTC8434R"] == 6
+
+def test_account_number_change_drops_balance_snapshot(fake_kis, account, db_session):
+    from backend.app.api.endpoints.accounts import update_account
+    from backend.app.schemas.user_account import AccountUpdate
+
+    KisClient.get_balance(account, db_session)
+    assert BalanceSnapshotCache.get(account.id) is not None
+
+    update_account(account.id, AccountUpdate(alias="renamed"), db_session)
+    assert BalanceSnapshotCache.get(account.id) is not None
+
+    update_account(account.id, AccountUpdate(cano="87654321"), db_session)
+    assert BalanceSnapshotCache.get(account.id) is None
+
+def test_analyze_rebalance(fake_kis, account, db_session):
+    for code, pct in (("000010", 40.0), ("009990", 40.0), ("CASH", 20.0)):
+        db_session.add(TargetPortfolio(account_id=account.id, stock_code=code, stock_name=code, target_percentage=pct))
+    db_session.commit()
+
+    response = client.get(f"/v1/portfolio/{account.user_id}/analysis/{account.id}")
+
+    assert response.status_code == 200
+    suggestions = {s["stock_code"]: s for s in response.json()["items"]}
+    assert suggestions["000010"]["current_qty"] > 0
+    assert suggestions["009990"]["current_price"] > 0 # Non-held target priced via multi-quote
+    assert suggestions["CASH"]["action"] == "RESERVE"
+
+def test_websocket_price_feed(fake_kis, account, db_session):
+    approval_key = KisClient.get_approval_key(account, db_session)
+
+    async def receive_tick():
+        async with websockets.connect(f"{settings.KIS_WS_URL}/tryitout/H0STCNT0") as ws:
+            await ws.send(json.dumps({
+                "header": {"approval_key": approval_key, "custtype": "P", "tr_type": "1", "content-type": "utf-8"},
+                "body": {"input": {"tr_id": "H0STCNT0", "tr_key": "000010"}}
+            }))
+            ack = json.loads(await ws.recv())
+            tick = await asyncio.wait_for(ws.recv(), timeout=5)
+            return ack, tick
+
+    ack, tick = asyncio.run(receive_tick())
+    assert ack["body"]["msg1"] == "SUBSCRIBE SUCCESS"
+    encrypted, tr_id, count, payload = tick.split("|")
+    assert (encrypted, tr_id, count) == ("0", "H0STCNT0", "001")
+    assert len(payload.split("^")) == 46
+
+def test_token_served_from_cache_after_first_fetch(fake_kis, account, db_session):
+    KisClient.get_price(account, db_session, "000010")
+    QuoteCache.invalidate()
+    account.access_token = None # Cached token must not depend on the ORM row
+    KisClient.get_price(account, db_session, "000010")
+
+    assert fake_kis.state.stats()["requests"]["tokenP"] == 1
+    assert TokenCache.stats()["hits"] >= 1
+
+def test_prerefresh_time_falls_inside_window():
+    expires_at = datetime.now() + timedelta(hours=24)
+    window_start = expires_at - timedelta(seconds=settings.TOKEN_PREREFRESH_WINDOW)
+    window_end = expires_at - timedelta(seconds=settings.TOKEN_PREREFRESH_MIN_LEAD)
+    for _ in range(50):
+        assert window_start <= TokenRefresher.pick_refresh_time(expires_at) <= window_end
+
+    # Window already passed -> refresh now
+    assert TokenRefresher.pick_refresh_time(datetime.now()) <= datetime.now()
+
+def test_background_refresh_renews_expiring_token(fake_kis, account, db_session, monkeypatch):
+    from tests.conftest import TestingSessionLocal
+    monkeypatch.setattr(db_session_module, "SessionLocal", TestingSessionLocal)
+    TokenRefresher.reset()
+
+    KisClient.get_price(account, db_session, "000010")
+    old_token = TokenCache.get(account.id)
+    # Pretend the token is about to expire (inside the pre-refresh window)
+    TokenCache.put(account.id, old_token, datetime.now() + timedelta(minutes=10))
+
+    TokenRefresher.refresh_account(account.id)
+
+    assert fake_kis.state.stats()["requests"]["tokenP"] == 2
+    assert TokenCache.get(account.id) != old_token
+    assert TokenCache.get_entry(account.id).expires_at > datetime.now() + timedelta(hours=1)
+    assert TokenRefresher.stats()["refreshed"] == 1
+    assert TokenRefresher.stats()["failures"] == 0
+
+def test_token_refresh_drops_header_template(fake_kis, account, db_session):
+    from backend.app.core.auth_manager import AuthManager
+
+    old_headers = KisClient._get_headers(account, db_session, "FHKST01010100")
+    assert account.id in CredentialCache._headers
+
+    AuthManager._refresh_token(account, db_session)
+
+    assert account.id not in CredentialCache._headers
+    new_headers = KisClient._get_headers(account, db_session, "FHKST01010100")
+    assert new_headers["authorization"] == f"Bearer {TokenCache.get(account.id)}"
+    assert new_headers["authorization"] != old_headers["authorization"]
+
+class _FrontendSocket:
+    def __init__(self):
+        self.received = []
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, text):
+        self.received.append(json.loads(text))
+
+def test_subscriptions_refcounted_and_sharded(fake_kis, account, db_session, monkeypatch):
+    from tests.conftest import TestingSessionLocal
+    monkeypatch.setattr(db_session_module, "SessionLocal", TestingSessionLocal)
+    monkeypatch.setattr(settings, "KIS_WS_MAX_SUBSCRIPTIONS", 3) # 2 price slots + 1 reserved per session
+    second = Account(user_id=account.user_id, alias="second", cano=encrypt_data("22223333"), acnt_prdt_cd="01",
+                     app_key=encrypt_data("second-key"), app_secret=encrypt_data("second-secret"))
+    db_session.add(second)
+    db_session.commit()
+
+    async def scenario():
+        manager = WebSocketManager()
+        await manager.ensure_session(account, db_session)
+        a, b = _FrontendSocket(), _FrontendSocket()
+        await manager.connect_client(a)
+        await manager.connect_client(b)
+        await manager.subscribe_client(a, ["000010", "000020", "000030"])
+        await manager.subscribe_client(b, ["000010", "000040"])
+        sharded = sorted(len(s.registered) for s in manager.sessions)
+        shared_refcount = manager.refcounts[("H0STCNT0", "000010")]
+
+        await asyncio.sleep(0.3) # Ticks arrive only for subscribed codes
+        manager.disconnect_client(a)
+        manager.disconnect_client(b)
+        await asyncio.sleep(0.2) # Unregister frames go out
+        remaining = sum(len(s.registered) for s in manager.sessions)
+        for session in manager.sessions:
+            await session.close()
+        return sharded, shared_refcount, remaining, a
+
+    sharded, shared_refcount, remaining, a = asyncio.run(scenario())
+    assert sharded == [2, 2] # 4 codes over two accounts' sessions
+    assert shared_refcount == 2
+    assert remaining == 0
+    assert {m["code"] for m in a.received if m.get("type") == "PRICE"} <= {"000010", "000020", "000030"}
+    # 4 registrations + 4 unregistrations
+    assert fake_kis.state.stats()["requests"]["WS:H0STCNT0"] == 8
+
+def test_kis_session_reconnects_and_replays(fake_kis, account, db_session, monkeypatch):
+    from tests.conftest import TestingSessionLocal
+    monkeypatch.setattr(db_session_module, "SessionLocal", TestingSessionLocal)
+    monkeypatch.setattr(settings, "KIS_WS_RECONNECT_BASE_DELAY", 0.05)
+    fake_kis.state.config.update({"pingpong_interval": 0.1})
+
+    async def scenario():
+        manager = WebSocketManager()
+        frontend = _FrontendSocket()
+        await manager.connect_client(frontend)
+        await manager.ensure_session(account, db_session)
+        await manager.subscribe_client(frontend, ["000010"])
+        await asyncio.sleep(0.3)
+
+        await asyncio.to_thread(requests.post, f"{fake_kis.url}/__admin/ws/drop")
+        await asyncio.sleep(0.1)
+        before = len(frontend.received)
+        await asyncio.sleep(0.5) # Reconnect + replay, ticks resume
+        after = len(frontend.received)
+        session = manager.sessions[0]
+        for s in manager.sessions:
+            await s.close()
+        return manager, session, before, after
+
+    try:
+        manager, session, before, after = asyncio.run(scenario())
+    finally:
+        fake_kis.state.config.update({"pingpong_interval": 10.0})
+
+    assert session.reconnects == 1
+    assert after > before
+    assert manager.approval_key_fetches == 1 # Cached key reused on reconnect
+    requests_seen = fake_kis.state.stats()["requests"]
+    assert requests_seen["Approval"] == 1
+    assert requests_seen["WS:H0STCNT0"] == 2 # Initial registration + replay
+    assert requests_seen["PINGPONG"] >= 1 # Echoed back
+
+def test_execution_notice_patches_balance_incrementally(fake_kis, account, db_session, monkeypatch):
+    from tests.conftest import TestingSessionLocal
+    monkeypatch.setattr(db_session_module, "SessionLocal", TestingSessionLocal)
+    account.hts_id = fake_kis.state.hts_id("12345678")
+    db_session.commit()
+    summary_before = KisClient.get_balance(account, db_session)["output2"][0] # Snapshot to patch
+    headers = KisClient._get_headers(account, db_session, "TTTC0802U")
+
+    async def scenario():
+        manager = WebSocketManager()
+        frontend, other = _FrontendSocket(), _FrontendSocket()
+        await manager.connect_client(frontend)
+        await manager.connect_client(other)
+        await manager.ensure_session(account, db_session)
+        await manager.subscribe_execution(account, account.hts_id, frontend)
+        await asyncio.sleep(0.2)
+
+        # Order placed outside this backend (e.g. HTS): only the notice tells us about it
+        body = {"CANO": "12345678", "ACNT_PRDT_CD": "01", "PDNO": "009980", "ORD_DVSN": "00", "ORD_QTY": "3", "ORD_UNPR": "1000"}
+        await asyncio.to_thread(requests.post, f"{fake_kis.url}/uapi/domestic-stock/v1/trading/order-cash", json=body, headers=headers)
+        # Another account's order must not show up as this account's fill
+        await asyncio.to_thread(requests.post, f"{fake_kis.url}/uapi/domestic-stock/v1/trading/order-cash", json={**body, "CANO": "99990000"}, headers=headers)
+        await asyncio.sleep(0.3)
+        for session in manager.sessions:
+            await session.close()
+        return frontend, other
+
+    frontend, other = asyncio.run(scenario())
+    notices = [m["data"] for m in frontend.received if m.get("type") == "FILL"]
+    assert [n["is_fill"] for n in notices] == [False, True]
+    assert {(n["hts_id"], n["account_no"]) for n in notices} == {(account.hts_id, "1234567801")}
+    fill = notices[-1]
+    assert (fill["ticker"], fill["side"], fill["filled_qty"], fill["filled_price"], fill["remaining_qty"]) == ("009980", "BUY", 3, 1000, 0)
+    assert not any(m.get("type") == "FILL" for m in other.received) # Other clients don't see this account
+
+    holding = [m["holding"] for m in frontend.received if m.get("type") == "FILL"][-1]
+    assert (holding["pdno"], holding["hldg_qty"], holding["pchs_amt"]) == ("009980", "3", "3000")
+
+    snapshot = BalanceSnapshotCache.get(account.id)
+    row = next(r for r in snapshot["output1"] if r["pdno"] == "009980")
+    assert row == holding
+    assert snapshot["output2"][0] == summary_before # Deposit / totals wait for the next full fetch
+    assert BalanceSnapshotCache.stats()["incremental_updates"] >= 1
+    assert fake_kis.state.stats()["requests"]["TTTC8434R"] == 3 # 120 holdings / 50 per page, no reload
+
+def test_sweep_skips_accounts_without_token(account, db_session, monkeypatch):
+    live = Account(user_id=account.user_id, alias="live", cano=encrypt_data("33334444"), acnt_prdt_cd="01",
+                   app_key=encrypt_data("live-key"), app_secret=encrypt_data("live-secret"),
+                   access_token=encrypt_data("live-token"), token_expired_at=datetime.now() + timedelta(hours=10))
+    expired = Account(user_id=account.user_id, alias="expired", cano=encrypt_data("44445555"), acnt_prdt_cd="01",
+                      app_key=encrypt_data("expired-key"), app_secret=encrypt_data("expired-secret"),
+                      access_token=encrypt_data("old-token"), token_expired_at=datetime.now() - timedelta(hours=1))
+    db_session.add_all([live, expired])
+    db_session.commit()
+    tracked = []
+    monkeypatch.setattr(TokenRefresher, "track", classmethod(lambda cls, account_id, expires_at: tracked.append(account_id)))
+    TokenRefresher.reset()
+
+    TokenRefresher.sweep(db_session)
+
+    assert live.id in tracked
+    assert expired.id in tracked # Planned for right away
+    assert account.id not in tracked # No token yet: minted lazily on first use
+
+def test_sharding_skips_candidate_that_fails_to_connect(fake_kis, account, db_session, monkeypatch):
+    import threading
+    from tests.conftest import TestingSessionLocal
+    monkeypatch.setattr(db_session_module, "SessionLocal", TestingSessionLocal)
+    monkeypatch.setattr(settings, "KIS_WS_MAX_SUBSCRIPTIONS", 2) # 1 price slot + 1 reserved per session
+    broken = Account(user_id=account.user_id, alias="broken", cano=encrypt_data("55556666"), acnt_prdt_cd="01",
+                     app_key=encrypt_data("revoked-key"), app_secret=encrypt_data("revoked-secret"))
+    second = Account(user_id=account.user_id, alias="second", cano=encrypt_data("77778888"), acnt_prdt_cd="01",
+                     app_key=encrypt_data("second-key"), app_secret=encrypt_data("second-secret"))
+    db_session.add_all([broken, second])
+    db_session.commit()
+    lookup_threads = []
+    original = WebSocketManager._candidate_accounts
+
+    def candidates():
+        lookup_threads.append(threading.current_thread())
+        return [a for a in original() if a.id in (broken.id, second.id)]
+    monkeypatch.setattr(WebSocketManager, "_candidate_accounts", staticmethod(candidates))
+    approval_key = WebSocketManager._approval_key
+
+    async def revoked_approval(self, account_id, account=None):
+        if account_id == broken.id:
+            raise ValueError("Approval rejected")
+        return await approval_key(self, account_id, account)
+    monkeypatch.setattr(WebSocketManager, "_approval_key", revoked_approval)
+
+    async def scenario():
+        manager = WebSocketManager()
+        await manager.ensure_session(account, db_session)
+        frontend = _FrontendSocket()
+        await manager.connect_client(frontend)
+        await manager.subscribe_client(frontend, ["000010", "000020"])
+        owners = sorted(s.account_id for s in manager.sessions)
+        for session in manager.sessions:
+            await session.close()
+        return owners
+
+    owners = asyncio.run(scenario())
+    assert owners == sorted([account.id, second.id]) # Broken account skipped, not fatal
+    assert lookup_threads and threading.main_thread() not in lookup_threads
+
+def test_manual_token_refresh_job_refreshes_expiring_tokens(fake_kis, account, db_session, monkeypatch):
+    from tests.conftest import TestingSessionLocal
+    from backend.app.api.endpoints.batch import BATCH_JOBS
+    from backend.app.core import scheduler as scheduler_module
+    monkeypatch.setattr(db_session_module, "SessionLocal", TestingSessionLocal)
+    monkeypatch.setattr(scheduler_module, "SessionLocal", TestingSessionLocal)
+    account.access_token = encrypt_data("old-token")
+    account.token_expired_at = datetime.now() + timedelta(minutes=10)
+    db_session.commit()
+
+    BATCH_JOBS["token_refresh"]()
+
+    db_session.refresh(account)
+    assert account.token_expired_at > datetime.now() + timedelta(hours=1)
+    assert fake_kis.state.stats()["requests"]["tokenP"] == 1
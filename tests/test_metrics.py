@@ -0,0 +1,36 @@
+from fastapi.testclient import TestClient
+from backend.app.main import app
+from backend.app.core.metrics import Histogram, KisCallTimer, KIS_REQUEST_DURATION
+
+client = TestClient(app)
+
+class _Response:
+    status_code = 500
+    content = b'{"rt_cd":"1","msg_cd":"EGW00201","msg1":"..."}'
+
+def test_histogram_exposition():
+    hist = Histogram("test_latency_seconds", "Test", ["tr_id"], buckets=(0.1, 1.0))
+    hist.observe(0.05, tr_id="A")
+    hist.observe(0.5, tr_id="A")
+    hist.observe(5.0, tr_id="A")
+
+    lines = hist.render()
+    assert 'test_latency_seconds_bucket{tr_id="A",le="0.1"} 1' in lines
+    assert 'test_latency_seconds_bucket{tr_id="A",le="1"} 2' in lines
+    assert 'test_latency_seconds_bucket{tr_id="A",le="+Inf"} 3' in lines
+    assert 'test_latency_seconds_count{tr_id="A"} 3' in lines
+
+def test_kis_call_timer_labels_status_and_msg_cd():
+    with KisCallTimer("TEST0001") as timer:
+        timer.response(_Response())
+
+    rendered = "\n".join(KIS_REQUEST_DURATION.render())
+    assert 'kis_request_duration_seconds_count{tr_id="TEST0001",status="500",msg_cd="EGW00201"} 1' in rendered
+
+def test_metrics_endpoint_reports_route_latency():
+    client.get("/health")
+    response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert 'http_request_duration_seconds_count{method="GET",route="/health",status="200"}' in response.text
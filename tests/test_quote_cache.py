@@ -0,0 +1,48 @@
+from datetime import datetime
+from backend.app.core.config import settings
+from backend.app.core.quote_cache import QuoteCache, KST, is_market_open, next_market_open
+
+def test_ttl_follows_market_hours():
+    # Wednesday 10:00 KST -> short market-hours TTL
+    during = KST.localize(datetime(2024, 5, 8, 10, 0))
+    assert is_market_open(during)
+    assert QuoteCache.ttl_seconds(during) == settings.QUOTE_CACHE_TTL_MARKET
+
+    # Friday 16:00 KST -> valid until Monday 09:00
+    after_close = KST.localize(datetime(2024, 5, 10, 16, 0))
+    assert not is_market_open(after_close)
+    assert next_market_open(after_close) == KST.localize(datetime(2024, 5, 13, 9, 0))
+    assert QuoteCache.ttl_seconds(after_close) == (2 * 24 + 17) * 3600
+
+def test_lru_eviction_and_counters(monkeypatch):
+    monkeypatch.setattr(settings, "QUOTE_CACHE_MAX_SIZE", 2)
+    QuoteCache.invalidate()
+    hits, misses = QuoteCache.stats()["hits"], QuoteCache.stats()["misses"]
+
+    QuoteCache.put("005930", {"output": {"stck_prpr": "70000"}})
+    QuoteCache.put("000660", {"output": {"stck_prpr": "150000"}})
+    assert QuoteCache.get("005930")["output"]["stck_prpr"] == "70000" # 005930 is now most recent
+
+    QuoteCache.put("035420", {"output": {"stck_prpr": "200000"}}) # evicts 000660
+    assert QuoteCache.get("000660") is None
+    assert QuoteCache.get("035420") is not None
+
+    stats = QuoteCache.stats()
+    assert stats["size"] == 2
+    assert stats["hits"] - hits == 2
+    assert stats["misses"] - misses == 1
+    QuoteCache.invalidate()
+
+def test_balance_global_invalidation_covers_unseen_accounts():
+    from backend.app.core.balance_cache import BalanceSnapshotCache
+    BalanceSnapshotCache.invalidate()
+
+    # Fetch for an account the cache has never seen starts, then everything is invalidated
+    generation = BalanceSnapshotCache.generation(987654)
+    BalanceSnapshotCache.invalidate()
+    BalanceSnapshotCache.put(987654, {"output1": [], "output2": [{}]}, generation)
+    assert BalanceSnapshotCache.get(987654) is None
+
+    BalanceSnapshotCache.put(987654, {"output1": [], "output2": [{}]}, BalanceSnapshotCache.generation(987654))
+    assert BalanceSnapshotCache.get(987654) is not None
+    BalanceSnapshotCache.invalidate()
@@ -0,0 +1,52 @@
+from backend.app.core.rate_limiter import TokenBucket, RateLimiter
+
+def test_token_bucket_burst_then_wait():
+    bucket = TokenBucket(rate=10, capacity=3)
+
+    # Burst within capacity: no waiting
+    assert [bucket.reserve() for _ in range(3)] == [0.0, 0.0, 0.0]
+
+    # Budget spent: next callers are queued ~1/rate apart
+    first_wait = bucket.reserve()
+    second_wait = bucket.reserve()
+    assert 0.05 < first_wait <= 0.1
+    assert 0.15 < second_wait <= 0.2
+
+def test_rate_limiter_buckets_are_per_app_key_and_kind():
+    RateLimiter.reset()
+    a_inquiry = RateLimiter._get_bucket("key-a", RateLimiter.INQUIRY)
+
+    assert RateLimiter._get_bucket("key-a", RateLimiter.INQUIRY) is a_inquiry
+    assert RateLimiter._get_bucket("key-a", RateLimiter.ORDER) is not a_inquiry
+    assert RateLimiter._get_bucket("key-b", RateLimiter.INQUIRY) is not a_inquiry
+
+    # Single call on an idle bucket adds no latency
+    assert RateLimiter.acquire("key-c", RateLimiter.INQUIRY) == 0.0
+    RateLimiter.reset()
+
+def test_async_requests_share_the_global_concurrency_cap(monkeypatch):
+    import asyncio
+    import threading
+    from backend.app.core.http_transport import HttpTransport
+
+    slots = threading.BoundedSemaphore(2)
+    monkeypatch.setattr(HttpTransport, "_slots", slots)
+    slots.acquire() # One sync request in flight
+    peak = 0
+    active = 0
+
+    async def call():
+        nonlocal peak, active
+        async with HttpTransport.async_slot():
+            active += 1
+            peak = max(peak, active)
+            await asyncio.sleep(0.01)
+            active -= 1
+
+    async def scenario():
+        await asyncio.gather(*(call() for _ in range(5)))
+
+    asyncio.run(scenario())
+    slots.release()
+    assert peak == 1 # Only the slot left over by the sync path
+    assert HttpTransport.stats()["async_in_flight"] == 0
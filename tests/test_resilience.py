@@ -0,0 +1,82 @@
+import json
+import pytest
+from backend.app.core.config import settings
+from backend.app.core.resilience import CircuitBreaker, KisResilience
+
+class FakeResponse:
+    def __init__(self, body: dict, status_code: int = 200):
+        self.status_code = status_code
+        self.content = json.dumps(body).encode("utf-8")
+        self._body = body
+
+    def json(self):
+        return self._body
+
+@pytest.fixture(autouse=True)
+def fast_retries(monkeypatch):
+    monkeypatch.setattr(settings, "KIS_RETRY_BASE_DELAY", 0.0)
+    monkeypatch.setattr(settings, "KIS_RETRYABLE_MSG_CODES", "EGW00201,EGW00999")
+    monkeypatch.setattr(settings, "KIS_ORDER_RETRYABLE_MSG_CODES", "EGW00201")
+
+def _run(endpoint: str, body: dict, idempotent: bool) -> int:
+    calls = []
+
+    def send():
+        calls.append(1)
+        return FakeResponse(body, status_code=500)
+
+    KisResilience.execute(endpoint, send, idempotent=idempotent)
+    return len(calls)
+
+def test_orders_retry_only_allowlisted_codes():
+    attempts = settings.KIS_RETRY_MAX_ATTEMPTS
+
+    assert _run("test-inquiry", {"rt_cd": "1", "msg_cd": "EGW00999"}, idempotent=True) == attempts
+    assert _run("test-order-a", {"rt_cd": "1", "msg_cd": "EGW00999"}, idempotent=False) == 1
+    assert _run("test-order-b", {"rt_cd": "1", "msg_cd": "EGW00201"}, idempotent=False) == attempts
+
+def test_half_open_breaker_stays_put_on_business_error(monkeypatch):
+    monkeypatch.setattr(settings, "KIS_BREAKER_FAILURE_THRESHOLD", 2)
+    monkeypatch.setattr(settings, "KIS_BREAKER_RESET_TIMEOUT", 0.0)
+    breaker = CircuitBreaker("test")
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+
+    breaker.before_call() # Probe
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    breaker.release() # Throttled / business error: not a verdict on KIS health
+    assert (breaker.state, breaker.failures) == (CircuitBreaker.HALF_OPEN, 2)
+
+    breaker.before_call() # Probe slot was freed
+    breaker.record_success()
+    assert (breaker.state, breaker.failures) == (CircuitBreaker.CLOSED, 0)
+
+def test_business_error_does_not_reset_failure_count():
+    breaker = KisResilience.get_breaker("test-business")
+    breaker.record_failure()
+
+    KisResilience.execute("test-business", lambda: FakeResponse({"rt_cd": "1", "msg_cd": "APBK0919"}))
+    assert breaker.failures == 1
+
+    KisResilience.execute("test-business", lambda: FakeResponse({"rt_cd": "0", "msg_cd": "MCA00000"}))
+    assert breaker.failures == 0
+
+def test_kis_auth_error_as_http_500_does_not_trip_breaker(monkeypatch):
+    monkeypatch.setattr(settings, "KIS_BREAKER_FAILURE_THRESHOLD", 2)
+    breaker = KisResilience.get_breaker("test-expired-token")
+    calls = []
+
+    def expired():
+        calls.append(1)
+        return FakeResponse({"rt_cd": "1", "msg_cd": "EGW00123", "msg1": "기간이 만료된 token 입니다."}, status_code=500)
+
+    for _ in range(3):
+        KisResilience.execute("test-expired-token", expired)
+
+    assert len(calls) == 3 # Not retried
+    assert (breaker.state, breaker.failures) == (CircuitBreaker.CLOSED, 0)
+
+    # Gateway 5xx without msg_cd still counts
+    KisResilience.execute("test-expired-token", lambda: FakeResponse({"error": "Bad Gateway"}, status_code=502), idempotent=False)
+    assert breaker.failures == 1
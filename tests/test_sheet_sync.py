@@ -0,0 +1,42 @@
+from backend.app.core.google_client import GoogleSheetClient
+from backend.app.core.kis_client import KisClient
+from backend.app.core.security import encrypt_data
+from backend.app.models import User, Account
+from backend.app.services.sheet_sync_service import SheetSyncService
+
+class _Worksheet:
+    def clear(self):
+        pass
+
+    def update(self, values=None, **kwargs):
+        self.values = values
+
+def _holding(code: str, evlu: int) -> dict:
+    return {"pdno": code, "prdt_name": code, "hldg_qty": "1", "prpr": str(evlu), "prdy_ctrt": "0",
+            "pchs_amt": str(evlu), "evlu_amt": str(evlu), "evlu_pfls_amt": "0"}
+
+def test_account_with_failed_page_is_left_out(db_session, monkeypatch):
+    user = User(name="Sheet User")
+    db_session.add(user)
+    db_session.commit()
+    ok, broken = [Account(user_id=user.id, alias=alias, cano=encrypt_data(cano), acnt_prdt_cd="01")
+                  for alias, cano in (("ok", "10000001"), ("broken", "10000002"))]
+    db_session.add_all([ok, broken])
+    db_session.commit()
+
+    def pages(account, db):
+        if account.id == ok.id:
+            yield {"output1": [_holding("000010", 1000)], "output2": [{"tot_evlu_amt": "2000"}]}
+        else:
+            yield {"output1": [_holding("000020", 5000)], "output2": []}
+            raise ValueError("page 2 failed")
+
+    worksheet = _Worksheet()
+    monkeypatch.setattr(GoogleSheetClient, "get_worksheet", staticmethod(lambda: worksheet))
+    monkeypatch.setattr(KisClient, "iter_balance_pages", staticmethod(pages))
+
+    SheetSyncService.sync_daily_data(db_session)
+
+    codes = [row[0] for row in worksheet.values[1:] if row and row[0]]
+    assert "000020" not in codes # Partial holdings of the failed account are not written
+    assert worksheet.values[1][0] == "000010" and worksheet.values[1][-1] == "50.0%"
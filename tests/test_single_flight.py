@@ -0,0 +1,101 @@
+import asyncio
+import threading
+import time
+import pytest
+from backend.app.core.single_flight import SingleFlight, AsyncSingleFlight
+
+def test_threads_share_one_execution_with_isolated_copies():
+    flight = SingleFlight("test")
+    calls = []
+    results = []
+    start = threading.Barrier(4)
+
+    def fetch():
+        calls.append(1)
+        time.sleep(0.1)
+        return {"output1": [{"pdno": "005930", "hldg_qty": "1"}]}
+
+    def caller():
+        start.wait()
+        results.append(flight.do("key", fetch))
+
+    threads = [threading.Thread(target=caller) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(calls) == 1
+    assert flight.stats() == {"in_flight": 0, "executions": 1, "coalesced": 3}
+    results[0]["output1"][0]["hldg_qty"] = "999" # Caller mutates its copy
+    assert all(r["output1"][0]["hldg_qty"] == "1" for r in results[1:])
+
+def test_threads_all_see_the_leader_error():
+    flight = SingleFlight("test")
+    errors = []
+    start = threading.Barrier(3)
+
+    def fail():
+        time.sleep(0.1)
+        raise ValueError("upstream down")
+
+    def caller():
+        start.wait()
+        try:
+            flight.do("key", fail)
+        except ValueError as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=caller) for _ in range(3)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(errors) == 3
+    assert flight.stats()["in_flight"] == 0
+
+def test_async_coalescing_and_error_propagation():
+    flight = AsyncSingleFlight("test")
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return {"output": {"stck_prpr": "70000"}}
+
+    async def fail():
+        await asyncio.sleep(0.05)
+        raise ValueError("upstream down")
+
+    async def scenario():
+        results = await asyncio.gather(*(flight.do("ok", fetch) for _ in range(3)))
+        errors = await asyncio.gather(*(flight.do("bad", fail) for _ in range(3)), return_exceptions=True)
+        return results, errors
+
+    results, errors = asyncio.run(scenario())
+    assert len(calls) == 1
+    results[0]["output"]["stck_prpr"] = "0"
+    assert [r["output"]["stck_prpr"] for r in results[1:]] == ["70000", "70000"]
+    assert all(isinstance(e, ValueError) for e in errors)
+    assert flight.stats() == {"in_flight": 0, "executions": 2, "coalesced": 4}
+
+def test_async_cancelled_leader_does_not_cancel_followers():
+    flight = AsyncSingleFlight("test")
+
+    async def fetch():
+        await asyncio.sleep(0.05)
+        return {"rt_cd": "0"}
+
+    async def scenario():
+        leader = asyncio.ensure_future(flight.do("key", fetch))
+        await asyncio.sleep(0) # Leader registers the call
+        follower = asyncio.ensure_future(flight.do("key", fetch))
+        await asyncio.sleep(0)
+        leader.cancel() # e.g. the leader's HTTP client disconnected
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return await follower
+
+    assert asyncio.run(scenario()) == {"rt_cd": "0"}
+    assert flight.stats()["in_flight"] == 0
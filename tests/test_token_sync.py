@@ -0,0 +1,181 @@
+import threading
+from datetime import datetime, timedelta
+import pytest
+from sqlalchemy import create_engine, text
+from fastapi.testclient import TestClient
+from backend.app.main import app
+from backend.app.api.endpoints import sync as sync_endpoint
+from backend.app.db import session as db_session_module
+from backend.app.core.config import settings
+from backend.app.core.credential_cache import CredentialCache
+from backend.app.core.token_cache import TokenCache
+from backend.app.core.token_sync import TokenBroadcaster, TokenSubscriber
+from backend.app.core.security import encrypt_data, decrypt_data, blind_index
+from backend.app.db.migrations import ensure_account_cano_hash
+from backend.app.models import User, Account
+from tests.conftest import TestingSessionLocal
+
+client = TestClient(app)
+HEADERS = {"x-sync-key": settings.SYNC_API_KEY}
+
+@pytest.fixture(autouse=True)
+def sync_env(monkeypatch):
+    monkeypatch.setattr(sync_endpoint, "SessionLocal", TestingSessionLocal)
+    monkeypatch.setattr(db_session_module, "SessionLocal", TestingSessionLocal)
+    TokenBroadcaster.reset()
+    TokenCache.invalidate()
+    CredentialCache.invalidate()
+    yield
+
+@pytest.fixture
+def account(db_session):
+    user = User(name="Sync User")
+    db_session.add(user)
+    db_session.commit()
+    acc = Account(
+        user_id=user.id,
+        alias="sync",
+        cano=encrypt_data("87654321"),
+        acnt_prdt_cd="01",
+        app_key=encrypt_data("key"),
+        app_secret=encrypt_data("secret"),
+        access_token=encrypt_data("master-token"),
+        token_expired_at=datetime.now() + timedelta(hours=20)
+    )
+    db_session.add(acc)
+    db_session.commit()
+    return acc
+
+def test_first_subscribe_returns_snapshot(account):
+    response = client.get("/v1/sync/kis-tokens/subscribe", params={"since": -1}, headers=HEADERS)
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["snapshot"] is True
+    assert data["tokens"][0]["account_number"] == "87654321"
+    assert data["tokens"][0]["access_token"] == "master-token"
+
+def test_long_poll_wakes_on_new_token(account):
+    expires = datetime.now() + timedelta(hours=24)
+    timer = threading.Timer(0.2, TokenBroadcaster.publish, args=("87654321", "fresh-token", expires))
+    timer.start()
+
+    response = client.get("/v1/sync/kis-tokens/subscribe", params={"since": 0, "timeout": 5}, headers=HEADERS)
+
+    data = response.json()
+    assert data["snapshot"] is False
+    assert data["version"] == 1
+    assert [t["access_token"] for t in data["tokens"]] == ["fresh-token"]
+
+def test_subscriber_applies_pushed_token(account, db_session):
+    expires = datetime.now() + timedelta(hours=24)
+    applied = TokenSubscriber.apply([
+        {"account_number": "87654321", "access_token": "pushed-token", "expired_at": expires.isoformat()},
+        {"account_number": "00000000", "access_token": "other", "expired_at": expires.isoformat()}
+    ])
+
+    assert applied == 1
+    assert TokenCache.get(account.id) == "pushed-token"
+    db_session.refresh(account)
+    assert decrypt_data(account.access_token) == "pushed-token"
+
+def test_kis_token_lookup_uses_blind_index(account):
+    assert account.cano_hash == blind_index("87654321")
+
+    response = client.get("/v1/sync/kis-token/87654321", headers=HEADERS)
+
+    assert response.status_code == 200
+    assert response.json()["access_token"] == "master-token"
+    assert client.get("/v1/sync/kis-token/11111111", headers=HEADERS).status_code == 404
+
+def test_migration_adds_and_backfills_cano_hash(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    with engine.begin() as conn:
+        conn.execute(text(
+            "CREATE TABLE accounts (id INTEGER PRIMARY KEY, user_id INTEGER, alias VARCHAR, hts_id VARCHAR, "
+            "cano VARCHAR, acnt_prdt_cd VARCHAR, app_key VARCHAR, app_secret VARCHAR, access_token VARCHAR, "
+            "token_expired_at DATETIME, refresh_token VARCHAR, api_expiry_date VARCHAR)"
+        ))
+        conn.execute(text("INSERT INTO accounts (id, cano) VALUES (1, :cano)"), {"cano": encrypt_data("12341234")})
+
+    ensure_account_cano_hash(engine)
+
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT cano_hash FROM accounts WHERE id = 1")).scalar() == blind_index("12341234")
+
+def test_token_without_expiry_is_never_served_from_cache():
+    TokenCache.put(1, "old-token", datetime.now() + timedelta(hours=1))
+    TokenCache.put(1, "no-expiry-token", None)
+
+    assert TokenCache.get(1) is None
+    assert TokenCache.get_entry(1) is None
+
+def test_master_token_without_expiry_is_not_cached_under_old_expiry(account, db_session, monkeypatch):
+    from backend.app.core.auth_manager import AuthManager
+    from backend.app.core.http_transport import HttpTransport
+    from backend.app.core.token_refresher import TokenRefresher
+
+    class _Response:
+        def raise_for_status(self):
+            pass
+
+        def json(self):
+            return {"access_token": "master-new-token", "expired_at": None}
+
+    tracked = []
+    monkeypatch.setattr(settings, "MASTER_API_URL", "http://master.invalid")
+    monkeypatch.setattr(HttpTransport, "get", staticmethod(lambda *args, **kwargs: _Response()))
+    monkeypatch.setattr(TokenRefresher, "track", classmethod(lambda cls, account_id, expires_at: tracked.append(account_id)))
+    TokenCache.put(account.id, "master-token", account.token_expired_at)
+
+    assert AuthManager._refresh_token(account, db_session) == "master-new-token"
+
+    assert decrypt_data(account.access_token) == "master-new-token"
+    assert TokenCache.get(account.id) is None
+    assert tracked == []
+
+def test_refresh_lock_is_per_account(db_session, monkeypatch):
+    import time
+    from backend.app.core.auth_manager import AuthManager
+
+    user = User(name="Lock User")
+    db_session.add(user)
+    db_session.commit()
+    accounts = []
+    for alias in ("a", "b"):
+        acc = Account(user_id=user.id, alias=alias, cano=encrypt_data(f"1111000{len(accounts)}"), acnt_prdt_cd="01",
+                      app_key=encrypt_data(f"key-{alias}"), app_secret=encrypt_data("secret"))
+        db_session.add(acc)
+        accounts.append(acc)
+    db_session.commit()
+    a_id, b_id = accounts[0].id, accounts[1].id
+
+    spans = []
+    def slow_refresh(cls, account, db):
+        started = time.monotonic()
+        time.sleep(0.2) # Leaves the cache empty, so every caller refreshes
+        spans.append((account.id, started, time.monotonic()))
+        return f"token-{account.id}"
+    monkeypatch.setattr(AuthManager, "_refresh_token", classmethod(slow_refresh))
+
+    def caller(account_id):
+        db = TestingSessionLocal()
+        try:
+            AuthManager.get_token(db.query(Account).filter(Account.id == account_id).first(), db)
+        finally:
+            db.close()
+
+    threads = [threading.Thread(target=caller, args=(account_id,)) for account_id in (a_id, a_id, b_id)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    def overlaps(x, y):
+        return x[1] < y[2] and y[1] < x[2]
+
+    a_spans = [s for s in spans if s[0] == a_id]
+    b_span = next(s for s in spans if s[0] == b_id)
+    assert len(a_spans) == 2
+    assert not overlaps(*a_spans) # Same account: serialized
+    assert any(overlaps(a, b_span) for a in a_spans) # Other account: not blocked behind it
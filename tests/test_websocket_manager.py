@@ -0,0 +1,202 @@
+import asyncio
+import json
+from backend.app.core.config import settings
+from backend.app.core.kis_realtime import H0STCNI0_FIELDS, H0STCNT0_FIELDS, KIS_WS_MALFORMED_RECORDS, Tick, parse_executions, parse_ticks
+from types import SimpleNamespace
+from backend.app.core.websocket_manager import KisSession, WebSocketManager
+
+class FakeClientSocket:
+    """Frontend socket stand-in; `stalled` never completes a send"""
+    def __init__(self, stalled: bool = False):
+        self.stalled = stalled
+        self.received = []
+        self.closed_with = None
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, text: str):
+        if self.stalled:
+            await asyncio.Event().wait()
+        self.received.append(json.loads(text))
+
+    async def close(self, code: int = 1000):
+        self.closed_with = code
+
+def test_slow_client_does_not_block_broadcast(monkeypatch):
+    monkeypatch.setattr(settings, "WS_CLIENT_QUEUE_SIZE", 10)
+    monkeypatch.setattr(settings, "WS_CLIENT_OVERFLOW_POLICY", "drop_oldest")
+
+    async def scenario():
+        manager = WebSocketManager()
+        fast, slow = FakeClientSocket(), FakeClientSocket(stalled=True)
+        await manager.connect_client(fast)
+        await manager.connect_client(slow)
+        for i in range(5):
+            await manager.broadcast({"seq": i})
+            await asyncio.sleep(0)
+        for i in range(5, 50):
+            await manager.broadcast({"seq": i})
+        await asyncio.sleep(0.05)
+        return manager, fast
+
+    manager, fast = asyncio.run(scenario())
+    stats = manager.stats()
+    assert fast.received[-1] == {"seq": 49}
+    assert stats["dropped_messages"] > 0
+    assert stats["queue_depth_max"] == 10
+
+def test_disconnect_policy_drops_slow_consumer(monkeypatch):
+    monkeypatch.setattr(settings, "WS_CLIENT_QUEUE_SIZE", 3)
+    monkeypatch.setattr(settings, "WS_CLIENT_OVERFLOW_POLICY", "disconnect")
+
+    async def scenario():
+        manager = WebSocketManager()
+        slow = FakeClientSocket(stalled=True)
+        await manager.connect_client(slow)
+        for i in range(10):
+            await manager.broadcast({"seq": i})
+        await asyncio.sleep(0.01)
+        return manager, slow
+
+    manager, slow = asyncio.run(scenario())
+    assert manager.stats()["clients"] == 0
+    assert manager.stats()["slow_disconnects"] == 1
+    assert slow.closed_with == 1013
+
+def test_price_ticks_reach_only_subscribed_clients(monkeypatch):
+    monkeypatch.setattr(WebSocketManager, "_candidate_accounts", staticmethod(lambda: [])) # No KIS here
+
+    async def scenario():
+        manager = WebSocketManager()
+        a, b = FakeClientSocket(), FakeClientSocket()
+        await manager.connect_client(a)
+        await manager.connect_client(b)
+        await manager.subscribe_client(a, ["005930", "CASH"])
+        await manager.subscribe_client(b, ["000660"])
+        await manager.publish_price("005930", {"type": "PRICE", "code": "005930"})
+        await manager.publish_price("035420", {"type": "PRICE", "code": "035420"})
+        await asyncio.sleep(0.01)
+        manager.disconnect_client(a)
+        return manager, a, b
+
+    manager, a, b = asyncio.run(scenario())
+    assert [m["code"] for m in a.received] == ["005930"]
+    assert b.received == []
+    assert set(manager.code_subscribers) == {"000660"} # Index cleaned up on disconnect
+
+def _tick_record(code: str, price: int, acml_vol: int) -> str:
+    values = {name: "0" for name in H0STCNT0_FIELDS}
+    values.update({"MKSC_SHRN_ISCD": code, "STCK_CNTG_HOUR": "093000", "STCK_PRPR": str(price), "PRDY_VRSS": "-150",
+                   "PRDY_CTRT": "-0.21", "ASKP1": str(price + 100), "BIDP1": str(price), "CNTG_VOL": "7", "ACML_VOL": str(acml_vol)})
+    return "^".join(values[name] for name in H0STCNT0_FIELDS)
+
+def test_every_record_of_a_multi_record_frame_is_published(monkeypatch):
+    monkeypatch.setattr(WebSocketManager, "_candidate_accounts", staticmethod(lambda: [])) # No KIS here
+    records = [_tick_record("005930", 71000, 100), _tick_record("000660", 180000, 50), _tick_record("005930", 71100, 107)]
+    frame = "0|H0STCNT0|003|" + "^".join(records)
+
+    async def scenario():
+        manager = WebSocketManager()
+        a = FakeClientSocket()
+        await manager.connect_client(a)
+        await manager.subscribe_client(a, ["005930", "000660"])
+        await manager._handle_kis_message(None, frame)
+        await asyncio.sleep(0.01)
+        return a
+
+    a = asyncio.run(scenario())
+    ticks = [m for m in a.received if m.get("type") == "PRICE"]
+    assert [(t["code"], t["price"], t["acml_vol"]) for t in ticks] == [("005930", 71000, 100), ("000660", 180000, 50), ("005930", 71100, 107)]
+    assert ticks[0]["change"] == -150 and ticks[0]["rate"] == -0.21 and ticks[0]["ask"] == 71100 and ticks[0]["volume"] == 7
+
+def test_tick_decoder_drops_truncated_record():
+    payload = "^".join([_tick_record("005930", 71000, 100), _tick_record("000660", 180000, 50)[:20]])
+
+    assert [t.code for t in parse_ticks(payload, 2)] == ["005930"]
+    assert parse_ticks(_tick_record("005930", 71000, 100))[0] == Tick("005930", "093000", 71000, -150, -0.21, 7, 100, 71100, 71000)
+
+def _notice_record(order_no: str, qty: str) -> str:
+    values = {name: "" for name in H0STCNI0_FIELDS}
+    values.update({"CUST_ID": "hts", "ODER_NO": order_no, "SELN_BYOV_CLS": "02", "STCK_SHRN_ISCD": "005930",
+                   "CNTG_YN": "2", "CNTG_QTY": qty, "CNTG_UNPR": "71000", "ODER_QTY": "10", "ODER_PRC": " "})
+    return "^".join(values[name] for name in H0STCNI0_FIELDS)
+
+def test_malformed_notice_does_not_drop_the_frame():
+    before = KIS_WS_MALFORMED_RECORDS._values.get(("H0STCNI0",), 0)
+    payload = "^".join([_notice_record("1", "abc"), _notice_record("2", " "), _notice_record("3", "4")])
+
+    events = parse_executions(payload, 3)
+
+    assert [(e.order_no, e.filled_qty, e.order_price) for e in events] == [("2", 0, 0), ("3", 4, 0)]
+    assert KIS_WS_MALFORMED_RECORDS._values[("H0STCNI0",)] == before + 1
+
+def _max_subscribe_over(manager: WebSocketManager, session: KisSession, key):
+    manager._handle_ack(session, {"header": {"tr_id": key[0], "tr_key": key[1]}, "body": {"msg_cd": "OPSP0008"}})
+
+def test_rejected_execution_key_stays_on_owner_session():
+    async def scenario():
+        manager = WebSocketManager()
+        owner, other = KisSession(manager, 1, 4), KisSession(manager, 2, 4) # Not connected: no KIS traffic
+        manager.sessions = [owner, other]
+        execution = ("H0STCNI0", "HTS1")
+        manager.account_subscriptions["HTS1"] = SimpleNamespace(id=1)
+        for key in (("H0STCNT0", "005930"), ("H0STCNT0", "000660"), execution):
+            owner.registered.add(key)
+            manager.routes[key] = owner
+            manager.refcounts[key] = 1
+
+        _max_subscribe_over(manager, owner, execution) # KIS allows only 2 on the owner's key
+        await asyncio.sleep(0.01)
+        return manager, owner, other, execution
+
+    manager, owner, other, execution = asyncio.run(scenario())
+    assert manager.routes[execution] is owner # Never moved to another account's session
+    assert execution in owner.registered
+    assert len(owner.registered) == owner.capacity == 2
+    assert len(other.registered) == 1 # One price key moved out to make room
+
+def test_session_left_empty_by_max_subscribe_over_is_closed():
+    async def scenario():
+        manager = WebSocketManager()
+        full, spare = KisSession(manager, 1, 4), KisSession(manager, 2, 4)
+        manager.sessions = [full, spare]
+        key = ("H0STCNT0", "005930")
+        full.registered.add(key)
+        manager.routes[key] = full
+        manager.refcounts[key] = 1
+
+        _max_subscribe_over(manager, full, key)
+        await asyncio.sleep(0.01)
+        return manager, full, spare, key
+
+    manager, full, spare, key = asyncio.run(scenario())
+    assert full.closed and full not in manager.sessions
+    assert manager.routes[key] is spare
+
+def test_reconnect_refresh_goes_only_to_that_sessions_accounts():
+    async def scenario():
+        manager = WebSocketManager()
+        session = KisSession(manager, 1, 4)
+        session.registered.update({("H0STCNI0", "HTS1"), ("H0STCNT0", "005930")})
+        mine, other_account, prices_only = FakeClientSocket(), FakeClientSocket(), FakeClientSocket()
+        for socket in (mine, other_account, prices_only):
+            await manager.connect_client(socket)
+        manager.clients[mine].execution_key = ("H0STCNI0", "HTS1")
+        manager.clients[other_account].execution_key = ("H0STCNI0", "HTS2")
+
+        await manager._on_session_reconnected(session)
+        await asyncio.sleep(0.01)
+        return mine, other_account, prices_only
+
+    mine, other_account, prices_only = asyncio.run(scenario())
+    assert mine.received == [{"type": "EXECUTION", "data": "Refresh Required"}]
+    assert other_account.received == [] and prices_only.received == []
+
+def test_broadcast_subscribe_endpoint_is_gone():
+    from fastapi.testclient import TestClient
+    from backend.app.main import app
+
+    response = TestClient(app).post("/v1/ws/subscribe", json={"codes": ["005930"]})
+
+    assert response.status_code == 410